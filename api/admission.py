@@ -0,0 +1,249 @@
+"""
+Control de admisión para /chat: límites de concurrencia, cola acotada y degradación
+
+- Límite global de peticiones en ejecución y límite por proveedor LLM
+- Cola de espera acotada; si está llena se rechaza de inmediato (429)
+- Si la espera supera el timeout de cola se rechaza (503)
+- Escalera de degradación según ocupación de la cola:
+  normal → solo respuestas FAQ directas/cacheadas → solo caché exacta
+- Las peticiones degradadas no hacen cola: tienen su propio límite pequeño
+  (embedding, búsqueda y cachés también consumen CPU) y si está lleno se
+  rechazan de inmediato (503)
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class AdmissionRejected(Exception):
+    """Petición rechazada por el control de admisión"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int = 1):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Planificador asíncrono de peticiones /chat"""
+
+    # Muestras de tiempo en cola conservadas para percentiles
+    QUEUE_TIME_SAMPLES = 1000
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        provider_limits: Optional[Dict[str, int]] = None,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+        degrade_faq_at: float = 0.5,
+        degrade_cache_at: float = 0.8,
+        max_degraded: int = 4
+    ):
+        """
+        Inicializa el planificador
+
+        Args:
+            max_concurrent: Máximo de peticiones en ejecución en el proceso
+            provider_limits: Máximo en ejecución por proveedor ({"groq": 8, ...})
+            max_queue: Máximo de peticiones esperando turno
+            queue_timeout: Segundos máximos de espera en cola
+            degrade_faq_at: Ocupación de la cola (0-1) desde la que solo se
+                responden FAQ directas y cachés (>1 = deshabilitado)
+            degrade_cache_at: Ocupación desde la que solo se responde desde caché exacta
+            max_degraded: Máximo de peticiones degradadas en ejecución
+        """
+        self.max_concurrent = max_concurrent
+        self.provider_limits = dict(provider_limits or {})
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.degrade_faq_at = degrade_faq_at
+        self.degrade_cache_at = degrade_cache_at
+        self.max_degraded = max_degraded
+
+        self._global = asyncio.Semaphore(max_concurrent)
+        self._providers = {
+            provider: asyncio.Semaphore(limit)
+            for provider, limit in self.provider_limits.items()
+        }
+        self._degraded = asyncio.Semaphore(max_degraded)
+
+        self.active = 0
+        self.active_by_provider = {}
+        self.queued = 0
+        self.active_degraded = 0
+        self._queue_times = deque(maxlen=self.QUEUE_TIME_SAMPLES)
+        self._stats = {
+            "admitted": 0,
+            "rejected_queue_full": 0,
+            "rejected_queue_timeout": 0,
+            "rejected_degraded": 0,
+            "rejected_degraded_busy": 0,
+            "degraded_faq_direct": 0,
+            "degraded_cache_only": 0,
+        }
+
+    def degradation_level(self) -> Optional[str]:
+        """
+        Nivel de degradación según la ocupación actual de la cola
+
+        Returns:
+            None (normal), "faq_direct" o "cache_only"
+        """
+        if self.max_queue <= 0:
+            return None
+
+        occupancy = self.queued / self.max_queue
+        if occupancy >= self.degrade_cache_at:
+            return "cache_only"
+        if occupancy >= self.degrade_faq_at:
+            return "faq_direct"
+        return None
+
+    def record_degraded(self, level: str, answered: bool):
+        """
+        Registra una petición atendida en modo degradado
+
+        Args:
+            level: Nivel de degradación aplicado
+            answered: Si se pudo responder sin LLM
+        """
+        self._stats[f"degraded_{level}"] += 1
+        if not answered:
+            self._stats["rejected_degraded"] += 1
+
+    async def acquire_degraded(self):
+        """
+        Toma un turno para una petición degradada, sin esperar
+
+        Raises:
+            AdmissionRejected: Si ya hay max_degraded peticiones degradadas en ejecución
+        """
+        if self._degraded.locked():
+            self._stats["rejected_degraded_busy"] += 1
+            raise AdmissionRejected(503, "Servidor saturado, intenta de nuevo en unos segundos")
+        await self._degraded.acquire()
+        self.active_degraded += 1
+
+    def release_degraded(self):
+        """Libera el turno de una petición degradada terminada"""
+        self.active_degraded -= 1
+        self._degraded.release()
+
+    async def acquire(self, provider: str, max_wait: Optional[float] = None) -> float:
+        """
+        Espera turno para ejecutar una petición
+
+        Args:
+            provider: Proveedor LLM de la petición
+            max_wait: Espera máxima propia de la petición (ej: su deadline);
+                se usa el menor entre este y el timeout de cola
+
+        Returns:
+            Segundos que la petición esperó en cola
+
+        Raises:
+            AdmissionRejected: Si la cola está llena o se agotó la espera
+        """
+        provider_sem = self._providers.get(provider)
+        must_wait = self._global.locked() or (provider_sem is not None and provider_sem.locked())
+
+        if must_wait and self.queued >= self.max_queue:
+            self._stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(429, "Servidor ocupado, intenta de nuevo en unos segundos")
+
+        start = time.perf_counter()
+        self.queued += 1
+        acquired_provider = False
+        queue_timeout = self.queue_timeout if max_wait is None else min(self.queue_timeout, max_wait)
+        try:
+            deadline = start + queue_timeout
+            if provider_sem is not None:
+                await asyncio.wait_for(provider_sem.acquire(), timeout=queue_timeout)
+                acquired_provider = True
+            await asyncio.wait_for(self._global.acquire(), timeout=max(0.0, deadline - time.perf_counter()))
+        except asyncio.TimeoutError:
+            if acquired_provider:
+                provider_sem.release()
+            self._stats["rejected_queue_timeout"] += 1
+            raise AdmissionRejected(503, "Tiempo de espera en cola agotado, intenta de nuevo")
+        except BaseException:
+            # Cliente desconectado mientras esperaba
+            if acquired_provider:
+                provider_sem.release()
+            raise
+        finally:
+            self.queued -= 1
+
+        waited = time.perf_counter() - start
+        self._queue_times.append(waited)
+        self._stats["admitted"] += 1
+        self.active += 1
+        self.active_by_provider[provider] = self.active_by_provider.get(provider, 0) + 1
+        return waited
+
+    def release(self, provider: str):
+        """
+        Libera el turno de una petición terminada
+
+        Args:
+            provider: Proveedor LLM de la petición
+        """
+        self.active -= 1
+        self.active_by_provider[provider] -= 1
+        self._global.release()
+        provider_sem = self._providers.get(provider)
+        if provider_sem is not None:
+            provider_sem.release()
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas del planificador
+
+        Returns:
+            Diccionario con ocupación, rechazos y tiempos en cola (segundos)
+        """
+        samples = sorted(self._queue_times)
+        queue_time = {"count": len(samples), "avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        if samples:
+            queue_time.update({
+                "avg": sum(samples) / len(samples),
+                "p50": samples[int(0.50 * (len(samples) - 1))],
+                "p95": samples[int(0.95 * (len(samples) - 1))],
+                "max": samples[-1],
+            })
+
+        stats = dict(self._stats)
+        stats.update({
+            "active": self.active,
+            "active_by_provider": dict(self.active_by_provider),
+            "queued": self.queued,
+            "active_degraded": self.active_degraded,
+            "max_degraded": self.max_degraded,
+            "max_concurrent": self.max_concurrent,
+            "provider_limits": dict(self.provider_limits),
+            "max_queue": self.max_queue,
+            "degradation_level": self.degradation_level() or "normal",
+            "queue_time": queue_time,
+        })
+        return stats
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """
+    Parsea límites por proveedor
+
+    Args:
+        spec: Texto 'deepseek:8,groq:8'
+
+    Returns:
+        Diccionario {proveedor: límite}
+    """
+    limits = {}
+    for item in spec.split(','):
+        if ':' in item:
+            provider, value = item.split(':', 1)
+            limits[provider.strip().lower()] = int(value)
+    return limits
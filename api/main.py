@@ -15,23 +15,86 @@ sys.path.insert(0, str(BASE_DIR))
 os.chdir(BASE_DIR)
 
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import asyncio
+import hmac
+import signal
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header, Request, Response, Depends
 
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
 import uvicorn
 from datetime import datetime
 
 from chatbot.chatbot import RAGChatbot
+from rag.engine import get_engine, preload_embedder
+from cache.idempotency import IdempotencyStore, IdempotencyConflictError, get_idempotency_store
+from config import APIConfig, StubLLMConfig
+from api.admission import AdmissionController, AdmissionRejected, parse_limits
+from deadline import Deadline, DeadlineExceeded
+from observability.log import bind_context, get_dropped_count, get_logger, reset_context
+from observability.metrics import ACTIVE_SESSIONS, HTTP_SECONDS, QUEUE_WAIT_SECONDS, REGISTRY, time_stage
+from observability.tracing import span, start_trace
+from observability import profiler
+from observability.capture import capture_request
+from observability.memory import memory_report, tracemalloc_stop
 
 from llm.transcription_client import TranscriptionClient
 
+# Modo preload-and-fork (ver gunicorn.conf.py): el maestro carga el modelo una
+# sola vez al importar la app y los workers comparten sus páginas
+if APIConfig.PRELOAD_EMBEDDER:
+    preload_embedder()
+
+# Estado del warm-up (consultado por /ready)
+warmup_state = {"ready": False, "error": None, "timings": None}
+
+
+def warm_up_engine():
+    """Carga el engine compartido y ejecuta el warm-up (bloqueante)"""
+    try:
+        engine = get_engine()
+        providers = [p.strip() for p in APIConfig.WARMUP_PROVIDERS.split(',') if p.strip()]
+        warmup_state["timings"] = engine.warm_up(
+            encodes=APIConfig.WARMUP_ENCODES,
+            providers=providers
+        )
+        warmup_state["ready"] = True
+    except Exception as e:
+        warmup_state["error"] = str(e)
+        print(f"❌ Error en warm-up: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Precarga el engine en segundo plano; /health responde mientras tanto"""
+    task = None
+    if APIConfig.WARMUP_ENABLED:
+        task = asyncio.create_task(run_in_threadpool(warm_up_engine))
+    else:
+        warmup_state["ready"] = True
+    # kill -USR2 <pid del worker> perfila una ventana sin reiniciarlo
+    if hasattr(signal, "SIGUSR2") and threading.current_thread() is threading.main_thread():
+        profiler.install_signal_handler(
+            signal.SIGUSR2, APIConfig.PROFILE_SIGNAL_SECONDS, APIConfig.PROFILE_DIR
+        )
+    yield
+    if task is not None:
+        task.cancel()
+
+
 # Inicializar FastAPI
 app = FastAPI(
     title="Chatbot VOAE API",
     description="API REST para el Chatbot de la Vicerrectoría de Orientación y Asuntos Estudiantiles",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS para permitir requests desde el frontend
@@ -47,10 +110,45 @@ app.add_middleware(
 chatbot_instance = None
 chat_sessions = {}  # {session_id: chatbot_instance}
 session_llm_providers = {}  # {session_id: llm_provider}
+sessions_lock = threading.Lock()
+ACTIVE_SESSIONS.set_function(lambda: len(chat_sessions))
+REGISTRY.gauge(
+    "voae_log_records_dropped",
+    "Registros de log descartados por cola llena"
+).set_function(get_dropped_count)
+
+logger = get_logger("api")
+
+
+@app.middleware("http")
+async def observe_request_duration(request: Request, call_next):
+    """Registra la duración de cada petición por ruta y código de estado"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Plantilla de la ruta (no la URL) para no crear una serie por sesión
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        HTTP_SECONDS.observe(time.perf_counter() - start, path=path, status=status)
 
 
 transcription_client = None
 
+# Control de admisión de /chat (compartido por todas las sesiones del proceso)
+admission = AdmissionController(
+    max_concurrent=APIConfig.MAX_CONCURRENT_REQUESTS,
+    provider_limits=parse_limits(APIConfig.PROVIDER_CONCURRENCY),
+    max_queue=APIConfig.MAX_QUEUE,
+    queue_timeout=APIConfig.QUEUE_TIMEOUT,
+    degrade_faq_at=APIConfig.DEGRADE_FAQ_AT,
+    degrade_cache_at=APIConfig.DEGRADE_CACHE_AT,
+    max_degraded=APIConfig.MAX_DEGRADED_CONCURRENT
+) if APIConfig.ADMISSION_ENABLED else None
+
 def get_transcription_client():
     """Obtiene o crea el cliente de transcripción"""
     global transcription_client
@@ -65,16 +163,20 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = "default"
     top_k: Optional[int] = 4
     temperature: Optional[float] = 0.7
-    llm_provider: Optional[str] = None  # "groq" o "deepseek"
+    llm_provider: Optional[str] = None  # "groq", "deepseek" o "stub" (con STUB_LLM_API_ENABLED)
+    request_id: Optional[str] = None  # Llave de idempotencia (alternativa al header Idempotency-Key)
 
 
 class ChatResponse(BaseModel):
     answer: str
     session_id: str
+    request_id: Optional[str] = None
+    replayed: bool = False
     match_type: Optional[str] = None
     best_faq_similarity: Optional[float] = None
     context_type: Optional[str] = None
     relevant_documents: List[Dict] = []
+    timings: Optional[Dict[str, float]] = None  # ms por etapa (también en el header Server-Timing)
     timestamp: str
 
 
@@ -86,6 +188,12 @@ class StatsResponse(BaseModel):
     llm_provider: str
     max_history: int
     current_history_length: int
+    llm_usage: Optional[Dict] = None
+    answer_cache: Optional[Dict] = None
+    semantic_cache: Optional[Dict] = None
+    single_flight: Optional[Dict] = None
+    idempotency: Optional[Dict] = None
+    admission: Optional[Dict] = None
 
 
 class HistoryResponse(BaseModel):
@@ -95,31 +203,82 @@ class HistoryResponse(BaseModel):
 
 class ModelChangeRequest(BaseModel):
     session_id: Optional[str] = "default"
-    llm_provider: str  # "groq" o "deepseek"
+    llm_provider: str  # "groq", "deepseek" o "stub" (con STUB_LLM_API_ENABLED)
 
 class TranscriptionResponse(BaseModel):
     text: Optional[str] = None
     timestamp: str
 
 
+class ProfileRequest(BaseModel):
+    duration: Optional[float] = Field(None, gt=0)  # Ventana en segundos
+    requests: Optional[int] = Field(None, ge=1)  # Próximas N peticiones /chat
+    interval_ms: float = Field(5.0, gt=0)  # Intervalo de muestreo
+
+
 # Funciones auxiliares
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Dependencia de los endpoints /debug/*: exige el header X-Admin-Token
+
+    Sin API_ADMIN_TOKEN configurado los endpoints no existen (404).
+    """
+    if not APIConfig.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, APIConfig.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+
+def check_provider(llm_provider: str):
+    """
+    Valida el proveedor LLM pedido por un cliente
+
+    El proveedor 'stub' (respuestas falsas con latencia simulada) solo se
+    acepta con STUB_LLM_API_ENABLED=true, para pruebas de carga.
+
+    Args:
+        llm_provider: Proveedor pedido
+
+    Raises:
+        HTTPException: 400 si el proveedor no existe o no está habilitado
+    """
+    if llm_provider == "stub" and not StubLLMConfig.API_ENABLED:
+        raise HTTPException(
+            status_code=400,
+            detail="El proveedor 'stub' no está habilitado (STUB_LLM_API_ENABLED)"
+        )
+    if llm_provider not in ["groq", "deepseek", "stub"]:
+        raise HTTPException(
+            status_code=400,
+            detail="Proveedor inválido. Usa 'groq' o 'deepseek'"
+        )
+
+
 def get_chatbot(session_id: str = "default", llm_provider: str = None) -> RAGChatbot:
     """Obtiene o crea una instancia del chatbot para la sesión"""
     # Si no se especifica proveedor, usar el guardado o default
     if llm_provider is None:
         llm_provider = session_llm_providers.get(session_id, "deepseek")
 
-    # Si no existe el chatbot o cambió el proveedor, recrear
-    if session_id not in chat_sessions or session_llm_providers.get(session_id) != llm_provider:
-        # Cerrar chatbot anterior si existe
-        if session_id in chat_sessions:
-            chat_sessions[session_id].close()
-
-        # Crear nuevo chatbot con el proveedor especificado
-        chat_sessions[session_id] = RAGChatbot(max_history=10, llm_provider=llm_provider)
-        session_llm_providers[session_id] = llm_provider
+    # Pipeline compartido por proveedor (el modelo de embeddings se carga una vez)
+    pipeline = get_engine().get_pipeline(llm_provider)
+
+    with sessions_lock:
+        # Si no existe el chatbot o cambió el proveedor, recrear
+        if session_id not in chat_sessions or session_llm_providers.get(session_id) != llm_provider:
+            # Cerrar chatbot anterior si existe
+            if session_id in chat_sessions:
+                chat_sessions[session_id].close()
+
+            # Crear nuevo chatbot (solo historial propio) sobre el pipeline compartido
+            chat_sessions[session_id] = RAGChatbot(
+                max_history=10,
+                llm_provider=llm_provider,
+                pipeline=pipeline
+            )
+            session_llm_providers[session_id] = llm_provider
 
-    return chat_sessions[session_id]
+        return chat_sessions[session_id]
 
 
 # Endpoints
@@ -143,42 +302,238 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Indica si el worker terminó el warm-up y puede recibir tráfico
+
+    Returns:
+        Estado y tiempos del warm-up (503 mientras no esté listo)
+    """
+    if not warmup_state["ready"]:
+        detail = {"status": "warming_up" if warmup_state["error"] is None else "failed"}
+        if warmup_state["error"] is not None:
+            detail["error"] = warmup_state["error"]
+        raise HTTPException(status_code=503, detail=detail)
+
+    return {
+        "status": "ready",
+        "warmup": warmup_state["timings"],
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Métricas del proceso en formato de exposición de Prometheus
+
+    Con varios workers cada uno expone las suyas; Prometheus debe raspar
+    cada worker o agregarlas por instancia.
+
+    Returns:
+        Texto de exposición (text/plain; version=0.0.4)
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    response: Response,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None)
+):
     """
     Endpoint principal para interactuar con el chatbot
 
+    Con llave de idempotencia (header Idempotency-Key o campo request_id), un
+    reintento del cliente recibe el resultado original, o espera al que sigue
+    en curso, sin volver a generar ni duplicar el turno en el historial. Por
+    eso una petición con llave no se cancela si el cliente se desconecta:
+    sigue hasta su propio deadline para que el reintento pueda unirse a ella.
+
+    Las peticiones pasan por el control de admisión: esperan turno en una cola
+    acotada (429 si está llena, 503 si se agota la espera) y, con la cola bajo
+    presión, solo se responden desde FAQ directa o caché.
+
+    Cada petición tiene un deadline de APIConfig.REQUEST_TIMEOUT que se propaga
+    a todas las etapas; si el cliente se desconecta (y la petición no trae
+    llave), se cancela y el pipeline corta la llamada al proveedor y libera el
+    worker.
+
+    Cada petición abre una traza: la duración de cada etapa (cola, embedding,
+    búsqueda, LLM...) vuelve en el header Server-Timing y en el campo timings.
+
     Args:
         request: ChatRequest con el mensaje del usuario
+        response: Respuesta HTTP (para el header Idempotent-Replayed)
+        http_request: Petición HTTP (para detectar desconexión del cliente)
+        idempotency_key: Header Idempotency-Key opcional
 
     Returns:
         ChatResponse con la respuesta del chatbot y metadata
     """
-    try:
-        # Obtener chatbot de la sesión (con proveedor LLM si se especifica)
-        chatbot = get_chatbot(request.session_id, request.llm_provider)
+    if request.llm_provider is not None:
+        check_provider(request.llm_provider)
+
+    request_id = idempotency_key or request.request_id
+    provider = (request.llm_provider or session_llm_providers.get(request.session_id, "deepseek")).lower()
+    capture_request(
+        message=request.message,
+        session_id=request.session_id,
+        top_k=request.top_k,
+        temperature=request.temperature,
+        llm_provider=request.llm_provider,
+        request_id=request_id
+    )
 
-        # Procesar mensaje
-        result = chatbot.chat(
-            user_message=request.message,
-            top_k=request.top_k,
-            temperature=request.temperature,
-            use_rag=True
-        )
+    # Bajo presión, solo se atienden respuestas que no requieren el LLM
+    degradation = admission.degradation_level() if admission else None
+
+    # Campos de log de la petición (se propagan al threadpool)
+    log_token = bind_context(request_id=request_id or uuid.uuid4().hex[:16], session_id=request.session_id)
+
+    with start_trace("POST /chat", session_id=request.session_id, provider=provider) as trace:
+        deadline = Deadline(APIConfig.REQUEST_TIMEOUT)
+        # Con llave, una desconexión suele venir seguida de un reintento con la
+        # misma llave: cancelar aquí lo obligaría a pagar otra generación
+        keyed = request_id is not None and get_idempotency_store() is not None
+        watcher = None if keyed else asyncio.create_task(_cancel_on_disconnect(http_request, deadline))
+
+        try:
+            if degradation is not None:
+                # Sin cola, pero acotadas: embedding, búsqueda y cachés también cuestan
+                await admission.acquire_degraded()
+                try:
+                    result, replayed = await _process_chat(request, request_id, response, deadline, degradation)
+                finally:
+                    admission.release_degraded()
+                admission.record_degraded(degradation, answered=result is not None)
+                if result is None:
+                    raise AdmissionRejected(503, "Servicio saturado: por ahora solo se responden preguntas frecuentes")
+            elif admission is not None:
+                with span("admission_queue"):
+                    waited = await admission.acquire(provider, max_wait=deadline.remaining())
+                QUEUE_WAIT_SECONDS.observe(waited)
+                try:
+                    result, replayed = await _process_chat(request, request_id, response, deadline)
+                finally:
+                    admission.release(provider)
+            else:
+                result, replayed = await _process_chat(request, request_id, response, deadline)
+
+            # Construir respuesta (las etapas hasta aquí van en Server-Timing y timings)
+            timings = trace.timings() if trace is not None else None
+            if trace is not None:
+                response.headers["Server-Timing"] = trace.server_timing()
+            with time_stage("serialization"):
+                return ChatResponse(
+                    answer=result.get("answer", "No se pudo generar una respuesta"),
+                    session_id=request.session_id,
+                    request_id=request_id,
+                    replayed=replayed,
+                    match_type=result.get("match_type"),
+                    best_faq_similarity=result.get("best_faq_similarity"),
+                    context_type=result.get("context_type"),
+                    relevant_documents=result.get("relevant_documents", []),
+                    timings=timings,
+                    timestamp=datetime.now().isoformat()
+                )
+
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=e.detail,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except DeadlineExceeded as e:
+            logger.warning("chat.deadline_exceeded", stage=e.stage, cancelled=e.cancelled)
+            # 499 (convención nginx): el cliente ya no espera la respuesta
+            raise HTTPException(status_code=499 if e.cancelled else 504, detail=str(e))
+        except IdempotencyConflictError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            logger.error("chat.error", exc_info=e, error=str(e))
+            raise HTTPException(status_code=500, detail=f"Error al procesar el mensaje: {str(e)}")
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            reset_context(log_token)
+            profiler.note_request_finished()
+
+
+async def _cancel_on_disconnect(http_request: Request, deadline: Deadline, interval: float = 0.25):
+    """
+    Cancela el deadline si el cliente cierra la conexión
 
-        # Construir respuesta
-        return ChatResponse(
-            answer=result.get("answer", "No se pudo generar una respuesta"),
-            session_id=request.session_id,
-            match_type=result.get("match_type"),
-            best_faq_similarity=result.get("best_faq_similarity"),
-            context_type=result.get("context_type"),
-            relevant_documents=result.get("relevant_documents", []),
-            timestamp=datetime.now().isoformat()
-        )
+    Args:
+        http_request: Petición HTTP en curso
+        deadline: Deadline de la petición
+        interval: Segundos entre comprobaciones
+    """
+    while not deadline.expired():
+        if await http_request.is_disconnected():
+            logger.warning("chat.client_disconnected")
+            deadline.cancel()
+            return
+        await asyncio.sleep(interval)
+
+
+async def _process_chat(
+    request: ChatRequest,
+    request_id: Optional[str],
+    response: Response,
+    deadline: Optional[Deadline] = None,
+    degradation: Optional[str] = None
+):
+    """
+    Procesa un mensaje con el chatbot de la sesión (con idempotencia si hay llave)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al procesar el mensaje: {str(e)}")
+    Args:
+        request: ChatRequest con el mensaje del usuario
+        request_id: Llave de idempotencia o None
+        response: Respuesta HTTP (para el header Idempotent-Replayed)
+        deadline: Deadline de la petición
+        degradation: Modo degradado bajo carga (ver RAGPipeline.query_with_faq)
+
+    Returns:
+        Tupla (resultado del chatbot, si fue reutilizado); el resultado es None
+        si el modo degradado no permite responder
+    """
+    # Obtener chatbot de la sesión (con proveedor LLM si se especifica); puede
+    # esperar a que termine de cargarse el engine, por eso va al threadpool
+    chatbot = await run_in_threadpool(get_chatbot, request.session_id, request.llm_provider)
+
+    def process() -> dict:
+        with profiler.track_current_thread():
+            return chatbot.chat(
+                user_message=request.message,
+                top_k=request.top_k,
+                temperature=request.temperature,
+                use_rag=True,
+                degradation=degradation,
+                deadline=deadline
+            )
+
+    # Procesar mensaje en el threadpool: el event loop sigue atendiendo otras
+    # peticiones y las preguntas idénticas concurrentes pueden agruparse
+    store = get_idempotency_store() if request_id else None
+    if store is None:
+        return await run_in_threadpool(process), False
+
+    fingerprint = IdempotencyStore.fingerprint({
+        "message": request.message,
+        "top_k": request.top_k,
+        "temperature": request.temperature,
+        "llm_provider": request.llm_provider,
+    })
+    result, replayed = await run_in_threadpool(
+        store.run, f"{request.session_id}:{request_id}", fingerprint, process
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result, replayed
 
 
 @app.get("/stats", response_model=StatsResponse)
@@ -195,6 +550,7 @@ async def get_stats(session_id: str = "default"):
     try:
         chatbot = get_chatbot(session_id)
         stats = chatbot.get_stats()
+        store = get_idempotency_store()
 
         # Obtener el proveedor actual de la sesión
         current_provider = session_llm_providers.get(session_id, "deepseek")
@@ -206,7 +562,13 @@ async def get_stats(session_id: str = "default"):
             llm_model=stats["llm_model"],
             llm_provider=current_provider,
             max_history=stats["max_history"],
-            current_history_length=stats["current_history_length"]
+            current_history_length=stats["current_history_length"],
+            llm_usage=stats.get("llm_usage"),
+            answer_cache=stats.get("answer_cache"),
+            semantic_cache=stats.get("semantic_cache"),
+            single_flight=stats.get("single_flight"),
+            idempotency=store.get_stats() if store else None,
+            admission=admission.get_stats() if admission else None
         )
 
     except Exception as e:
@@ -368,11 +730,7 @@ async def change_model(request: ModelChangeRequest):
     """
     try:
         # Validar proveedor
-        if request.llm_provider not in ["groq", "deepseek"]:
-            raise HTTPException(
-                status_code=400,
-                detail="Proveedor inválido. Usa 'groq' o 'deepseek'"
-            )
+        check_provider(request.llm_provider)
 
         # Forzar recreación del chatbot con nuevo proveedor
         if request.session_id in chat_sessions:
@@ -402,6 +760,99 @@ async def change_model(request: ModelChangeRequest):
         raise HTTPException(status_code=500, detail=f"Error al cambiar modelo: {str(e)}")
 
 
+@app.get("/debug/memory", dependencies=[Depends(require_admin)])
+async def debug_memory(tracemalloc: Optional[str] = None):
+    """
+    Desglose de la memoria de este worker por componente
+
+    Modelo (parámetros, tokenizador), índice HNSW, FAQs, cada capa de caché y
+    las sesiones, comparados con el RSS del proceso.
+
+    Args:
+        tracemalloc: "true" agrega el top de asignaciones de Python (la primera
+            vez solo activa tracemalloc); "stop" lo desactiva
+
+    Returns:
+        Reporte de memoria
+    """
+    if tracemalloc == "stop":
+        return tracemalloc_stop()
+
+    def build() -> dict:
+        engine = get_engine()
+        with sessions_lock:
+            sessions = dict(chat_sessions)
+        return memory_report(
+            engine,
+            pipelines=engine.get_pipelines(),
+            sessions=sessions,
+            extra_caches={"idempotency": get_idempotency_store()},
+            include_tracemalloc=tracemalloc == "true"
+        )
+
+    return await run_in_threadpool(build)
+
+
+@app.post("/debug/profile", dependencies=[Depends(require_admin)])
+async def start_profiling(request: ProfileRequest):
+    """
+    Perfila este worker durante las próximas N peticiones /chat o una ventana de tiempo
+
+    Con varios workers, la petición llega a uno de ellos (ver "pid" en la
+    respuesta); para elegir el worker usa kill -USR2 <pid>.
+
+    Args:
+        request: ProfileRequest con duration y/o requests
+
+    Returns:
+        Resumen inicial de la sesión (session_id para consultar el resultado)
+    """
+    if request.duration is None and request.requests is None:
+        raise HTTPException(status_code=422, detail="Indica duration o requests")
+
+    try:
+        session = profiler.start_profile(
+            duration=request.duration,
+            max_requests=request.requests,
+            interval=request.interval_ms / 1000,
+            output_dir=APIConfig.PROFILE_DIR
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return session.summary()
+
+
+@app.get("/debug/profile", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """Sesiones de profiling de este worker"""
+    return {"pid": os.getpid(), "sessions": profiler.list_sessions()}
+
+
+@app.get("/debug/profile/{session_id}", dependencies=[Depends(require_admin)])
+async def get_profile(session_id: str, format: str = "json", kind: str = "wall"):
+    """
+    Resultado de una sesión de profiling
+
+    Args:
+        session_id: Id de la sesión
+        format: "json" (resumen y funciones más frecuentes) o "folded" (flamegraph)
+        kind: "wall" o "cpu" (solo con format=folded)
+
+    Returns:
+        Resumen JSON, o el perfil en formato folded
+    """
+    session = profiler.get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Sesión '{session_id}' no encontrada en este worker")
+
+    if format == "folded":
+        return PlainTextResponse(session.folded(kind))
+    return session.summary()
+
+
 if __name__ == "__main__":
     # Ejecutar servidor
     print("🚀 Iniciando API del Chatbot VOAE...")
@@ -19,6 +19,54 @@ import transcribe from './services/speechToText.mjs';
 
 const API_BASE_URL = 'http://localhost:8000';
 
+// Menos que API_REQUEST_TIMEOUT (30 s) del servidor: si la respuesta tarda, el
+// reintento llega mientras la petición original sigue en curso y se une a ella
+const CHAT_TIMEOUT_MS = 25000;
+// Esperas antes de cada reintento de /chat (con la misma llave de idempotencia)
+const CHAT_RETRY_DELAYS_MS = [1000, 3000];
+
+// Llave de idempotencia. crypto.randomUUID solo existe en contextos seguros
+// (https o localhost); servida por http en una IP de la red no está disponible
+const newRequestId = () => {
+  if (window.crypto?.randomUUID) {
+    return window.crypto.randomUUID();
+  }
+  if (window.crypto?.getRandomValues) {
+    const bytes = window.crypto.getRandomValues(new Uint8Array(16));
+    bytes[6] = (bytes[6] & 0x0f) | 0x40;  // UUID v4
+    bytes[8] = (bytes[8] & 0x3f) | 0x80;
+    const hex = Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+};
+
+// Fallos transitorios: sin respuesta (timeout, red caída) o servidor saturado
+const isRetryable = (error) => {
+  const status = error.response?.status;
+  return !error.response || [429, 502, 503, 504].includes(status);
+};
+
+// Envía un mensaje y lo reintenta con la misma llave. El servidor no cancela una
+// petición con llave cuando el cliente se corta (timeout o red caída): el
+// reintento espera a la original si sigue en curso o recibe su resultado si ya
+// terminó con éxito, sin generar otro
+const postChat = async (payload, requestId) => {
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await axios.post(`${API_BASE_URL}/chat`, payload, {
+        headers: { 'Idempotency-Key': requestId },
+        timeout: CHAT_TIMEOUT_MS
+      });
+    } catch (error) {
+      if (attempt >= CHAT_RETRY_DELAYS_MS.length || !isRetryable(error)) {
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, CHAT_RETRY_DELAYS_MS[attempt]));
+    }
+  }
+};
+
 // TODO: AGREGAR EFECTO MIENTRAS EL BOT ESTÁ TRANSCRIBIENDO.
 
 function App() {
@@ -104,14 +152,17 @@ function App() {
     setInputMessage('');
     setIsLoading(true);
 
+    // Una llave por mensaje del usuario, compartida por todos sus reintentos
+    const requestId = newRequestId();
+
     try {
-      const response = await axios.post(`${API_BASE_URL}/chat`, {
+      const response = await postChat({
         message: message,
         session_id: sessionId.current,
         top_k: 4,
         temperature: 0.7,
         llm_provider: llmProvider  // Enviar proveedor actual
-      });
+      }, requestId);
 
       const assistantMessage = {
         role: 'assistant',
@@ -0,0 +1,53 @@
+"""
+Configuración de gunicorn para servir la API con varios workers
+
+Modo preload-and-fork: el maestro importa la app y carga bge-m3 una sola vez;
+los workers heredan los pesos por copy-on-write en lugar de cargar cada uno
+su copia (~2 GB por worker). Cada worker abre su propio cliente ChromaDB y
+limita sus hilos de torch para no sobre-suscribir los cores.
+
+Uso:
+    gunicorn -c gunicorn.conf.py api.main:app
+
+Variables de entorno: API_WORKERS, API_THREADS_PER_WORKER, API_HOST, API_PORT
+(ver .env.example).
+"""
+import gc
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
+
+from config import APIConfig
+
+workers = APIConfig.WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"{APIConfig.HOST}:{APIConfig.PORT}"
+timeout = APIConfig.REQUEST_TIMEOUT + 30
+
+# Importar la app (y cargar el modelo) en el maestro, antes del fork
+preload_app = True
+os.environ["API_PRELOAD_EMBEDDER"] = "true"
+APIConfig.PRELOAD_EMBEDDER = True
+
+# Hilos por worker: reparte los cores en lugar de que cada worker use todos
+threads_per_worker = APIConfig.THREADS_PER_WORKER or max(1, (os.cpu_count() or 1) // workers)
+
+# Las librerías BLAS/OpenMP leen estas variables al cargarse (antes de importar torch)
+for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(var, str(threads_per_worker))
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+def when_ready(server):
+    """Tras precargar la app: congelar el heap para que el GC no toque (y copie) sus páginas"""
+    gc.freeze()
+    server.log.info(f"App precargada; {workers} workers x {threads_per_worker} hilos de torch")
+
+
+def post_fork(server, worker):
+    """Configura los hilos de torch de cada worker"""
+    from embeddings.embedder import configure_threads
+
+    configure_threads(threads_per_worker)
@@ -0,0 +1,436 @@
+"""
+Prueba de carga que reproduce peticiones /chat capturadas (JSONL) contra la API
+
+Entrada: una línea JSON por petición con al menos "message" (el formato de
+API_CAPTURE_PATH sirve tal cual; también session_id, top_k, temperature,
+llm_provider). Dos modos de carga:
+
+- --concurrency N (lazo cerrado): N clientes, cada uno envía la siguiente
+  petición al recibir la respuesta anterior
+- --rate R (lazo abierto): R peticiones/s según un calendario fijo; la
+  latencia se mide desde la hora programada de envío, así una API saturada
+  no esconde su cola (omisión coordinada)
+
+Sin --url levanta uvicorn con api.main:app y el proveedor LLM "stub", de
+modo que corre sin red ni API keys (el modelo de embeddings debe estar en la
+caché local). Reporta p50/p95/p99, throughput, tasa de error por código y
+la duración por etapa del campo timings de cada respuesta; los resultados
+se guardan en data/bench/ con el commit actual para compararlos (--compare).
+
+Uso (desde la raíz del repo):
+    python src/bench/loadtest.py --input data/requests.jsonl --concurrency 8 --duration 60
+    python src/bench/loadtest.py --input data/requests.jsonl --rate 20 --requests 500 \\
+        --compare data/bench/loadtest-20250101-120000-abc1234.json
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from bench.workers import BASE_DIR, wait_ready
+
+
+def load_requests(path: str) -> List[Dict]:
+    """
+    Lee las peticiones a reproducir
+
+    Args:
+        path: Archivo JSONL (una petición por línea, con campo "message")
+
+    Returns:
+        Lista de peticiones en orden
+    """
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("message"):
+                    records.append(record)
+    if not records:
+        raise ValueError(f"{path} no tiene peticiones con campo 'message'")
+    return records
+
+
+def build_payload(record: Dict, n: int, provider: Optional[str], bust_cache: bool) -> Dict:
+    """
+    Arma el cuerpo de /chat para una petición capturada
+
+    La llave de idempotencia se descarta (si no, la API devolvería el
+    resultado original) y las sesiones se renombran para no mezclarse con
+    las reales.
+
+    Args:
+        record: Petición capturada
+        n: Número de envío
+        provider: Proveedor LLM a usar (None = el de la petición)
+        bust_cache: Agregar un sufijo único al mensaje para no medir la caché de respuestas
+
+    Returns:
+        Cuerpo JSON
+    """
+    payload = {
+        "message": f"{record['message']} ({n})" if bust_cache else record["message"],
+        "session_id": f"replay-{record.get('session_id') or 'default'}",
+    }
+    for key in ("top_k", "temperature"):
+        if record.get(key) is not None:
+            payload[key] = record[key]
+    if provider or record.get("llm_provider"):
+        payload["llm_provider"] = provider or record["llm_provider"]
+    return payload
+
+
+class _Client:
+    """Conexión HTTP persistente de un hilo (keep-alive, como un cliente real)"""
+
+    def __init__(self, base_url: str, timeout: float):
+        url = urlparse(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self.connection = None
+
+    def post(self, path: str, payload: Dict):
+        """
+        Envía un POST JSON
+
+        Returns:
+            Tupla (código HTTP, cuerpo decodificado o None)
+        """
+        body = json.dumps(payload).encode('utf-8')
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # El servidor cerró la conexión keep-alive: un reintento con conexión nueva
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+        try:
+            return response.status, json.loads(data)
+        except ValueError:
+            return response.status, None
+
+
+def _send(client: _Client, payload: Dict, scheduled: float) -> Dict:
+    """Envía una petición y registra su resultado (latencia desde scheduled)"""
+    try:
+        status, body = client.post("/chat", payload)
+    except (OSError, http.client.HTTPException) as e:
+        client.connection = None
+        return {"status": 0, "latency": time.perf_counter() - scheduled, "error": type(e).__name__}
+
+    result = {"status": status, "latency": time.perf_counter() - scheduled}
+    if status == 200 and body:
+        result["timings"] = body.get("timings") or {}
+        result["match_type"] = body.get("match_type")
+        result["replayed"] = body.get("replayed", False)
+    return result
+
+
+def run_closed_loop(base_url: str, records: List[Dict], args) -> Dict:
+    """
+    N clientes concurrentes, cada uno con una petición en vuelo
+
+    Returns:
+        Diccionario con resultados por petición y segundos transcurridos
+    """
+    results = []
+    lock = threading.Lock()
+    counter = [0]
+    start = time.perf_counter()
+    stop_at = start + args.duration if args.duration else None
+
+    def worker():
+        client = _Client(base_url, args.timeout)
+        while stop_at is None or time.perf_counter() < stop_at:
+            with lock:
+                n = counter[0]
+                if args.requests and n >= args.requests:
+                    return
+                counter[0] += 1
+            payload = build_payload(records[n % len(records)], n, args.provider, args.bust_cache)
+            result = _send(client, payload, time.perf_counter())
+            with lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"results": results, "elapsed": time.perf_counter() - start}
+
+
+def run_open_loop(base_url: str, records: List[Dict], args) -> Dict:
+    """
+    Peticiones a tasa fija, independiente de cuánto tarde la API
+
+    Returns:
+        Diccionario con resultados por petición y segundos transcurridos
+    """
+    results = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def task(payload: Dict, scheduled: float):
+        if not hasattr(local, "client"):
+            local.client = _Client(base_url, args.timeout)
+        result = _send(local.client, payload, scheduled)
+        with lock:
+            results.append(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.max_inflight) as pool:
+        n = 0
+        while not args.requests or n < args.requests:
+            scheduled = start + n / args.rate
+            if args.duration and scheduled - start >= args.duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(task, build_payload(records[n % len(records)], n, args.provider, args.bust_cache), scheduled)
+            n += 1
+    return {"results": results, "elapsed": time.perf_counter() - start}
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil (rango más cercano) de una lista ordenada"""
+    return values[int(p * (len(values) - 1))] if values else 0.0
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    """
+    Resume los resultados de la carga
+
+    Args:
+        results: Resultado de cada petición
+        elapsed: Segundos de la prueba
+
+    Returns:
+        Diccionario con latencias (ms), throughput, errores, etapas y tipos de match
+    """
+    ok = [r for r in results if r["status"] == 200]
+    latencies = sorted(r["latency"] * 1000 for r in ok)
+
+    errors = {}
+    for r in results:
+        if r["status"] != 200:
+            key = str(r["status"]) if r["status"] else r.get("error", "connection")
+            errors[key] = errors.get(key, 0) + 1
+
+    stage_values = {}
+    match_types = {}
+    for r in ok:
+        for stage, ms in r.get("timings", {}).items():
+            stage_values.setdefault(stage, []).append(ms)
+        match_type = r.get("match_type") or "none"
+        match_types[match_type] = match_types.get(match_type, 0) + 1
+
+    stages = {}
+    for stage, values in sorted(stage_values.items()):
+        values.sort()
+        stages[stage] = {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values), 2),
+            "p50_ms": round(percentile(values, 0.50), 2),
+            "p95_ms": round(percentile(values, 0.95), 2),
+        }
+
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": errors,
+        "error_rate": round((len(results) - len(ok)) / len(results), 4) if results else 0.0,
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "stages": stages,
+        "match_types": match_types,
+    }
+
+
+def git_revision() -> Dict:
+    """
+    Commit actual del repositorio (para comparar resultados entre commits)
+
+    Returns:
+        Diccionario con commit corto y si hay cambios sin commitear
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(BASE_DIR),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=str(BASE_DIR),
+            capture_output=True, text=True
+        ).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "unknown", "dirty": None}
+
+
+def start_server(port: int, provider: Optional[str]) -> subprocess.Popen:
+    """
+    Levanta la API con uvicorn (un proceso) en modo offline
+
+    Args:
+        port: Puerto local
+        provider: Proveedor LLM a pre-calentar
+
+    Returns:
+        Proceso del servidor
+    """
+    env = dict(os.environ)
+    env.update({
+        "API_WARMUP_PROVIDERS": provider or "",
+        "API_CAPTURE_PATH": "",  # No capturar la propia reproducción
+        "STUB_LLM_API_ENABLED": "true",
+    })
+    env.setdefault("HF_HUB_OFFLINE", "1")
+    env.setdefault("TRANSFORMERS_OFFLINE", "1")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=str(BASE_DIR),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+
+def compare(current: Dict, baseline: Dict):
+    """
+    Imprime las diferencias con una corrida anterior
+
+    Args:
+        current: Resumen de esta corrida
+        baseline: Resultados guardados de la corrida base
+    """
+    base = baseline["summary"]
+    print(f"\nComparación con {baseline.get('git', {}).get('commit', '?')} ({baseline.get('timestamp', '')})")
+    print("| Métrica | Base | Actual | Δ |")
+    print("|---|---|---|---|")
+
+    rows = [("throughput (req/s)", base["throughput_rps"], current["throughput_rps"])]
+    rows += [(f"latencia {k} (ms)", base["latency_ms"][k], current["latency_ms"][k]) for k in ("p50", "p95", "p99")]
+    rows.append(("tasa de error", base["error_rate"], current["error_rate"]))
+    for stage, values in current["stages"].items():
+        if stage in base["stages"]:
+            rows.append((f"{stage} p50 (ms)", base["stages"][stage]["p50_ms"], values["p50_ms"]))
+
+    for name, old, new in rows:
+        delta = f"{(new - old) / old * 100:+.1f}%" if old else "-"
+        print(f"| {name} | {old} | {new} | {delta} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce peticiones /chat capturadas contra la API")
+    parser.add_argument('--input', required=True, help='JSONL de peticiones (campo "message")')
+    parser.add_argument('--url', default=None, help='API ya levantada (default: levantar uvicorn local)')
+    parser.add_argument('--port', type=int, default=8101, help='Puerto del servidor local')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--concurrency', type=int, default=8, help='Clientes concurrentes (lazo cerrado)')
+    mode.add_argument('--rate', type=float, default=None, help='Peticiones por segundo (lazo abierto)')
+    parser.add_argument('--max-inflight', type=int, default=256, help='Peticiones en vuelo máximas con --rate')
+    parser.add_argument('--duration', type=float, default=None, help='Segundos de carga')
+    parser.add_argument('--requests', type=int, default=None, help='Número de peticiones (default: las del archivo)')
+    parser.add_argument('--provider', default='stub', help="Proveedor LLM ('' = el de cada petición)")
+    parser.add_argument('--bust-cache', action='store_true', help='Mensajes únicos para no medir la caché')
+    parser.add_argument('--timeout', type=float, default=120, help='Timeout por petición (s)')
+    parser.add_argument('--ready-timeout', type=float, default=300, help='Espera máxima a /ready (s)')
+    parser.add_argument('--label', default='', help='Etiqueta de la corrida')
+    parser.add_argument('--out', default=None, help='Archivo JSON de resultados')
+    parser.add_argument('--compare', default=None, help='Resultados base para comparar')
+    args = parser.parse_args()
+
+    records = load_requests(args.input)
+    if not args.duration and not args.requests:
+        args.requests = len(records)
+
+    server = None
+    base_url = args.url.rstrip('/') if args.url else f"http://127.0.0.1:{args.port}"
+    if args.url is None:
+        server = start_server(args.port, args.provider)
+
+    try:
+        ready_seconds = wait_ready(base_url, 1, args.ready_timeout)
+        print(f"API lista en {ready_seconds:.1f}s ({base_url})")
+
+        load_mode = f"rate={args.rate}/s" if args.rate else f"concurrency={args.concurrency}"
+        print(f"Reproduciendo {len(records)} peticiones ({load_mode})...")
+        run = run_open_loop(base_url, records, args) if args.rate else run_closed_loop(base_url, records, args)
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+    summary = summarize(run["results"], run["elapsed"])
+    results = {
+        "label": args.label,
+        "timestamp": datetime.now().isoformat(),
+        "git": git_revision(),
+        "config": {
+            "input": args.input,
+            "url": args.url,
+            "mode": "open" if args.rate else "closed",
+            "rate": args.rate,
+            "concurrency": None if args.rate else args.concurrency,
+            "duration": args.duration,
+            "requests": args.requests,
+            "provider": args.provider or None,
+            "bust_cache": args.bust_cache,
+            "cpu_count": os.cpu_count(),
+        },
+        "elapsed_seconds": round(run["elapsed"], 3),
+        "summary": summary,
+    }
+
+    latency = summary["latency_ms"]
+    print(f"\nPeticiones: {summary['requests']} | OK: {summary['ok']} | "
+          f"errores: {summary['error_rate']*100:.1f}% {summary['errors'] or ''}")
+    print(f"Throughput: {summary['throughput_rps']:.2f} req/s | p50 {latency['p50']:.0f}ms | "
+          f"p95 {latency['p95']:.0f}ms | p99 {latency['p99']:.0f}ms")
+    print("\n| Etapa | n | media (ms) | p50 (ms) | p95 (ms) |")
+    print("|---|---|---|---|---|")
+    for stage, values in summary["stages"].items():
+        print(f"| {stage} | {values['count']} | {values['mean_ms']} | {values['p50_ms']} | {values['p95_ms']} |")
+
+    out = Path(args.out or BASE_DIR / "data" / "bench" /
+               f"loadtest-{datetime.now():%Y%m%d-%H%M%S}-{results['git']['commit']}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nResultados guardados en: {out}")
+
+    if args.compare:
+        compare(summary, json.loads(Path(args.compare).read_text(encoding='utf-8')))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+Micro-benchmarks de las primitivas del hot path de ingestion y búsqueda
+
+Sobre corpus sintéticos (semilla fija, de 10 a 100k documentos) mide:
+- clean_text y chunk_text de DocumentIngestion (µs por documento, MB/s)
+- Embedder.generate_embedding uno a uno vs generate_embeddings_batch
+- ChromaVectorStore.search_similar (p50/p95 por consulta) con vectores
+  aleatorios normalizados en una colección temporal
+- Conversiones de DocumentRepository: get_all_documents (arrays -> bytes)
+  y get_document_by_id
+
+El corpus de cada tamaño es un prefijo del mayor, así todos los tamaños
+comparten los mismos documentos. Los resultados se guardan en JSON y se
+comparan con una línea base (data/bench/micro-baseline.json): si el mejor
+tiempo de un benchmark (min_us, el menos sensible al ruido de otros procesos)
+empeora más de --threshold se marca como regresión.
+
+torch/sentence-transformers y chromadb solo se importan para los benchmarks
+que los usan (--benches clean_text,chunk_text corre sin ellos).
+
+Uso (desde la raíz del repo):
+    python src/bench/micro.py --update-baseline
+    python src/bench/micro.py --fail-on-regression
+    python src/bench/micro.py --benches clean_text,chunk_text --sizes 10,1000,100000
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from config import EmbeddingConfig, IngestionConfig, RetrievalConfig
+from ingestion.ingest_docs import DocumentIngestion
+from bench.loadtest import git_revision, percentile
+from bench.workers import BASE_DIR
+
+DEFAULT_SIZES = "10,100,1000,10000,100000"
+ALL_BENCHES = ("clean_text", "chunk_text", "embedding", "search", "repository")
+DEFAULT_BASELINE = BASE_DIR / "data" / "bench" / "micro-baseline.json"
+
+_VOCABULARY = (
+    "estudiante universidad beca matrícula período académico requisitos solicitud "
+    "formulario carrera facultad orientación atención médica expediente horas VOAE "
+    "actividades deportivas culturales sociales científicas registro portal cuenta "
+    "índice graduación honores readmisión calendario clases laboratorio psicología "
+    "odontología nutrición campus centro regional oficina correo horario servicio "
+    "programa apoyo ayuda financiera crédito inducción curso prueba vocacional feria"
+).split()
+_CONNECTORS = "de la el los las en para con por y o que se del al una un su sus".split()
+
+
+def synthetic_corpus(size: int, seed: int = 42) -> List[str]:
+    """
+    Documentos markdown sintéticos con el ruido que limpia clean_text
+
+    Encabezados, listas, líneas en blanco repetidas, espacios de más y antes
+    de la puntuación; entre 40 y 400 palabras por documento.
+
+    Args:
+        size: Número de documentos
+        seed: Semilla
+
+    Returns:
+        Lista de documentos
+    """
+    rng = random.Random(seed)
+    documents = []
+    for i in range(size):
+        lines = [f"# Documento {i}: {rng.choice(_VOCABULARY)} {rng.choice(_VOCABULARY)}", ""]
+        remaining = rng.randint(40, 400)
+        while remaining > 0:
+            n = min(remaining, rng.randint(8, 30))
+            words = [rng.choice(_VOCABULARY if rng.random() < 0.6 else _CONNECTORS) for _ in range(n)]
+            sentence = " ".join(words).capitalize()
+            style = rng.random()
+            if style < 0.15:
+                lines.append(f"## {sentence}")
+            elif style < 0.35:
+                lines.append(f"- {sentence} ;")
+            else:
+                lines.append(f"  {sentence}  .   ")
+            if rng.random() < 0.3:
+                lines.extend(["", "   ", ""])
+            remaining -= n
+        documents.append("\n".join(lines))
+    return documents
+
+
+def _timed(fn: Callable[[], object], repeat: int, min_sample: float = 0.05) -> List[float]:
+    """
+    Mide fn sin el GC activo, como timeit
+
+    Cada muestra repite fn hasta durar al menos min_sample segundos, así los
+    tamaños chicos no quedan dominados por la resolución del reloj.
+
+    Returns:
+        Segundos por llamada de cada muestra
+    """
+    start = time.perf_counter()
+    fn()  # Calentamiento y calibración
+    number = max(1, int(min_sample / max(time.perf_counter() - start, 1e-9)))
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            times.append((time.perf_counter() - start) / number)
+        finally:
+            gc.enable()
+    return times
+
+
+def _result(bench: str, size: int, items: int, times: List[float], unit: str, **extra) -> Dict:
+    """Resultado por elemento (µs) a partir de los tiempos de cada corrida"""
+    times = sorted(times)
+    median = times[len(times) // 2]
+    result = {
+        "bench": bench,
+        "size": size,
+        "unit": unit,
+        "items": items,
+        "repeat": len(times),
+        "median_us": round(median / items * 1e6, 3),
+        "min_us": round(times[0] / items * 1e6, 3),
+        "throughput_per_s": round(items / median, 1) if median else None,
+    }
+    result.update(extra)
+    return result
+
+
+def bench_clean_text(corpus: List[str], sizes: List[int], repeat_for: Callable[[int], int]) -> List[Dict]:
+    """clean_text sobre cada documento del corpus"""
+    ingestion = DocumentIngestion(str(BASE_DIR / "data" / "docs"))
+    results = []
+    for size in sizes:
+        documents = corpus[:size]
+        megabytes = sum(len(d.encode('utf-8')) for d in documents) / 1024 / 1024
+        times = _timed(lambda: [ingestion.clean_text(d) for d in documents], repeat_for(size))
+        results.append(_result("clean_text", size, size, times, "doc",
+                               mb_per_s=round(megabytes / sorted(times)[len(times) // 2], 2)))
+    return results
+
+
+def bench_chunk_text(corpus: List[str], sizes: List[int], repeat_for: Callable[[int], int]) -> List[Dict]:
+    """chunk_text (tamaño y solapamiento de IngestionConfig) sobre documentos ya limpios"""
+    ingestion = DocumentIngestion(str(BASE_DIR / "data" / "docs"))
+    cleaned = [ingestion.clean_text(d) for d in corpus[:max(sizes)]]
+    results = []
+    for size in sizes:
+        documents = cleaned[:size]
+        chunks = sum(len(ingestion.chunk_text(d, IngestionConfig.CHUNK_SIZE, IngestionConfig.CHUNK_OVERLAP))
+                     for d in documents)
+        times = _timed(lambda: [
+            ingestion.chunk_text(d, IngestionConfig.CHUNK_SIZE, IngestionConfig.CHUNK_OVERLAP) for d in documents
+        ], repeat_for(size))
+        results.append(_result("chunk_text", size, size, times, "doc", chunks=chunks))
+    return results
+
+
+def bench_embedding(corpus: List[str], sizes: List[int], repeat: int, max_texts: int) -> List[Dict]:
+    """generate_embedding uno a uno vs generate_embeddings_batch (textos tipo consulta)"""
+    from embeddings.embedder import Embedder
+
+    embedder = Embedder()
+    texts_all = [" ".join(d.split()[2:40]) for d in corpus[:max_texts]]
+    embedder.generate_embeddings_batch(texts_all[:8])  # Calentamiento
+
+    results = []
+    for size in sorted({min(size, max_texts) for size in sizes}):
+        texts = texts_all[:size]
+        single = _timed(lambda: [embedder.generate_embedding(t) for t in texts], repeat)
+        batch = _timed(lambda: embedder.generate_embeddings_batch(texts), repeat)
+        single_result = _result("embedding_single", size, size, single, "text", model=embedder.model_name)
+        batch_result = _result("embedding_batch", size, size, batch, "text", model=embedder.model_name)
+        batch_result["speedup_vs_single"] = round(single_result["median_us"] / batch_result["median_us"], 2)
+        results.extend([single_result, batch_result])
+    return results
+
+
+def _random_embeddings(n: int, dim: int, seed: int) -> np.ndarray:
+    """Vectores aleatorios normalizados (float32), como los de bge-m3"""
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def _build_store(path: str, corpus: List[str], embeddings: np.ndarray):
+    """Colección temporal con los primeros len(embeddings) documentos (no se mide)"""
+    from database.chroma_vector_store import ChromaVectorStore
+
+    store = ChromaVectorStore(storage_path=path)
+    batch = 5000  # Chroma limita el tamaño de cada add
+    for start in range(0, len(embeddings), batch):
+        end = min(start + batch, len(embeddings))
+        store.collection.add(
+            ids=[f"doc_{i}" for i in range(start, end)],
+            embeddings=embeddings[start:end].tolist(),
+            documents=corpus[start:end],
+            metadatas=[{"filename": f"synthetic/doc_{i}.md"} for i in range(start, end)]
+        )
+    return store
+
+
+def bench_store(corpus: List[str], sizes: List[int], repeat: int, args) -> List[Dict]:
+    """
+    search_similar y conversiones de DocumentRepository sobre colecciones temporales
+
+    Returns:
+        Resultados de search, get_all_documents y get_document_by_id por tamaño
+    """
+    from database.repository import DocumentRepository
+
+    embeddings = _random_embeddings(max(sizes), args.dim, args.seed)
+    queries = _random_embeddings(args.queries, args.dim, args.seed + 1)
+    benches = set(args.benches)
+    results = []
+
+    for size in sizes:
+        workdir = tempfile.mkdtemp(prefix="voae-micro-")
+        try:
+            start = time.perf_counter()
+            store = _build_store(workdir, corpus, embeddings[:size])
+            build_seconds = time.perf_counter() - start
+
+            if "search" in benches:
+                store.search_similar(queries[0], top_k=RetrievalConfig.DEFAULT_TOP_K)  # Calentamiento
+                latencies = []
+                for _ in range(repeat):
+                    for query in queries:
+                        start = time.perf_counter()
+                        store.search_similar(query, top_k=RetrievalConfig.DEFAULT_TOP_K)
+                        latencies.append(time.perf_counter() - start)
+                result = _result("search_similar", size, 1, latencies, "query",
+                                 top_k=RetrievalConfig.DEFAULT_TOP_K, dim=args.dim,
+                                 build_seconds=round(build_seconds, 3))
+                result["p95_us"] = round(percentile(sorted(latencies), 0.95) * 1e6, 3)
+                results.append(result)
+
+            if "repository" in benches:
+                repository = DocumentRepository(store)
+                scan_repeat = repeat if size <= 10000 else 1
+                # get_all_documents imprime un resumen en cada llamada: fuera de la terminal
+                with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                    times = _timed(repository.get_all_documents, scan_repeat)
+                    results.append(_result("repository_get_all", size, size, times, "doc", dim=args.dim))
+
+                    # Sin búsqueda por hash: cada consulta recorre la colección completa
+                    target = hash(f"doc_{size - 1}")
+                    times = _timed(lambda: repository.get_document_by_id(target), scan_repeat)
+                    results.append(_result("repository_get_by_id", size, 1, times, "call", dim=args.dim))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> List[Dict]:
+    """
+    Compara el mejor tiempo (min_us) con la línea base
+
+    Args:
+        results: Resultados de esta corrida
+        baseline: Resultados guardados de la línea base
+        threshold: Fracción de aumento aceptada (0.10 = 10%)
+
+    Returns:
+        Lista de regresiones
+    """
+    base = {(r["bench"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nComparación con la línea base {baseline.get('git', {}).get('commit', '?')} "
+          f"({baseline.get('timestamp', '')})")
+    print("| Benchmark | Tamaño | Base min (µs) | Actual min (µs) | Δ | |")
+    print("|---|---|---|---|---|---|")
+    for result in results:
+        old = base.get((result["bench"], result["size"]))
+        if old is None or not old["min_us"]:
+            continue
+        change = result["min_us"] / old["min_us"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "REGRESIÓN"
+            regressions.append({"bench": result["bench"], "size": result["size"], "change": round(change, 4)})
+        elif change < -threshold:
+            flag = "mejora"
+        print(f"| {result['bench']} | {result['size']} | {old['min_us']} | {result['min_us']} | "
+              f"{change*100:+.1f}% | {flag} |")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de ingestion, embeddings y búsqueda")
+    parser.add_argument('--benches', default=",".join(ALL_BENCHES), help=f"Separados por coma: {', '.join(ALL_BENCHES)}")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='Tamaños del corpus (documentos)')
+    parser.add_argument('--store-max', type=int, default=100000, help='Máximo de documentos en las colecciones temporales')
+    parser.add_argument('--embed-max', type=int, default=256, help='Máximo de textos a embeber por tamaño')
+    parser.add_argument('--dim', type=int, default=EmbeddingConfig.EMBEDDING_DIM, help='Dimensión de los vectores sintéticos')
+    parser.add_argument('--queries', type=int, default=200, help='Consultas por corrida de search_similar')
+    parser.add_argument('--repeat', type=int, default=5, help='Corridas por medición (1 para tamaños > 10k)')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla del corpus y de los vectores')
+    parser.add_argument('--out', default=None, help='Archivo JSON de resultados')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Línea base para comparar')
+    parser.add_argument('--update-baseline', action='store_true', help='Guardar esta corrida como línea base')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Aumento aceptado antes de marcar regresión')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Salir con código 1 si hay regresiones')
+    args = parser.parse_args()
+
+    args.benches = [b.strip() for b in args.benches.split(',') if b.strip()]
+    unknown = set(args.benches) - set(ALL_BENCHES)
+    if unknown:
+        parser.error(f"Benchmarks desconocidos: {', '.join(sorted(unknown))}")
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+
+    print(f"Generando corpus sintético ({max(sizes)} documentos, semilla {args.seed})...")
+    corpus = synthetic_corpus(max(sizes), args.seed)
+
+    def repeat_for(size: int) -> int:
+        return args.repeat if size <= 10000 else 1
+
+    results = []
+    for bench in args.benches:
+        print(f"- {bench}")
+        if bench == "clean_text":
+            results.extend(bench_clean_text(corpus, sizes, repeat_for))
+        elif bench == "chunk_text":
+            results.extend(bench_chunk_text(corpus, sizes, repeat_for))
+        elif bench == "embedding":
+            results.extend(bench_embedding(corpus, sizes, args.repeat, args.embed_max))
+    if {"search", "repository"} & set(args.benches):
+        print("- search / repository")
+        store_sizes = [size for size in sizes if size <= args.store_max]
+        results.extend(bench_store(corpus, store_sizes, max(1, args.repeat // 2), args))
+
+    print("\n| Benchmark | Tamaño | Mediana (µs/unidad) | Throughput (/s) |")
+    print("|---|---|---|---|")
+    for result in results:
+        print(f"| {result['bench']} | {result['size']} | {result['median_us']} / {result['unit']} | "
+              f"{result['throughput_per_s']} |")
+
+    output = {
+        "timestamp": datetime.now().isoformat(),
+        "git": git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "seed": args.seed,
+        "results": results,
+    }
+
+    out = Path(args.out or BASE_DIR / "data" / "bench" /
+               f"micro-{datetime.now():%Y%m%d-%H%M%S}-{output['git']['commit']}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(output, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nResultados guardados en: {out}")
+
+    regressions = []
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(output, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"Línea base actualizada: {baseline_path}")
+    elif baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text(encoding='utf-8')), args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} regresión(es) de más de {args.threshold*100:.0f}%")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Benchmark de calidad y latencia de recuperación sobre un conjunto etiquetado
+
+Cada consulta de data/eval/retrieval_queries.jsonl indica los documentos
+esperados (ruta relativa a data/docs o entry_id de una FAQ) y el match_type
+que debería obtener. A eso se agregan, como consultas semilla, todas las
+variantes de pregunta de los archivos FAQ (esperan su propia entrada y
+match "high").
+
+Para cada backend de embeddings (local o servicio fuera de proceso) reporta:
+- recall@k y MRR de la búsqueda de documentos (chunks del mismo archivo y
+  variantes de la misma FAQ cuentan como un solo documento)
+- exactitud del match_type con los umbrales de FAQConfig (léxico + denso,
+  igual que el pipeline) y la matriz de confusión
+- barrido de umbrales: exactitud con otros pares (HIGH, MEDIUM)
+- latencia por consulta de embedding, búsqueda y clasificación FAQ
+
+El almacenamiento es siempre la colección de ChromaDB configurada; hay que
+haber ingerido los documentos antes (python src/main.py --ingest).
+
+Uso (desde la raíz del repo):
+    python src/bench/retrieval.py
+    python src/bench/retrieval.py --embedders local,remote --compare data/bench/retrieval-...json
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import FAQConfig
+from database.chroma_vector_store import ChromaVectorStore
+from database.repository import DocumentRepository
+from rag.retriever import DocumentRetriever
+from rag.faq_handler import FAQHandler
+from bench.loadtest import git_revision, percentile
+from bench.workers import BASE_DIR
+
+DEFAULT_QUERIES = BASE_DIR / "data" / "eval" / "retrieval_queries.jsonl"
+K_VALUES = (1, 3, 5, 10)
+
+
+def load_queries(path: str, faq_handler: Optional[FAQHandler] = None) -> List[Dict]:
+    """
+    Carga el conjunto etiquetado y, opcionalmente, las variantes de las FAQs
+
+    Args:
+        path: JSONL con query, expected (lista) y expected_match
+        faq_handler: Si se indica, agrega cada variante de pregunta FAQ como consulta semilla
+
+    Returns:
+        Lista de consultas con query, expected, expected_match y origin
+    """
+    queries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                record["origin"] = "labeled"
+                queries.append(record)
+
+    if faq_handler is not None:
+        for entry in faq_handler.faq_entries:
+            for question in entry["questions"]:
+                queries.append({
+                    "query": question,
+                    "expected": [entry["entry_id"]],
+                    "expected_match": "high",
+                    "origin": "faq_seed",
+                })
+    return queries
+
+
+def document_of(filename: str) -> str:
+    """Archivo de origen de un resultado (sin el sufijo _chunk_N)"""
+    base, sep, suffix = filename.rpartition("_chunk_")
+    return base if sep and suffix.isdigit() else filename
+
+
+def classify_match(similarity: float, high: float, medium: float) -> str:
+    """match_type según la mejor similitud FAQ y un par de umbrales"""
+    if similarity >= high:
+        return "high"
+    if similarity >= medium:
+        return "medium"
+    return "low"
+
+
+def create_backend_embedder(name: str):
+    """
+    Crea el embedder de un backend
+
+    Args:
+        name: "local" (modelo en el proceso) o "remote" (EMBEDDING_SERVICE_SOCKET)
+
+    Returns:
+        Embedder o RemoteEmbedder
+    """
+    if name == "local":
+        from embeddings.embedder import Embedder
+        return Embedder()
+    if name == "remote":
+        from embeddings.embedding_service import RemoteEmbedder
+        return RemoteEmbedder()
+    raise ValueError(f"Backend de embeddings no soportado: {name}. Usa 'local' o 'remote'")
+
+
+def evaluate_query(query: Dict, embedder, retriever: DocumentRetriever, faq_handler: FAQHandler, max_k: int) -> Dict:
+    """
+    Ejecuta una consulta y mide cada etapa
+
+    Returns:
+        Resultado con ranking, rango del primer documento esperado, match_type y latencias (ms)
+    """
+    text = query["query"]
+
+    start = time.perf_counter()
+    embedding = embedder.generate_embedding(text)
+    embed_ms = (time.perf_counter() - start) * 1000
+
+    # Se piden más resultados para llenar max_k documentos distintos
+    start = time.perf_counter()
+    results = retriever.retrieve_relevant_documents(text, top_k=max_k * 4, query_embedding=embedding)
+    search_ms = (time.perf_counter() - start) * 1000
+
+    ranking = []
+    for filename, _, _ in results:
+        document = document_of(filename)
+        if document not in ranking:
+            ranking.append(document)
+    ranking = ranking[:max_k]
+    expected = set(query["expected"])
+    rank = next((i + 1 for i, document in enumerate(ranking) if document in expected), None)
+
+    # Clasificación como en el pipeline: índice léxico y, si no hay match, búsqueda densa
+    start = time.perf_counter()
+    lexical = faq_handler.lexical_match(text) if FAQConfig.ENABLE_LEXICAL_MATCH else None
+    dense = faq_handler.classify_query(text, top_k=FAQConfig.TOP_K_FAQS, query_embedding=embedding)
+    classify_ms = (time.perf_counter() - start) * 1000
+    classification = lexical or dense
+
+    return {
+        "query": text,
+        "origin": query["origin"],
+        "expected": query["expected"],
+        "ranking": ranking,
+        "rank": rank,
+        "expected_match": query["expected_match"],
+        "match_type": classification["match_type"],
+        "match_method": classification.get("match_method"),
+        "lexical_hit": lexical is not None,
+        "best_faq_similarity": round(dense["best_similarity"], 4),
+        "latency_ms": {
+            "embed": round(embed_ms, 3),
+            "doc_search": round(search_ms, 3),
+            "faq_classify": round(classify_ms, 3),
+            "total": round(embed_ms + search_ms + classify_ms, 3),
+        },
+    }
+
+
+def threshold_sweep(per_query: List[Dict], top: int = 5) -> Dict:
+    """
+    Exactitud del match_type con otros pares de umbrales (sin volver a consultar)
+
+    Los matches léxicos son "high" con cualquier umbral denso.
+
+    Returns:
+        Diccionario con la exactitud actual y los mejores pares
+    """
+    def accuracy(high: float, medium: float) -> float:
+        hits = sum(
+            1 for r in per_query
+            if ("high" if r["lexical_hit"] else classify_match(r["best_faq_similarity"], high, medium))
+            == r["expected_match"]
+        )
+        return hits / len(per_query) if per_query else 0.0
+
+    grid = []
+    for high in [round(0.60 + 0.05 * i, 2) for i in range(7)]:
+        for medium in [round(0.50 + 0.05 * i, 2) for i in range(7)]:
+            if medium <= high:
+                grid.append({"high": high, "medium": medium, "accuracy": round(accuracy(high, medium), 4)})
+    grid.sort(key=lambda g: (-g["accuracy"], -g["high"], -g["medium"]))
+
+    return {
+        "current": {
+            "high": FAQConfig.HIGH_THRESHOLD,
+            "medium": FAQConfig.MEDIUM_THRESHOLD,
+            "accuracy": round(accuracy(FAQConfig.HIGH_THRESHOLD, FAQConfig.MEDIUM_THRESHOLD), 4),
+        },
+        "best": grid[:top],
+    }
+
+
+def summarize(per_query: List[Dict], max_k: int) -> Dict:
+    """
+    Métricas agregadas de un backend
+
+    Returns:
+        Diccionario con recall@k, MRR, exactitud de match_type, confusión y latencias
+    """
+    n = len(per_query)
+    recall = {
+        f"recall@{k}": round(sum(1 for r in per_query if r["rank"] and r["rank"] <= k) / n, 4)
+        for k in K_VALUES if k <= max_k
+    }
+    mrr = sum(1 / r["rank"] for r in per_query if r["rank"]) / n
+
+    confusion = {}
+    for r in per_query:
+        row = confusion.setdefault(r["expected_match"], {})
+        row[r["match_type"]] = row.get(r["match_type"], 0) + 1
+
+    latency = {}
+    for stage in ("embed", "doc_search", "faq_classify", "total"):
+        values = sorted(r["latency_ms"][stage] for r in per_query)
+        latency[stage] = {
+            "mean": round(sum(values) / n, 3),
+            "p50": round(percentile(values, 0.50), 3),
+            "p95": round(percentile(values, 0.95), 3),
+        }
+
+    by_origin = {}
+    for origin in sorted({r["origin"] for r in per_query}):
+        subset = [r for r in per_query if r["origin"] == origin]
+        by_origin[origin] = {
+            "queries": len(subset),
+            "mrr": round(sum(1 / r["rank"] for r in subset if r["rank"]) / len(subset), 4),
+            "match_accuracy": round(sum(1 for r in subset if r["match_type"] == r["expected_match"]) / len(subset), 4),
+        }
+
+    return {
+        "queries": n,
+        **recall,
+        "mrr": round(mrr, 4),
+        "match_accuracy": round(sum(1 for r in per_query if r["match_type"] == r["expected_match"]) / n, 4),
+        "confusion": confusion,
+        "by_origin": by_origin,
+        "threshold_sweep": threshold_sweep(per_query),
+        "latency_ms": latency,
+        "misses": [r["query"] for r in per_query if r["rank"] is None],
+    }
+
+
+def bench_backend(name: str, args) -> Dict:
+    """
+    Evalúa todas las consultas con un backend de embeddings
+
+    Returns:
+        Resultado con métricas agregadas y detalle por consulta
+    """
+    print(f"\n=== Embeddings: {name} ===")
+    start = time.perf_counter()
+    embedder = create_backend_embedder(name)
+    load_seconds = time.perf_counter() - start
+
+    storage = ChromaVectorStore()
+    repository = DocumentRepository(storage)
+    retriever = DocumentRetriever(repository, embedder, storage)
+    faq_handler = FAQHandler(repository, embedder)
+    if storage.count_documents() == 0:
+        raise RuntimeError("La colección está vacía: ejecuta primero python src/main.py --ingest")
+
+    queries = load_queries(args.queries, None if args.no_faq_seed else faq_handler)
+
+    # Calentamiento: la primera consulta paga inicializaciones que no son del benchmark
+    for query in queries[:args.warmup]:
+        evaluate_query(query, embedder, retriever, faq_handler, args.k)
+
+    per_query = [evaluate_query(query, embedder, retriever, faq_handler, args.k) for query in queries]
+    summary = summarize(per_query, args.k)
+
+    recall = " | ".join(f"{key} {summary[key]:.2f}" for key in summary if key.startswith("recall@"))
+    print(f"{summary['queries']} consultas | {recall} | MRR {summary['mrr']:.3f} | "
+          f"match_type {summary['match_accuracy']*100:.1f}%")
+    latency = summary["latency_ms"]
+    print(f"Latencia p50/p95 (ms): embed {latency['embed']['p50']:.1f}/{latency['embed']['p95']:.1f} | "
+          f"búsqueda {latency['doc_search']['p50']:.1f}/{latency['doc_search']['p95']:.1f} | "
+          f"clasificación FAQ {latency['faq_classify']['p50']:.1f}/{latency['faq_classify']['p95']:.1f}")
+    sweep = summary["threshold_sweep"]
+    best = sweep["best"][0]
+    print(f"Umbrales actuales {sweep['current']['high']}/{sweep['current']['medium']}: "
+          f"{sweep['current']['accuracy']*100:.1f}% | mejor {best['high']}/{best['medium']}: {best['accuracy']*100:.1f}%")
+    if summary["misses"]:
+        print(f"Sin documento esperado en top-{args.k}: {len(summary['misses'])}")
+
+    return {
+        "embedder": name,
+        "model": embedder.get_model_info(),
+        "store": "chroma",
+        "documents": storage.count_documents(),
+        "load_seconds": round(load_seconds, 3),
+        "summary": summary,
+        "per_query": per_query,
+    }
+
+
+def compare(runs: List[Dict], baseline: Dict):
+    """
+    Imprime las diferencias con una corrida anterior (por backend)
+
+    Args:
+        runs: Resultados de esta corrida
+        baseline: Resultados guardados de la corrida base
+    """
+    base_runs = {run["embedder"]: run["summary"] for run in baseline["runs"]}
+    print(f"\nComparación con {baseline.get('git', {}).get('commit', '?')} ({baseline.get('timestamp', '')})")
+    for run in runs:
+        base = base_runs.get(run["embedder"])
+        if base is None:
+            continue
+        current = run["summary"]
+        print(f"\n[{run['embedder']}]")
+        print("| Métrica | Base | Actual | Δ |")
+        print("|---|---|---|---|")
+        keys = [key for key in current if key.startswith("recall@")] + ["mrr", "match_accuracy"]
+        rows = [(key, base.get(key), current[key]) for key in keys]
+        rows += [
+            (f"{stage} p50 (ms)", base["latency_ms"][stage]["p50"], current["latency_ms"][stage]["p50"])
+            for stage in ("embed", "doc_search", "faq_classify")
+        ]
+        for name, old, new in rows:
+            delta = f"{new - old:+.4f}" if old is not None else "-"
+            print(f"| {name} | {old} | {new} | {delta} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calidad (recall@k, MRR, match_type) y latencia de la recuperación")
+    parser.add_argument('--queries', default=str(DEFAULT_QUERIES), help='JSONL etiquetado')
+    parser.add_argument('--no-faq-seed', action='store_true', help='No agregar las variantes de pregunta FAQ')
+    parser.add_argument('--embedders', default='local', help='Backends separados por coma: local, remote')
+    parser.add_argument('--k', type=int, default=10, help='Documentos distintos a evaluar por consulta')
+    parser.add_argument('--warmup', type=int, default=3, help='Consultas de calentamiento (no se miden)')
+    parser.add_argument('--out', default=None, help='Archivo JSON de resultados')
+    parser.add_argument('--compare', default=None, help='Resultados base para comparar')
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "git": git_revision(),
+        "queries_file": args.queries,
+        "k": args.k,
+        "thresholds": {"high": FAQConfig.HIGH_THRESHOLD, "medium": FAQConfig.MEDIUM_THRESHOLD,
+                       "lexical": FAQConfig.LEXICAL_THRESHOLD if FAQConfig.ENABLE_LEXICAL_MATCH else None},
+        "cpu_count": os.cpu_count(),
+        "runs": [bench_backend(name.strip(), args) for name in args.embedders.split(',') if name.strip()],
+    }
+
+    out = Path(args.out or BASE_DIR / "data" / "bench" /
+               f"retrieval-{datetime.now():%Y%m%d-%H%M%S}-{results['git']['commit']}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nResultados guardados en: {out}")
+
+    if args.compare:
+        compare(results["runs"], json.loads(Path(args.compare).read_text(encoding='utf-8')))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Benchmark de serving multi-worker: memoria por worker y throughput vs número de workers
+
+Para cada número de workers levanta gunicorn con gunicorn.conf.py (preload-and-fork),
+espera a que /ready responda, mide la memoria de cada worker y lanza carga
+concurrente contra /chat.
+
+Memoria (de /proc/<pid>/smaps_rollup, solo Linux):
+- rss: memoria residente, cuenta completas las páginas compartidas con el maestro
+- pss: parte proporcional de las compartidas; la suma de PSS es el costo real
+- shared / private: páginas compartidas (copy-on-write intactas) y propias
+
+Uso (desde la raíz del repo):
+    python src/bench/workers.py --workers 1,2,4 --concurrency 16 --duration 30
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+DEFAULT_QUESTIONS = [
+    "¿Cómo solicito una beca?",
+    "¿Dónde queda la clínica de atención médica?",
+    "¿Qué es el curso de introducción a la vida universitaria?",
+    "¿Cuándo es la inducción para nuevos estudiantes?",
+    "¿Qué servicios ofrece la VOAE?",
+]
+
+
+def child_pids(pid: int) -> List[int]:
+    """
+    Obtiene los procesos hijos (workers) del maestro de gunicorn
+
+    Args:
+        pid: PID del maestro
+
+    Returns:
+        Lista de PIDs hijos
+    """
+    children = Path(f"/proc/{pid}/task/{pid}/children")
+    if not children.exists():
+        return []
+    return [int(child) for child in children.read_text().split()]
+
+
+def memory_of(pid: int) -> Dict[str, float]:
+    """
+    Lee la memoria de un proceso
+
+    Args:
+        pid: PID del proceso
+
+    Returns:
+        Diccionario con rss, pss, shared y private en MB
+    """
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(':', 1)
+        fields[name] = int(value.split()[0]) / 1024  # kB -> MB
+
+    return {
+        "rss_mb": fields.get("Rss", 0.0),
+        "pss_mb": fields.get("Pss", 0.0),
+        "shared_mb": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+        "private_mb": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def machine_spec() -> Dict:
+    """
+    Describe la máquina del benchmark (los resultados solo se comparan en la misma)
+
+    Returns:
+        Diccionario con CPU, núcleos, memoria total, kernel y versión de Python
+    """
+    cpu_model = platform.processor() or platform.machine()
+    cpuinfo = Path("/proc/cpuinfo")
+    if cpuinfo.exists():
+        for line in cpuinfo.read_text().splitlines():
+            if line.startswith("model name"):
+                cpu_model = line.split(':', 1)[1].strip()
+                break
+
+    memory_gb = None
+    meminfo = Path("/proc/meminfo")
+    if meminfo.exists():
+        for line in meminfo.read_text().splitlines():
+            if line.startswith("MemTotal:"):
+                memory_gb = round(int(line.split()[1]) / 1024 / 1024, 1)
+                break
+
+    return {
+        "cpu": cpu_model,
+        "cpu_count": os.cpu_count(),
+        "memory_gb": memory_gb,
+        "kernel": platform.release(),
+        "python": platform.python_version(),
+    }
+
+
+def post_json(url: str, payload: Dict, timeout: float) -> int:
+    """
+    Envía un POST JSON
+
+    Returns:
+        Código HTTP de la respuesta
+    """
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def wait_ready(base_url: str, workers: int, timeout: float) -> float:
+    """
+    Espera a que todos los workers respondan /ready
+
+    El balanceo entre workers es del kernel, así que se exige una racha de
+    respuestas 200 proporcional al número de workers.
+
+    Returns:
+        Segundos hasta estar listo
+
+    Raises:
+        TimeoutError: Si no queda listo a tiempo
+    """
+    start = time.perf_counter()
+    streak = 0
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=5) as response:
+                streak = streak + 1 if response.status == 200 else 0
+        except (urllib.error.URLError, ConnectionError):
+            streak = 0
+
+        if streak >= workers * 4:
+            return time.perf_counter() - start
+        time.sleep(0.25)
+
+    raise TimeoutError(f"Los workers no quedaron listos en {timeout}s")
+
+
+def run_load(base_url: str, questions: List[str], concurrency: int, duration: float, provider: str) -> Dict:
+    """
+    Lanza carga concurrente contra /chat durante un tiempo fijo
+
+    Cada petición usa una sesión distinta y una variante numerada de la
+    pregunta para no medir solo la caché de respuestas.
+
+    Returns:
+        Diccionario con peticiones, errores, throughput y percentiles de latencia
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = [0]
+    stop_at = time.perf_counter() + duration
+
+    def client(client_id: int):
+        while time.perf_counter() < stop_at:
+            with lock:
+                n = counter[0]
+                counter[0] += 1
+            payload = {
+                "message": f"{questions[n % len(questions)]} ({n})",
+                "session_id": f"bench-{client_id}",
+                "llm_provider": provider,
+            }
+            start = time.perf_counter()
+            status = post_json(f"{base_url}/chat", payload, timeout=120)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[int(p * (len(latencies) - 1))] if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50": percentile(0.50),
+        "latency_p95": percentile(0.95),
+        "latency_p99": percentile(0.99),
+    }
+
+
+def bench_workers(workers: int, args) -> Dict:
+    """
+    Ejecuta el benchmark para un número de workers
+
+    Returns:
+        Resultado con tiempo de arranque, memoria por worker y carga
+    """
+    env = dict(os.environ)
+    env.update({
+        "API_WORKERS": str(workers),
+        "API_HOST": "127.0.0.1",
+        "API_PORT": str(args.port),
+        "STUB_LLM_API_ENABLED": "true",  # Servidor local de prueba: --provider stub mide solo el servidor
+    })
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"\n=== {workers} worker(s) ===")
+    master = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "api.main:app"],
+        cwd=str(BASE_DIR),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    try:
+        ready_seconds = wait_ready(base_url, workers, args.ready_timeout)
+        print(f"Listo en {ready_seconds:.1f}s")
+
+        worker_memory = [memory_of(pid) for pid in child_pids(master.pid)]
+        master_memory = memory_of(master.pid)
+
+        load = run_load(base_url, args.questions, args.concurrency, args.duration, args.provider)
+        print(f"Throughput: {load['throughput_rps']:.2f} req/s | "
+              f"p50 {load['latency_p50']*1000:.0f}ms | p95 {load['latency_p95']*1000:.0f}ms | "
+              f"errores {load['errors']}")
+
+        total_pss = master_memory["pss_mb"] + sum(m["pss_mb"] for m in worker_memory)
+        print(f"PSS total: {total_pss:.0f} MB")
+
+        return {
+            "workers": workers,
+            "ready_seconds": ready_seconds,
+            "master_memory": master_memory,
+            "worker_memory": worker_memory,
+            "total_pss_mb": total_pss,
+            "load": load,
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria y throughput por número de workers")
+    parser.add_argument('--workers', default='1,2,4', help='Números de workers separados por coma')
+    parser.add_argument('--concurrency', type=int, default=16, help='Clientes concurrentes')
+    parser.add_argument('--duration', type=float, default=30, help='Segundos de carga por configuración')
+    parser.add_argument('--provider', default='deepseek', help='Proveedor LLM de las peticiones')
+    parser.add_argument('--port', type=int, default=8100, help='Puerto del servidor de prueba')
+    parser.add_argument('--ready-timeout', type=float, default=300, help='Espera máxima a /ready (s)')
+    parser.add_argument('--questions', type=lambda path: [
+        json.loads(line)["message"] for line in open(path, encoding='utf-8') if line.strip()
+    ], default=DEFAULT_QUESTIONS, help='JSONL con campo "message" (default: preguntas de ejemplo)')
+    parser.add_argument('--out', default=None, help='Archivo JSON de resultados')
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "machine": machine_spec(),
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "runs": [bench_workers(int(n), args) for n in args.workers.split(',')],
+    }
+
+    out = Path(args.out or BASE_DIR / "data" / "bench" / f"workers-{datetime.now():%Y%m%d-%H%M%S}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    machine = results["machine"]
+    print(f"\nMáquina: {machine['cpu']}, {machine['cpu_count']} núcleos, {machine['memory_gb']} GB, "
+          f"Linux {machine['kernel']}, Python {machine['python']} | "
+          f"concurrencia {args.concurrency}, {args.duration:.0f}s por configuración, proveedor {args.provider}")
+    print("| Workers | RSS/worker (MB) | PSS/worker (MB) | PSS total (MB) | req/s | p95 (ms) |")
+    print("|---|---|---|---|---|---|")
+    for run in results["runs"]:
+        memory = run["worker_memory"] or [{"rss_mb": 0.0, "pss_mb": 0.0}]
+        rss = sum(m["rss_mb"] for m in memory) / len(memory)
+        pss = sum(m["pss_mb"] for m in memory) / len(memory)
+        print(f"| {run['workers']} | {rss:.0f} | {pss:.0f} | {run['total_pss_mb']:.0f} | "
+              f"{run['load']['throughput_rps']:.2f} | {run['load']['latency_p95']*1000:.0f} |")
+    print(f"\nResultados guardados en: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Caché exacta de respuestas del pipeline RAG
+
+La llave combina la pregunta normalizada, el proveedor/modelo, los parámetros
+de generación relevantes y la versión del índice, de modo que una re-ingestion
+invalida automáticamente las respuestas anteriores.
+
+Dos niveles:
+- Memoria: LRU con TTL por proceso
+- Disco (opcional): SQLite compartido por todos los workers del mismo host
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from config import CacheConfig
+from observability.memory import deep_sizeof
+
+
+class AnswerCache:
+    """Caché LRU + TTL de resultados de query_with_faq con nivel opcional en disco"""
+
+    # Cada cuántas escrituras se poda el nivel en disco
+    DISK_PRUNE_EVERY = 100
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 10000
+    ):
+        """
+        Inicializa la caché
+
+        Args:
+            max_entries: Máximo de respuestas en memoria
+            ttl_seconds: Tiempo de vida de cada respuesta
+            disk_path: Archivo SQLite para el nivel compartido (None = solo memoria)
+            disk_max_entries: Máximo de respuestas en disco
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_max_entries = disk_max_entries
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+        self._disk = None
+        self._disk_writes = 0
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, disk_path: str):
+        """
+        Abre (o crea) el nivel en disco
+
+        Args:
+            disk_path: Ruta del archivo SQLite
+        """
+        path = Path(disk_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._disk = sqlite3.connect(str(path), check_same_thread=False, timeout=5)
+        # WAL permite lectores concurrentes desde varios procesos
+        self._disk.execute("PRAGMA journal_mode=WAL")
+        self._disk.execute("PRAGMA synchronous=NORMAL")
+        self._disk.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._disk.execute("CREATE INDEX IF NOT EXISTS idx_answers_created ON answers(created_at)")
+        self._disk.commit()
+
+    @staticmethod
+    def make_key(
+        normalized_question: str,
+        provider: str,
+        model: str,
+        params: Dict,
+        index_version: str
+    ) -> str:
+        """
+        Construye la llave de caché
+
+        Args:
+            normalized_question: Pregunta normalizada (ver rag.faq_handler.normalize_text)
+            provider: Proveedor LLM
+            model: Modelo LLM
+            params: Parámetros que afectan la respuesta (top_k, max_tokens, ...)
+            index_version: Versión del índice vectorial
+
+        Returns:
+            Hash SHA-256 en hexadecimal
+        """
+        payload = json.dumps(
+            [normalized_question, provider, model, params, index_version],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Busca una respuesta en la caché
+
+        Args:
+            key: Llave de make_key
+
+        Returns:
+            Copia del resultado cacheado o None
+        """
+        now = time.time()
+
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return copy.deepcopy(value)
+
+                del self._memory[key]
+                self._stats["expirations"] += 1
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT value, expires_at FROM answers WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._store_memory(key, value, row[1])
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    return copy.deepcopy(value)
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Dict, ttl_seconds: Optional[float] = None):
+        """
+        Guarda una respuesta en la caché
+
+        Args:
+            key: Llave de make_key
+            value: Resultado serializable a JSON
+            ttl_seconds: TTL específico (None = usar el de la caché)
+        """
+        now = time.time()
+        expires_at = now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+            self._stats["stores"] += 1
+
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO answers (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+                )
+                self._disk.commit()
+
+                self._disk_writes += 1
+                if self._disk_writes % self.DISK_PRUNE_EVERY == 0:
+                    self._prune_disk(now)
+
+    def preload(self, items: Iterable[Tuple[str, Dict]], ttl_seconds: Optional[float] = None) -> int:
+        """
+        Carga respuestas precalculadas solo en memoria (warm-up del worker)
+
+        No se escriben en el nivel en disco: el archivo de respuestas
+        precalculadas ya es la copia compartida. Las últimas cargadas quedan
+        como las más recientes del LRU.
+
+        Args:
+            items: Pares (llave de make_key, resultado)
+            ttl_seconds: TTL específico (None = usar el de la caché)
+
+        Returns:
+            Número de respuestas cargadas
+        """
+        expires_at = time.time() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        count = 0
+        with self._lock:
+            for key, value in items:
+                self._store_memory(key, copy.deepcopy(value), expires_at)
+                count += 1
+        return count
+
+    def _store_memory(self, key: str, value: Dict, expires_at: float):
+        """Guarda en memoria respetando el límite LRU (llamar con lock tomado)"""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _prune_disk(self, now: float):
+        """Elimina del disco las respuestas expiradas y las más antiguas sobre el límite"""
+        self._disk.execute("DELETE FROM answers WHERE expires_at <= ?", (now,))
+        self._disk.execute(
+            "DELETE FROM answers WHERE key IN ("
+            " SELECT key FROM answers ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,)
+        )
+        self._disk.commit()
+
+    def clear(self):
+        """Vacía ambos niveles de la caché"""
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM answers")
+                self._disk.commit()
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas de uso
+
+        Returns:
+            Diccionario con aciertos, fallos, tamaño y tasa de aciertos
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._memory)
+            stats["max_entries"] = self.max_entries
+            stats["disk_enabled"] = self._disk is not None
+            if self._disk is not None:
+                stats["disk_size"] = self._disk.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def memory_usage(self) -> Dict:
+        """
+        Estima la memoria del nivel en memoria
+
+        Returns:
+            Diccionario con entradas y bytes
+        """
+        with self._lock:
+            entries = len(self._memory)
+            size = deep_sizeof(self._memory)
+        return {"entries": entries, "bytes": size}
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """
+    Retorna la caché de respuestas del proceso (compartida entre sesiones)
+
+    Returns:
+        Instancia de AnswerCache, o None si está deshabilitada en config
+    """
+    global _answer_cache
+    if not CacheConfig.ANSWER_CACHE_ENABLED:
+        return None
+
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = AnswerCache(
+                max_entries=CacheConfig.ANSWER_CACHE_MAX_ENTRIES,
+                ttl_seconds=CacheConfig.ANSWER_CACHE_TTL,
+                disk_path=CacheConfig.ANSWER_CACHE_DISK_PATH or None,
+                disk_max_entries=CacheConfig.ANSWER_CACHE_DISK_MAX_ENTRIES
+            )
+    return _answer_cache
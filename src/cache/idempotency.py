@@ -0,0 +1,192 @@
+"""
+Almacén de resultados por llave de idempotencia para /chat
+
+Los clientes (frontend, apps móviles) reintentan ante timeouts. Si el reintento
+trae la misma llave que la petición original:
+- Si la original sigue en curso, espera su resultado (no inicia otra generación)
+- Si ya terminó con éxito, recibe el resultado guardado (sin duplicar turnos en
+  el historial); si terminó con error, se vuelve a procesar
+
+Los resultados viven poco (IDEMPOTENCY_TTL): solo deben cubrir la ventana de
+reintentos del cliente.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from config import CacheConfig
+from cache.single_flight import SingleFlight
+from observability.memory import deep_sizeof
+
+
+class IdempotencyConflictError(Exception):
+    """La llave ya se usó con una petición distinta"""
+    pass
+
+
+class IdempotencyStore:
+    """Resultados recientes indexados por llave de idempotencia"""
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 10000):
+        """
+        Inicializa el almacén
+
+        Args:
+            ttl_seconds: Tiempo que se conserva cada resultado
+            max_entries: Máximo de resultados guardados
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._results = OrderedDict()  # key -> (expires_at, fingerprint, result)
+        self._fingerprints = {}        # key -> fingerprint de la petición en curso
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = {
+            "executions": 0,
+            "replays": 0,
+            "attached": 0,
+            "conflicts": 0,
+        }
+
+    @staticmethod
+    def fingerprint(payload: Dict) -> str:
+        """
+        Huella de la petición, para detectar llaves reutilizadas con otro contenido
+
+        Args:
+            payload: Campos de la petición que definen la respuesta
+
+        Returns:
+            Hash SHA-256 en hexadecimal
+        """
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def run(self, key: str, fingerprint: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Ejecuta fn una sola vez por llave dentro de la ventana de TTL
+
+        Args:
+            key: Llave de idempotencia (ya acotada a la sesión)
+            fingerprint: Huella de la petición (ver fingerprint)
+            fn: Función que procesa la petición
+
+        Returns:
+            Tupla (resultado, reutilizado). reutilizado es True si el resultado
+            viene de una ejecución previa o en curso con la misma llave.
+
+        Raises:
+            IdempotencyConflictError: Si la llave se usó con otra petición
+        """
+        with self._lock:
+            self._prune(time.time())
+
+            stored = self._results.get(key)
+            if stored is not None:
+                self._check_fingerprint(key, stored[1], fingerprint)
+                self._stats["replays"] += 1
+                return copy.deepcopy(stored[2]), True
+
+            in_flight = self._fingerprints.get(key)
+            if in_flight is not None:
+                self._check_fingerprint(key, in_flight, fingerprint)
+            else:
+                self._fingerprints[key] = fingerprint
+
+        def execute():
+            try:
+                result = fn()
+                with self._lock:
+                    self._stats["executions"] += 1
+                    # Solo se guardan resultados completos: un reintento tras un
+                    # fallo transitorio del proveedor o una respuesta degradada
+                    # vacía (None) debe volver a intentarlo
+                    if result is not None and not (isinstance(result, dict) and result.get("error") is not None):
+                        self._results[key] = (time.time() + self.ttl_seconds, fingerprint, copy.deepcopy(result))
+                        while len(self._results) > self.max_entries:
+                            self._results.popitem(last=False)
+                return result
+            finally:
+                with self._lock:
+                    self._fingerprints.pop(key, None)
+
+        result, shared = self._flights.do(key, execute)
+        if shared:
+            with self._lock:
+                self._stats["attached"] += 1
+            result = copy.deepcopy(result)
+
+        return result, shared
+
+    def _check_fingerprint(self, key: str, expected: str, fingerprint: str):
+        """Lanza conflicto si la huella no coincide (llamar con lock tomado)"""
+        if expected != fingerprint:
+            self._stats["conflicts"] += 1
+            raise IdempotencyConflictError(
+                f"La llave de idempotencia '{key}' ya se usó con una petición distinta"
+            )
+
+    def _prune(self, now: float):
+        """Elimina resultados expirados (llamar con lock tomado)"""
+        while self._results:
+            key, (expires_at, _, _) = next(iter(self._results.items()))
+            if expires_at > now:
+                break
+            del self._results[key]
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas del almacén
+
+        Returns:
+            Diccionario con ejecuciones, reintentos atendidos y tamaño
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._results)
+            stats["in_flight"] = len(self._fingerprints)
+        return stats
+
+    def memory_usage(self) -> Dict:
+        """
+        Estima la memoria de los resultados guardados
+
+        Returns:
+            Diccionario con entradas y bytes
+        """
+        with self._lock:
+            entries = len(self._results)
+            size = deep_sizeof(self._results)
+        return {"entries": entries, "bytes": size}
+
+
+_idempotency_store = None
+_idempotency_store_lock = threading.Lock()
+
+
+def get_idempotency_store() -> Optional[IdempotencyStore]:
+    """
+    Retorna el almacén de idempotencia del proceso
+
+    Returns:
+        Instancia de IdempotencyStore, o None si está deshabilitado en config
+    """
+    global _idempotency_store
+    if not CacheConfig.IDEMPOTENCY_ENABLED:
+        return None
+
+    with _idempotency_store_lock:
+        if _idempotency_store is None:
+            _idempotency_store = IdempotencyStore(
+                ttl_seconds=CacheConfig.IDEMPOTENCY_TTL,
+                max_entries=CacheConfig.IDEMPOTENCY_MAX_ENTRIES
+            )
+    return _idempotency_store
@@ -0,0 +1,265 @@
+"""
+Caché semántica de respuestas por vecino más cercano sobre preguntas previas
+
+Reutiliza la respuesta de una pregunta ya contestada cuando una nueva consulta
+es una paráfrasis ("¿cómo pido una beca?" vs "proceso para solicitar beca").
+Las preguntas se comparan con el mismo embedder del pipeline (vectores
+normalizados, similitud = producto punto) sobre una matriz en memoria por
+tipo de contexto; el volumen esperado (cientos a pocos miles) no justifica un
+índice ANN.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import copy
+import threading
+import time
+import numpy as np
+from typing import Dict, Optional, Tuple
+from config import CacheConfig
+from observability.memory import deep_sizeof
+
+
+class _Partition:
+    """Entradas de un tipo de contexto: matriz de embeddings + metadatos"""
+
+    def __init__(self, capacity: int, dim: int):
+        self.capacity = capacity
+        self.matrix = np.zeros((capacity, dim), dtype='float32')
+        self.entries = [None] * capacity  # (namespace, index_version, expires_at, value)
+        self.last_used = np.zeros(capacity, dtype='float64')
+        self.size = 0
+
+
+class SemanticCache:
+    """
+    Caché de respuestas indexada por embedding de la pregunta
+
+    - Umbral de similitud y capacidad por context_type
+    - Expulsión LRU dentro de cada context_type
+    - Solo se sirven entradas de la misma versión del índice y del mismo
+      namespace (proveedor/modelo/parámetros)
+    """
+
+    def __init__(
+        self,
+        thresholds: Dict[str, float],
+        max_entries_per_type: int = 500,
+        ttl_seconds: float = 3600,
+        dim: int = 1024
+    ):
+        """
+        Inicializa la caché
+
+        Args:
+            thresholds: Similitud mínima por context_type (tipos ausentes no se cachean)
+            max_entries_per_type: Capacidad de cada context_type
+            ttl_seconds: Tiempo de vida de cada respuesta
+            dim: Dimensión de los embeddings
+        """
+        self.thresholds = dict(thresholds)
+        self.max_entries_per_type = max_entries_per_type
+        self.ttl_seconds = ttl_seconds
+        self.dim = dim
+
+        self._partitions = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "records": 0,
+            "bypasses": 0,
+            "evictions": 0,
+            "hits_by_context_type": {},
+        }
+
+    def lookup(
+        self,
+        query_embedding: np.ndarray,
+        namespace: str,
+        index_version: str
+    ) -> Optional[Tuple[Dict, float]]:
+        """
+        Busca la respuesta de la pregunta más parecida
+
+        Args:
+            query_embedding: Embedding normalizado de la consulta
+            namespace: Proveedor/modelo/parámetros (ver RAGPipeline)
+            index_version: Versión actual del índice
+
+        Returns:
+            Tupla (copia del resultado, similitud) o None
+        """
+        now = time.time()
+        query = query_embedding.astype('float32').reshape(-1)
+        best = None  # (similitud, context_type, slot)
+
+        with self._lock:
+            self._stats["lookups"] += 1
+
+            for context_type, partition in self._partitions.items():
+                if partition.size == 0:
+                    continue
+
+                similarities = partition.matrix[:partition.size] @ query
+                threshold = self.thresholds.get(context_type, 1.1)
+
+                for slot in np.argsort(-similarities):
+                    similarity = float(similarities[slot])
+                    if similarity < threshold:
+                        break
+                    entry_namespace, entry_version, expires_at, _ = partition.entries[slot]
+                    if entry_namespace == namespace and entry_version == index_version and expires_at > now:
+                        if best is None or similarity > best[0]:
+                            best = (similarity, context_type, slot)
+                        break
+
+            if best is None:
+                self._stats["misses"] += 1
+                return None
+
+            similarity, context_type, slot = best
+            partition = self._partitions[context_type]
+            partition.last_used[slot] = now
+            self._stats["hits"] += 1
+            by_type = self._stats["hits_by_context_type"]
+            by_type[context_type] = by_type.get(context_type, 0) + 1
+
+            return copy.deepcopy(partition.entries[slot][3]), similarity
+
+    def record(
+        self,
+        query_embedding: np.ndarray,
+        result: Dict,
+        namespace: str,
+        index_version: str
+    ) -> bool:
+        """
+        Guarda una respuesta generada
+
+        Args:
+            query_embedding: Embedding normalizado de la pregunta
+            result: Resultado de query_with_faq (debe traer context_type)
+            namespace: Proveedor/modelo/parámetros
+            index_version: Versión del índice usada para generar la respuesta
+
+        Returns:
+            True si se guardó, False si se omitió (bypass)
+        """
+        context_type = result.get("context_type")
+
+        with self._lock:
+            if result.get("error") is not None or context_type not in self.thresholds:
+                self._stats["bypasses"] += 1
+                return False
+
+            partition = self._partitions.get(context_type)
+            if partition is None:
+                partition = _Partition(self.max_entries_per_type, self.dim)
+                self._partitions[context_type] = partition
+
+            now = time.time()
+            if partition.size < partition.capacity:
+                slot = partition.size
+                partition.size += 1
+            else:
+                # Expulsar la entrada usada hace más tiempo
+                slot = int(np.argmin(partition.last_used))
+                self._stats["evictions"] += 1
+
+            partition.matrix[slot] = query_embedding.astype('float32').reshape(-1)
+            partition.entries[slot] = (namespace, index_version, now + self.ttl_seconds, copy.deepcopy(result))
+            partition.last_used[slot] = now
+            self._stats["records"] += 1
+            return True
+
+    def bypass(self):
+        """Cuenta una consulta que no pasó por la caché (ej: sin embedding)"""
+        with self._lock:
+            self._stats["bypasses"] += 1
+
+    def clear(self):
+        """Vacía la caché"""
+        with self._lock:
+            self._partitions.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas de uso
+
+        Returns:
+            Diccionario con contadores, tamaño por context_type y tasa de aciertos
+        """
+        with self._lock:
+            stats = copy.deepcopy(self._stats)
+            stats["size_by_context_type"] = {
+                context_type: partition.size
+                for context_type, partition in self._partitions.items()
+            }
+            stats["thresholds"] = dict(self.thresholds)
+
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
+
+    def memory_usage(self) -> Dict:
+        """
+        Estima la memoria de la caché (las matrices se reservan completas al crear cada tipo)
+
+        Returns:
+            Diccionario con entradas, bytes de matrices y bytes totales
+        """
+        with self._lock:
+            partitions = list(self._partitions.values())
+            entries = sum(partition.size for partition in partitions)
+            matrix_bytes = sum(partition.matrix.nbytes + partition.last_used.nbytes for partition in partitions)
+            entry_bytes = sum(deep_sizeof(partition.entries) for partition in partitions)
+        return {"entries": entries, "matrix_bytes": matrix_bytes, "bytes": matrix_bytes + entry_bytes}
+
+
+def parse_thresholds(spec: str) -> Dict[str, float]:
+    """
+    Parsea umbrales por tipo de contexto
+
+    Args:
+        spec: Texto 'faq_only:0.92,docs_only:0.95'
+
+    Returns:
+        Diccionario {context_type: umbral}
+    """
+    thresholds = {}
+    for item in spec.split(','):
+        if ':' in item:
+            context_type, value = item.split(':', 1)
+            thresholds[context_type.strip()] = float(value)
+    return thresholds
+
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache(dim: int) -> Optional[SemanticCache]:
+    """
+    Retorna la caché semántica del proceso (compartida entre sesiones)
+
+    Args:
+        dim: Dimensión de los embeddings del embedder
+
+    Returns:
+        Instancia de SemanticCache, o None si está deshabilitada en config
+    """
+    global _semantic_cache
+    if not CacheConfig.SEMANTIC_CACHE_ENABLED:
+        return None
+
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticCache(
+                thresholds=parse_thresholds(CacheConfig.SEMANTIC_CACHE_THRESHOLDS),
+                max_entries_per_type=CacheConfig.SEMANTIC_CACHE_MAX_PER_TYPE,
+                ttl_seconds=CacheConfig.SEMANTIC_CACHE_TTL,
+                dim=dim
+            )
+    return _semantic_cache
@@ -0,0 +1,134 @@
+"""
+Coalescencia de consultas idénticas concurrentes (single-flight)
+
+Cuando varias peticiones con la misma llave llegan mientras una ya se está
+calculando, solo la primera (líder) ejecuta el trabajo; las demás esperan y
+reciben el mismo resultado. En periodos de matrícula esto reduce a una sola
+las llamadas al embedder, a ChromaDB y al proveedor LLM por pregunta repetida.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from config import CacheConfig
+from deadline import DeadlineExceeded
+
+
+class _Flight:
+    """Cálculo en curso para una llave"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma llave en una sola ejecución"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}   # key -> _Flight
+        self._stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "retried": 0,
+        }
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Ejecuta fn una sola vez por llave entre llamadas concurrentes
+
+        Un DeadlineExceeded del líder (su cliente se desconectó o se agotó su
+        tiempo) es propio de su petición y no se comparte: los seguidores
+        vuelven a intentarlo con su propio fn y uno de ellos pasa a ser el
+        nuevo líder.
+
+        Args:
+            key: Llave de la consulta (ver RAGPipeline.answer_cache_key)
+            fn: Función que calcula el resultado
+            timeout: Máximo de segundos que un seguidor espera al líder (None = sin límite)
+
+        Returns:
+            Tupla (resultado, compartido). compartido es True si el resultado
+            lo calculó otra llamada; el llamador no debe mutarlo sin copiarlo.
+
+        Raises:
+            TimeoutError: Si el líder no termina dentro de timeout
+            Exception: La misma excepción que lanzó el líder
+        """
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = _Flight()
+                    self._flights[key] = flight
+                    self._stats["leaders"] += 1
+                else:
+                    flight.waiters += 1
+                    self._stats["coalesced"] += 1
+
+            if leader:
+                break
+
+            remaining = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+            if not flight.event.wait(remaining):
+                raise TimeoutError(f"Timeout esperando consulta en curso ({timeout}s)")
+            if flight.error is None:
+                return flight.result, True
+            if not isinstance(flight.error, DeadlineExceeded):
+                raise flight.error
+            with self._lock:
+                self._stats["retried"] += 1
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+        return flight.result, False
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas de coalescencia
+
+        Returns:
+            Diccionario con líderes, llamadas agrupadas y vuelos activos
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+        return stats
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """
+    Retorna el agrupador de consultas del proceso (compartido entre sesiones)
+
+    Returns:
+        Instancia de SingleFlight, o None si está deshabilitado en config
+    """
+    global _single_flight
+    if not CacheConfig.SINGLE_FLIGHT_ENABLED:
+        return None
+
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+    return _single_flight
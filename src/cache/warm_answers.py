@@ -0,0 +1,276 @@
+"""
+Respuestas precalculadas para arrancar los workers con la caché caliente
+
+La mayor parte del tráfico repite un conjunto pequeño de preguntas. El job
+offline (python src/main.py --warm-cache) toma las preguntas normalizadas más
+frecuentes de las capturas de /chat (API_CAPTURE_PATH) más todas las
+preguntas de las FAQs, las responde con RAGPipeline y guarda los resultados
+con su llave de AnswerCache y la versión del índice. Cada worker los carga en
+memoria durante el warm-up (RAGEngine.warm_up), descartando los de otra
+versión del índice: tras una re-ingestion hay que volver a correr el job.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from cache.answer_cache import AnswerCache
+from config import CacheConfig
+from rag.faq_handler import normalize_text
+
+# top_k por defecto de /chat (ChatRequest): el de las preguntas sin captura
+DEFAULT_TOP_K = 4
+
+FORMAT_VERSION = 1
+
+
+def mine_questions(
+    capture_path: str,
+    provider: Optional[str] = None,
+    limit: int = 200,
+    min_count: int = 2
+) -> List[Dict]:
+    """
+    Preguntas normalizadas más frecuentes de un archivo de capturas
+
+    Args:
+        capture_path: JSONL de capturas de /chat (ver observability.capture)
+        provider: Solo peticiones de este proveedor o sin proveedor (None = todas)
+        limit: Máximo de preguntas
+        min_count: Mínimo de apariciones para considerar una pregunta
+
+    Returns:
+        Lista de {"question", "top_k", "count"} de mayor a menor frecuencia;
+        question es la redacción más común y top_k el más usado con ella
+    """
+    counts = Counter()
+    wordings = defaultdict(Counter)
+    top_ks = defaultdict(Counter)
+
+    with open(capture_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            message = (record.get('message') or '').strip()
+            if not message:
+                continue
+            if provider and record.get('llm_provider') not in (None, provider):
+                continue
+
+            normalized = normalize_text(message)
+            if not normalized:
+                continue
+            counts[normalized] += 1
+            wordings[normalized][message] += 1
+            top_ks[normalized][record.get('top_k') or DEFAULT_TOP_K] += 1
+
+    return [
+        {
+            "question": wordings[normalized].most_common(1)[0][0],
+            "top_k": top_ks[normalized].most_common(1)[0][0],
+            "count": count,
+        }
+        for normalized, count in counts.most_common(limit)
+        if count >= min_count
+    ]
+
+
+def faq_questions(faq_handler, top_k: int = DEFAULT_TOP_K) -> List[Dict]:
+    """
+    Todas las variantes de pregunta de las FAQs
+
+    Args:
+        faq_handler: FAQHandler con las entradas cargadas
+        top_k: top_k con el que se precalculan
+
+    Returns:
+        Lista de {"question", "top_k", "count"} (count = 0)
+    """
+    return [
+        {"question": question, "top_k": top_k, "count": 0}
+        for entry in faq_handler.faq_entries
+        for question in entry['questions']
+    ]
+
+
+def merge_questions(*groups: List[Dict]) -> List[Dict]:
+    """
+    Une listas de preguntas sin repetir llaves (pregunta normalizada + top_k)
+
+    Returns:
+        Lista en el orden de aparición (la primera ocurrencia gana)
+    """
+    seen = set()
+    merged = []
+    for group in groups:
+        for item in group:
+            key = (normalize_text(item['question']), item['top_k'])
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged
+
+
+def precompute_answers(
+    pipeline,
+    questions: List[Dict],
+    max_tokens: int = 2000,
+    concurrency: int = 4,
+    batch_size: int = 64
+) -> List[Dict]:
+    """
+    Responde las preguntas con el pipeline, sin pasar por sus cachés
+
+    Como el modo lote de la CLI: embeddings y vecinos por bloque en una sola
+    llamada, y las respuestas en un pool de hilos que acota las llamadas al LLM.
+
+    Args:
+        pipeline: RAGPipeline (sus cachés se desactivan durante el job)
+        questions: Resultado de mine_questions / faq_questions
+        max_tokens: Máximo de tokens (parte de la llave de caché)
+        concurrency: Consultas en paralelo
+        batch_size: Preguntas por bloque de embeddings y búsqueda
+
+    Returns:
+        Lista de entradas {"key", "question", "top_k", "count", "value"} de las
+        preguntas respondidas sin error, en el orden de questions
+    """
+    pipeline.answer_cache = None
+    pipeline.semantic_cache = None
+    pipeline.single_flight = None
+
+    def answer(item, query_embedding, neighbors) -> Optional[Dict]:
+        try:
+            result = pipeline.query_with_faq(
+                item['question'],
+                top_k=item['top_k'],
+                max_tokens=max_tokens,
+                query_embedding=query_embedding,
+                neighbors=neighbors
+            )
+        except Exception as e:
+            print(f"❌ Error en '{item['question'][:60]}': {str(e)}")
+            return None
+        if result.get("error") is not None:
+            print(f"⚠️  Sin respuesta para '{item['question'][:60]}': {result['error']}")
+            return None
+        return {
+            "key": pipeline.answer_cache_key(item['question'], item['top_k'], max_tokens),
+            "question": item['question'],
+            "top_k": item['top_k'],
+            "count": item['count'],
+            "value": result,
+        }
+
+    entries = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="warm") as executor:
+        for offset in range(0, len(questions), batch_size):
+            chunk = questions[offset:offset + batch_size]
+            embeddings = pipeline.embedder.generate_embeddings_batch([item['question'] for item in chunk])
+            neighbors = pipeline.prefetch_neighbors(embeddings, top_k=max(item['top_k'] for item in chunk))
+            results = executor.map(answer, chunk, embeddings, neighbors)
+            entries.extend(entry for entry in results if entry is not None)
+            print(f"  {min(offset + batch_size, len(questions))}/{len(questions)} preguntas, "
+                  f"{len(entries)} respuestas")
+
+    return entries
+
+
+def save_warm_answers(path: str, entries: List[Dict], provider: str, index_version: str):
+    """
+    Guarda las respuestas precalculadas de un proveedor
+
+    Conserva las de otros proveedores que sigan siendo de la misma versión del
+    índice (un mismo archivo sirve a todos los proveedores del worker).
+
+    Args:
+        path: Archivo JSON de salida
+        entries: Resultado de precompute_answers
+        provider: Proveedor LLM con el que se generaron
+        index_version: Versión del índice usada
+    """
+    path = Path(path)
+    kept = [
+        entry for entry in _read(path)
+        if entry.get('provider') != provider and entry.get('index_version') == index_version
+    ]
+    for entry in entries:
+        kept.append(dict(entry, provider=provider, index_version=index_version))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({
+            "format": FORMAT_VERSION,
+            "created_at": datetime.now().isoformat(),
+            "entries": kept,
+        }, f, ensure_ascii=False)
+    # Reemplazo atómico: un worker que arranca nunca lee un archivo a medias
+    tmp.replace(path)
+
+
+def _read(path: Path) -> List[Dict]:
+    """Entradas de un archivo de respuestas precalculadas (vacío si no existe o no es válido)"""
+    if not path.exists():
+        return []
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  No se pudieron leer las respuestas precalculadas: {str(e)}")
+        return []
+    if data.get("format") != FORMAT_VERSION:
+        return []
+    return data.get("entries", [])
+
+
+def load_warm_answers(
+    cache: Optional[AnswerCache],
+    index_version: str,
+    path: Optional[str] = None
+) -> Dict:
+    """
+    Carga en la caché de respuestas las precalculadas para la versión actual del índice
+
+    Si hay más que la capacidad de la caché, se cargan las más frecuentes.
+
+    Args:
+        cache: Caché de respuestas del proceso (None = deshabilitada)
+        index_version: Versión actual del índice
+        path: Archivo de respuestas (None = CacheConfig.ANSWER_CACHE_WARM_PATH)
+
+    Returns:
+        Diccionario con respuestas cargadas, descartadas por versión y segundos
+    """
+    start = time.perf_counter()
+    path = path or CacheConfig.ANSWER_CACHE_WARM_PATH
+    if cache is None or not path:
+        return {"loaded": 0, "stale": 0, "seconds": 0.0}
+
+    entries = _read(Path(path))
+    current = [entry for entry in entries if entry.get('index_version') == index_version]
+    stale = len(entries) - len(current)
+    current.sort(key=lambda entry: entry.get('count', 0), reverse=True)
+    current = current[:cache.max_entries]
+
+    # Las más frecuentes al final: quedan como las más recientes del LRU
+    loaded = cache.preload(
+        ((entry['key'], entry['value']) for entry in reversed(current)),
+        ttl_seconds=CacheConfig.ANSWER_CACHE_WARM_TTL
+    )
+    return {
+        "loaded": loaded,
+        "stale": stale,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
@@ -7,12 +7,20 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from typing import List, Tuple, Optional
 from rag.rag_pipeline import RAGPipeline
+from deadline import Deadline, DeadlineExceeded
+from observability.tracing import span
 
 
 class RAGChatbot:
     """Chatbot con historial de conversación y sistema RAG"""
 
-    def __init__(self, docs_folder: str = "data/docs", max_history: int = 5, llm_provider: str = "deepseek"):
+    def __init__(
+        self,
+        docs_folder: str = "data/docs",
+        max_history: int = 5,
+        llm_provider: str = "deepseek",
+        pipeline: Optional[RAGPipeline] = None
+    ):
         """
         Inicializa el chatbot con ChromaDB
 
@@ -20,8 +28,9 @@ class RAGChatbot:
             docs_folder: Carpeta con documentos
             max_history: Número máximo de mensajes a recordar en el historial
             llm_provider: Proveedor de LLM ("groq" o "deepseek")
+            pipeline: Pipeline compartido (ver RAGEngine); None = crear uno propio
         """
-        self.pipeline = RAGPipeline(docs_folder, llm_provider=llm_provider)
+        self.pipeline = pipeline or RAGPipeline(docs_folder, llm_provider=llm_provider)
         self.max_history = max_history
         self.conversation_history = []
 
@@ -47,8 +56,10 @@ class RAGChatbot:
         user_message: str,
         top_k: int = 4,
         temperature: float = 0.7,
-        use_rag: bool = True
-    ) -> dict:
+        use_rag: bool = True,
+        degradation: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Optional[dict]:
         """
         Procesa un mensaje del usuario y genera una respuesta
 
@@ -57,9 +68,12 @@ class RAGChatbot:
             top_k: Número de documentos relevantes a recuperar
             temperature: Temperatura para DeepSeek
             use_rag: Si es True, usa RAG; si es False, solo usa el historial
+            degradation: Modo degradado bajo carga (ver RAGPipeline.query_with_faq)
+            deadline: Deadline de la petición, propagado a todas las etapas
 
         Returns:
-            Diccionario con respuesta y metadatos
+            Diccionario con respuesta y metadatos, o None si el modo degradado
+            no permite responder (no se agrega nada al historial)
         """
         if not user_message or not user_message.strip():
             return {
@@ -70,12 +84,19 @@ class RAGChatbot:
 
         # Si usa RAG, hacer consulta con sistema FAQ híbrido
         if use_rag:
-            result = self.pipeline.query_with_faq(
-                question=user_message,
-                top_k=top_k,
-                temperature=temperature,
-                enable_faq=True
-            )
+            with span("rag_query", provider=self.pipeline.llm_provider, degradation=degradation):
+                result = self.pipeline.query_with_faq(
+                    question=user_message,
+                    top_k=top_k,
+                    temperature=temperature,
+                    enable_faq=True,
+                    degradation=degradation,
+                    deadline=deadline
+                )
+            if result is None:
+                return None
+        elif degradation is not None:
+            return None
         else:
             # Sin RAG, solo conversación con historial
             history_context = self._format_history_for_llm()
@@ -86,7 +107,8 @@ class RAGChatbot:
             try:
                 answer = self.pipeline.llm_client.simple_chat(
                     message=full_message,
-                    temperature=temperature
+                    temperature=temperature,
+                    deadline=deadline
                 )
 
                 result = {
@@ -94,6 +116,8 @@ class RAGChatbot:
                     "relevant_documents": [],
                     "error": None
                 }
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 result = {
                     "answer": f"Error al generar respuesta: {str(e)}",
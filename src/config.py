@@ -31,6 +31,15 @@ class FAQConfig:
     NUM_FAQS_MEDIUM_MATCH = int(os.getenv('FAQ_NUM_MEDIUM', '2'))       # Top-2 FAQs para match medio
     NUM_DOCS_MEDIUM_MATCH = int(os.getenv('FAQ_DOCS_MEDIUM', '2'))      # Top-2 Docs para match medio
 
+    # Índice léxico de preguntas FAQ (exacto + trigramas), consultado antes de generar embeddings
+    ENABLE_LEXICAL_MATCH = os.getenv('FAQ_LEXICAL_MATCH', 'true').lower() == 'true'
+    LEXICAL_THRESHOLD = float(os.getenv('FAQ_LEXICAL_THRESHOLD', '0.85'))  # Dice de trigramas
+
+    # Respuesta directa (sin LLM) para matches fuertes
+    ENABLE_DIRECT_ANSWER = os.getenv('FAQ_DIRECT_ANSWER', 'true').lower() == 'true'
+    DIRECT_ANSWER_USE_REWORDING = os.getenv('FAQ_DIRECT_USE_REWORDING', 'true').lower() == 'true'
+    DIRECT_ANSWER_REWORDINGS_PATH = os.getenv('FAQ_REWORDINGS_PATH', 'data/faq_rewordings.json')
+
 
 # =============================================================================
 # Retrieval Configuration
@@ -65,6 +74,12 @@ class EmbeddingConfig:
     # Device para el modelo (cpu, cuda, mps)
     DEVICE = os.getenv('EMBEDDING_DEVICE', 'cpu')
 
+    # Servicio de embeddings fuera de proceso (vacío = modelo en el propio proceso)
+    SERVICE_SOCKET = os.getenv('EMBEDDING_SERVICE_SOCKET', '')
+    # Vacío = el servicio genera una clave aleatoria en <socket>.key (0600)
+    SERVICE_AUTHKEY = os.getenv('EMBEDDING_SERVICE_AUTHKEY', '')
+    SERVICE_MAX_BATCH = int(os.getenv('EMBEDDING_SERVICE_MAX_BATCH', '64'))
+
 
 # =============================================================================
 # ChromaDB Configuration
@@ -106,6 +121,28 @@ class LLMConfig:
     DEFAULT_MAX_TOKENS = int(os.getenv('LLM_MAX_TOKENS', '2000'))
     MAX_TOKENS_GROQ = int(os.getenv('LLM_MAX_TOKENS_GROQ', '850'))  # Groq tiene límite más bajo
 
+    # Prompts: incluir el corpus FAQ completo en el prefijo estable del modo 'faq_only'
+    # (aprovecha la caché de prefijos del proveedor)
+    PROMPT_FAQ_CORPUS_IN_PREFIX = os.getenv('LLM_PROMPT_FAQ_CORPUS_IN_PREFIX', 'true').lower() == 'true'
+    PROMPT_FAQ_CORPUS_MAX_CHARS = int(os.getenv('LLM_PROMPT_FAQ_CORPUS_MAX_CHARS', '60000'))
+
+
+class StubLLMConfig:
+    """Proveedor LLM de prueba (llm_provider="stub"): latencia y errores simulados, sin red"""
+
+    # Aceptar 'stub' en /chat y /change-model (solo para pruebas de carga; la CLI siempre puede usarlo)
+    API_ENABLED = os.getenv('STUB_LLM_API_ENABLED', 'false').lower() == 'true'
+
+    TTFT_MS = float(os.getenv('STUB_LLM_TTFT_MS', '250'))                     # Tiempo al primer token
+    TOKENS_PER_SECOND = float(os.getenv('STUB_LLM_TOKENS_PER_SECOND', '60'))  # 0 = sin espera entre tokens
+    OUTPUT_TOKENS = int(os.getenv('STUB_LLM_OUTPUT_TOKENS', '80'))            # Longitud de la respuesta (palabras)
+    JITTER = float(os.getenv('STUB_LLM_JITTER', '0.0'))                       # Variación ± de las latencias (0-1)
+
+    # Inyección de errores: fracción de llamadas que fallan y cómo
+    ERROR_RATE = float(os.getenv('STUB_LLM_ERROR_RATE', '0.0'))
+    ERROR_KIND = os.getenv('STUB_LLM_ERROR_KIND', 'error')  # error (antes del primer token), midstream, timeout
+    SEED = int(os.getenv('STUB_LLM_SEED', '0'))
+
 
 # =============================================================================
 # Document Ingestion Configuration
@@ -128,6 +165,12 @@ class IngestionConfig:
     # Extensiones de archivo permitidas
     ALLOWED_EXTENSIONS = ['.md', '.txt']
 
+    # Indexar FAQs por entrada (una pregunta = un documento) en lugar del archivo completo
+    SPLIT_FAQ_ENTRIES = os.getenv('FAQ_SPLIT_ENTRIES', 'true').lower() == 'true'
+
+    # Además de cada pregunta, indexar pregunta + respuesta de cada entrada
+    FAQ_INDEX_QUESTION_ANSWER = os.getenv('FAQ_INDEX_QA', 'false').lower() == 'true'
+
 
 # =============================================================================
 # Chatbot Configuration
@@ -146,6 +189,44 @@ class ChatbotConfig:
     SPECIAL_COMMANDS = ['salir', 'exit', 'limpiar', 'stats', 'ayuda', 'help']
 
 
+# =============================================================================
+# Cache Configuration
+# =============================================================================
+
+class CacheConfig:
+    """Configuración de las cachés de respuestas"""
+
+    # Caché exacta (pregunta normalizada + proveedor/modelo + parámetros + versión del índice)
+    ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', '1000'))
+    ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '3600'))    # Segundos
+
+    # Nivel en disco compartido por los workers del host (vacío = deshabilitado)
+    ANSWER_CACHE_DISK_PATH = os.getenv('ANSWER_CACHE_DISK_PATH', '')
+    ANSWER_CACHE_DISK_MAX_ENTRIES = int(os.getenv('ANSWER_CACHE_DISK_MAX_ENTRIES', '10000'))
+
+    # Respuestas precalculadas (python src/main.py --warm-cache) que cada worker carga al arrancar
+    ANSWER_CACHE_WARM_PATH = os.getenv('ANSWER_CACHE_WARM_PATH', 'data/cache/warm_answers.json')
+    ANSWER_CACHE_WARM_TTL = float(os.getenv('ANSWER_CACHE_WARM_TTL', '86400'))  # Segundos
+
+    # Caché semántica (paráfrasis): umbral de similitud por context_type
+    SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true'
+    SEMANTIC_CACHE_THRESHOLDS = os.getenv(
+        'SEMANTIC_CACHE_THRESHOLDS',
+        'faq_direct:0.90,faq_only:0.92,faq_and_docs:0.95,docs_only:0.95'
+    )
+    SEMANTIC_CACHE_MAX_PER_TYPE = int(os.getenv('SEMANTIC_CACHE_MAX_PER_TYPE', '500'))
+    SEMANTIC_CACHE_TTL = float(os.getenv('SEMANTIC_CACHE_TTL', '3600'))  # Segundos
+
+    # Coalescencia de consultas idénticas concurrentes (una sola generación por pregunta)
+    SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+
+    # Idempotencia de /chat: resultados recientes por llave para reintentos del cliente
+    IDEMPOTENCY_ENABLED = os.getenv('IDEMPOTENCY_ENABLED', 'true').lower() == 'true'
+    IDEMPOTENCY_TTL = float(os.getenv('IDEMPOTENCY_TTL', '300'))  # Segundos
+    IDEMPOTENCY_MAX_ENTRIES = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '10000'))
+
+
 # =============================================================================
 # API Configuration
 # =============================================================================
@@ -160,13 +241,69 @@ class APIConfig:
     # CORS origins permitidos
     CORS_ORIGINS = os.getenv('API_CORS_ORIGINS', 'http://localhost:3000,http://localhost:5173').split(',')
 
-    # Timeout para requests
+    # Deadline total de cada petición /chat (embedding + búsqueda + LLM) y timeout de las llamadas al LLM
     REQUEST_TIMEOUT = int(os.getenv('API_REQUEST_TIMEOUT', '30'))
 
+    # Control de admisión de /chat
+    ADMISSION_ENABLED = os.getenv('API_ADMISSION_ENABLED', 'true').lower() == 'true'
+    MAX_CONCURRENT_REQUESTS = int(os.getenv('API_MAX_CONCURRENT', '16'))
+    PROVIDER_CONCURRENCY = os.getenv('API_PROVIDER_CONCURRENCY', 'deepseek:8,groq:8')
+    MAX_QUEUE = int(os.getenv('API_MAX_QUEUE', '64'))
+    QUEUE_TIMEOUT = float(os.getenv('API_QUEUE_TIMEOUT', '10'))  # Segundos
+
+    # Escalera de degradación según ocupación de la cola (0-1; >1 = deshabilitado)
+    DEGRADE_FAQ_AT = float(os.getenv('API_DEGRADE_FAQ_AT', '0.5'))      # Solo FAQ directa y cachés
+    DEGRADE_CACHE_AT = float(os.getenv('API_DEGRADE_CACHE_AT', '0.8'))  # Solo caché exacta
+    MAX_DEGRADED_CONCURRENT = int(os.getenv('API_MAX_DEGRADED_CONCURRENT', '4'))  # Degradadas en ejecución
+
+    # Warm-up al arrancar (carga del engine, encodes de prueba, pre-conexión LLM)
+    WARMUP_ENABLED = os.getenv('API_WARMUP_ENABLED', 'true').lower() == 'true'
+    WARMUP_ENCODES = int(os.getenv('API_WARMUP_ENCODES', '3'))
+    WARMUP_PROVIDERS = os.getenv('API_WARMUP_PROVIDERS', 'deepseek')  # Separados por coma ('' = ninguno)
+
+    # Serving multi-proceso (gunicorn.conf.py)
+    WORKERS = int(os.getenv('API_WORKERS', '2'))
+    THREADS_PER_WORKER = int(os.getenv('API_THREADS_PER_WORKER', '0'))  # 0 = cores / workers
+    PRELOAD_EMBEDDER = os.getenv('API_PRELOAD_EMBEDDER', 'false').lower() == 'true'
+
+    # Endpoints /debug/* (profiling, memoria): requieren el header X-Admin-Token ('' = deshabilitados)
+    ADMIN_TOKEN = os.getenv('API_ADMIN_TOKEN', '')
+    PROFILE_DIR = os.getenv('API_PROFILE_DIR', 'data/profiles')
+    PROFILE_SIGNAL_SECONDS = float(os.getenv('API_PROFILE_SIGNAL_SECONDS', '30'))  # Ventana de kill -USR2
+
+    # Captura de peticiones /chat en JSONL para reproducirlas (src/bench/loadtest.py); '' = deshabilitada
+    CAPTURE_PATH = os.getenv('API_CAPTURE_PATH', '')
+
     # Logging level
     LOG_LEVEL = os.getenv('API_LOG_LEVEL', 'info')
 
 
+# =============================================================================
+# Logging Configuration
+# =============================================================================
+
+class LoggingConfig:
+    """Configuración del logging estructurado (src/observability/log.py)"""
+
+    LEVEL = os.getenv('LOG_LEVEL', 'info')            # debug, info, warning, error
+    FORMAT = os.getenv('LOG_FORMAT', 'text')          # text (clave=valor) o json
+    DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.1'))  # Fracción de peticiones con DEBUG
+    QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))  # Registros pendientes antes de descartar
+
+
+# =============================================================================
+# Tracing Configuration
+# =============================================================================
+
+class TracingConfig:
+    """Configuración del tracing por petición (src/observability/tracing.py)"""
+
+    ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+    # Archivo JSONL (formato OTLP) para las trazas ('' = no exportar)
+    EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', '')
+    SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))  # Fracción de trazas exportadas
+
+
 # =============================================================================
 # Helper Functions
 # =============================================================================
@@ -183,6 +320,7 @@ def get_config_summary() -> dict:
             'high_threshold': FAQConfig.HIGH_THRESHOLD,
             'medium_threshold': FAQConfig.MEDIUM_THRESHOLD,
             'top_k_faqs': FAQConfig.TOP_K_FAQS,
+            'direct_answer': FAQConfig.ENABLE_DIRECT_ANSWER,
         },
         'retrieval': {
             'default_top_k': RetrievalConfig.DEFAULT_TOP_K,
@@ -206,6 +344,14 @@ def get_config_summary() -> dict:
         'chatbot': {
             'max_history': ChatbotConfig.MAX_HISTORY,
             'enable_faq': ChatbotConfig.ENABLE_FAQ,
+        },
+        'cache': {
+            'answer_cache_enabled': CacheConfig.ANSWER_CACHE_ENABLED,
+            'answer_cache_ttl': CacheConfig.ANSWER_CACHE_TTL,
+            'answer_cache_disk_path': CacheConfig.ANSWER_CACHE_DISK_PATH,
+            'semantic_cache_enabled': CacheConfig.SEMANTIC_CACHE_ENABLED,
+            'semantic_cache_thresholds': CacheConfig.SEMANTIC_CACHE_THRESHOLDS,
+            'single_flight_enabled': CacheConfig.SINGLE_FLIGHT_ENABLED,
         }
     }
 
@@ -224,6 +370,9 @@ def validate_config():
     if FAQConfig.MEDIUM_THRESHOLD >= FAQConfig.HIGH_THRESHOLD:
         errors.append(f"FAQ_MEDIUM_THRESHOLD debe ser menor que FAQ_HIGH_THRESHOLD")
 
+    if not (0 <= FAQConfig.LEXICAL_THRESHOLD <= 1):
+        errors.append(f"FAQ_LEXICAL_THRESHOLD debe estar entre 0 y 1, actual: {FAQConfig.LEXICAL_THRESHOLD}")
+
     # Validar API keys (al menos una debe existir)
     if not LLMConfig.GROQ_API_KEY and not LLMConfig.DEEPSEEK_API_KEY:
         errors.append("Al menos GROQ_API_KEY o DEEPSEEK_API_KEY debe estar configurada")
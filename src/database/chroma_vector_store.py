@@ -1,11 +1,19 @@
 """
 Módulo para gestionar almacenamiento de embeddings usando ChromaDB
 """
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
 import chromadb
 from chromadb.config import Settings
 import numpy as np
-from pathlib import Path
 from typing import List, Tuple, Optional
+from observability.log import get_logger
+from observability.tracing import span
+
+logger = get_logger("database.chroma")
 
 
 class ChromaVectorStore:
@@ -33,10 +41,38 @@ class ChromaVectorStore:
             metadata={"hnsw:space": "cosine"}  # Cosine similarity
         )
 
-        print(f"ChromaDB inicializado en: {self.storage_path}")
-        print(f"Documentos en colección: {self.collection.count()}")
+        # Sello de versión del índice: cambia con cada escritura (invalida cachés)
+        self.version_file = self.storage_path / "index_version"
 
-    def add_document(self, filename: str, content: str, embedding: np.ndarray) -> int:
+        logger.info("chroma.ready", path=str(self.storage_path), documents=self.collection.count())
+
+    def get_index_version(self) -> str:
+        """
+        Obtiene el sello de versión del índice
+
+        Se lee del disco en cada llamada para que todos los procesos que
+        comparten el almacenamiento vean una re-ingestion.
+
+        Returns:
+            Versión actual ('0' si el índice nunca se modificó con esta versión)
+        """
+        try:
+            return self.version_file.read_text(encoding='utf-8').strip() or "0"
+        except FileNotFoundError:
+            return "0"
+
+    def _bump_index_version(self):
+        """Actualiza el sello de versión tras modificar la colección"""
+        self.version_file.write_text(str(time.time_ns()), encoding='utf-8')
+
+    def add_document(
+        self,
+        filename: str,
+        content: str,
+        embedding: np.ndarray,
+        doc_id: str = None,
+        metadata: Optional[dict] = None
+    ) -> int:
         """
         Añade un documento con su embedding a ChromaDB
 
@@ -44,28 +80,47 @@ class ChromaVectorStore:
             filename: Nombre del archivo
             content: Contenido del documento
             embedding: Embedding numpy array (1024 dimensiones)
+            doc_id: ID explícito en ChromaDB (None = derivarlo del filename)
+            metadata: Metadata adicional (ej: entrada FAQ de origen)
 
         Returns:
             ID del documento insertado
         """
         # ChromaDB genera IDs automáticamente, pero usaremos el filename como ID
         # Convertir filename a un ID válido (sin espacios ni caracteres especiales)
-        doc_id = filename.replace(" ", "_").replace("/", "_").replace("\\", "_")
+        doc_id = doc_id or self._filename_to_id(filename)
 
         # Convertir embedding a lista (ChromaDB requiere list, no numpy array)
         embedding_list = embedding.astype('float32').tolist()
 
+        doc_metadata = dict(metadata or {})
+        doc_metadata["filename"] = filename
+
         # Añadir a ChromaDB
         self.collection.add(
             embeddings=[embedding_list],
             documents=[content],
-            metadatas=[{"filename": filename}],
+            metadatas=[doc_metadata],
             ids=[doc_id]
         )
+        self._bump_index_version()
 
-        print(f"Documento '{filename}' añadido con ID: {doc_id}")
+        logger.info("chroma.document_added", filename=filename, doc_id=doc_id)
         return hash(doc_id)  # Retornar un hash como ID numérico
 
+    @staticmethod
+    def _filename_to_id(filename: str) -> str:
+        """
+        Convierte un filename a un ID válido de ChromaDB
+
+        Args:
+            filename: Nombre del archivo
+
+        Returns:
+            ID sin espacios ni separadores de ruta
+        """
+        return filename.replace(" ", "_").replace("/", "_").replace("\\", "_")
+
     def get_all_documents(self) -> List[Tuple[int, str, str, np.ndarray]]:
         """
         Obtiene todos los documentos con sus embeddings
@@ -114,17 +169,18 @@ class ChromaVectorStore:
 
         return None
 
-    def document_exists(self, filename: str) -> bool:
+    def document_exists(self, filename: str, doc_id: str = None) -> bool:
         """
         Verifica si un documento ya existe
 
         Args:
             filename: Nombre del archivo a verificar
+            doc_id: ID explícito en ChromaDB (None = derivarlo del filename)
 
         Returns:
             True si existe, False si no
         """
-        doc_id = filename.replace(" ", "_").replace("/", "_").replace("\\", "_")
+        doc_id = doc_id or self._filename_to_id(filename)
 
         try:
             result = self.collection.get(ids=[doc_id])
@@ -151,22 +207,40 @@ class ChromaVectorStore:
         Returns:
             True si se eliminó, False si no existía
         """
-        # Buscar el documento por hash
-        all_docs = self.get_all_documents()
+        # Buscar el documento por hash (los IDs pueden no derivarse del filename)
+        all_ids = self.collection.get(include=[])['ids']
 
-        for doc in all_docs:
-            if doc[0] == doc_id:
-                # doc[1] es el filename
-                chroma_id = doc[1].replace(" ", "_").replace("/", "_").replace("\\", "_")
+        for chroma_id in all_ids:
+            if hash(chroma_id) == doc_id:
                 try:
                     self.collection.delete(ids=[chroma_id])
-                    print(f"Documento {doc_id} eliminado")
+                    self._bump_index_version()
+                    logger.info("chroma.document_deleted", doc_id=doc_id)
                     return True
                 except:
                     return False
 
         return False
 
+    def delete_documents_by_filename(self, filename: str) -> int:
+        """
+        Elimina todos los documentos con un filename dado
+
+        Args:
+            filename: Nombre del archivo (metadata 'filename')
+
+        Returns:
+            Número de documentos eliminados
+        """
+        result = self.collection.get(where={"filename": filename})
+        if not result['ids']:
+            return 0
+
+        self.collection.delete(ids=result['ids'])
+        self._bump_index_version()
+        logger.info("chroma.documents_deleted", filename=filename, count=len(result['ids']))
+        return len(result['ids'])
+
     def delete_all_documents(self) -> int:
         """
         Elimina todos los documentos
@@ -182,8 +256,9 @@ class ChromaVectorStore:
             name="documents",
             metadata={"hnsw:space": "cosine"}
         )
+        self._bump_index_version()
 
-        print(f"Se eliminaron {count} documentos")
+        logger.info("chroma.collection_cleared", count=count)
         return count
 
     def search_similar(self, query_embedding: np.ndarray, top_k: int = 3) -> List[Tuple[int, str, str, float]]:
@@ -204,23 +279,66 @@ class ChromaVectorStore:
         query_list = query_embedding.astype('float32').tolist()
 
         # Buscar en ChromaDB
-        results = self.collection.query(
-            query_embeddings=[query_list],
-            n_results=min(top_k, self.collection.count()),
-            include=["documents", "metadatas", "distances"]
-        )
+        with span("chroma_query", top_k=top_k):
+            results = self.collection.query(
+                query_embeddings=[query_list],
+                n_results=min(top_k, self.collection.count()),
+                include=["documents", "metadatas", "distances"]
+            )
+
+        return self._similar_docs(results, 0)
+
+    def search_similar_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 3
+    ) -> List[List[Tuple[int, str, str, float]]]:
+        """
+        Busca los documentos más similares a varias consultas en una sola llamada
+
+        Args:
+            query_embeddings: Matriz (n, dim) con un embedding por consulta
+            top_k: Número de resultados por consulta
 
-        # Construir resultados
+        Returns:
+            Una lista de tuplas (id, filename, content, similarity_score) por consulta
+        """
+        if len(query_embeddings) == 0:
+            return []
+        if self.collection.count() == 0:
+            return [[] for _ in range(len(query_embeddings))]
+
+        with span("chroma_query", top_k=top_k, queries=len(query_embeddings)):
+            results = self.collection.query(
+                query_embeddings=np.asarray(query_embeddings, dtype='float32').tolist(),
+                n_results=min(top_k, self.collection.count()),
+                include=["documents", "metadatas", "distances"]
+            )
+
+        return [self._similar_docs(results, i) for i in range(len(query_embeddings))]
+
+    @staticmethod
+    def _similar_docs(results: dict, query_index: int) -> List[Tuple[int, str, str, float]]:
+        """
+        Convierte el resultado de collection.query para una de sus consultas
+
+        Args:
+            results: Resultado de collection.query
+            query_index: Posición de la consulta
+
+        Returns:
+            Lista de tuplas (id, filename, content, similarity_score)
+        """
         similar_docs = []
 
-        if results['ids'] and len(results['ids'][0]) > 0:
-            for i, doc_id in enumerate(results['ids'][0]):
-                filename = results['metadatas'][0][i]['filename']
-                content = results['documents'][0][i]
+        if results['ids'] and len(results['ids'][query_index]) > 0:
+            for i, doc_id in enumerate(results['ids'][query_index]):
+                filename = results['metadatas'][query_index][i]['filename']
+                content = results['documents'][query_index][i]
 
                 # ChromaDB retorna distancia, convertir a similitud
                 # Para cosine distance: similarity = 1 - distance
-                distance = results['distances'][0][i]
+                distance = results['distances'][query_index][i]
                 similarity = 1.0 - distance
 
                 similar_docs.append((
@@ -232,7 +350,6 @@ class ChromaVectorStore:
 
         return similar_docs
 
-
 if __name__ == "__main__":
     # Test del almacenamiento ChromaDB
     try:
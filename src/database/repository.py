@@ -28,7 +28,14 @@ class DocumentRepository:
         self.storage = storage
         self.storage_type = "chroma"
 
-    def insert_document(self, filename: str, content: str, embedding_bytes: bytes) -> int:
+    def insert_document(
+        self,
+        filename: str,
+        content: str,
+        embedding_bytes: bytes,
+        doc_id: str = None,
+        metadata: Optional[dict] = None
+    ) -> int:
         """
         Inserta un documento con su embedding en ChromaDB
 
@@ -36,6 +43,8 @@ class DocumentRepository:
             filename: Nombre del archivo
             content: Contenido del documento
             embedding_bytes: Embedding en formato bytes
+            doc_id: ID explícito en ChromaDB (opcional)
+            metadata: Metadata adicional (opcional)
 
         Returns:
             ID del documento insertado
@@ -43,7 +52,7 @@ class DocumentRepository:
         try:
             # Convertir bytes a numpy array
             embedding = np.frombuffer(embedding_bytes, dtype='float32')
-            return self.storage.add_document(filename, content, embedding)
+            return self.storage.add_document(filename, content, embedding, doc_id=doc_id, metadata=metadata)
         except Exception as e:
             raise Exception(f"Error al insertar documento: {str(e)}")
 
@@ -126,17 +135,42 @@ class DocumentRepository:
         except Exception as e:
             raise Exception(f"Error al contar documentos: {str(e)}")
 
-    def document_exists(self, filename: str) -> bool:
+    def get_index_version(self) -> str:
+        """
+        Obtiene el sello de versión del índice (cambia con cada re-ingestion)
+
+        Returns:
+            Versión actual del índice
+        """
+        return self.storage.get_index_version()
+
+    def document_exists(self, filename: str, doc_id: str = None) -> bool:
         """
         Verifica si un documento ya existe en ChromaDB
 
         Args:
             filename: Nombre del archivo a verificar
+            doc_id: ID explícito en ChromaDB (opcional)
 
         Returns:
             True si existe, False si no
         """
         try:
-            return self.storage.document_exists(filename)
+            return self.storage.document_exists(filename, doc_id=doc_id)
         except Exception as e:
             raise Exception(f"Error al verificar documento: {str(e)}")
+
+    def delete_documents_by_filename(self, filename: str) -> int:
+        """
+        Elimina todos los documentos con un filename dado
+
+        Args:
+            filename: Nombre del archivo
+
+        Returns:
+            Número de documentos eliminados
+        """
+        try:
+            return self.storage.delete_documents_by_filename(filename)
+        except Exception as e:
+            raise Exception(f"Error al eliminar documentos: {str(e)}")
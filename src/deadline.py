@@ -0,0 +1,91 @@
+"""
+Deadlines por petición propagados por todas las etapas del pipeline
+
+Cada etapa (embedding, FAQ, búsqueda, LLM) consulta el presupuesto restante
+antes de empezar y las llamadas al proveedor lo usan como timeout. Si el
+cliente se desconecta, la API cancela el deadline y la siguiente comprobación
+corta la petición (incluido el stream HTTP del proveedor).
+"""
+import threading
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Se agotó el tiempo de la petición o fue cancelada"""
+
+    def __init__(self, stage: str, cancelled: bool = False):
+        reason = "cancelada" if cancelled else "tiempo agotado"
+        super().__init__(f"Petición {reason} en la etapa '{stage}'")
+        self.stage = stage
+        self.cancelled = cancelled
+
+
+class Deadline:
+    """Límite de tiempo absoluto de una petición, con cancelación"""
+
+    def __init__(self, timeout_seconds: float):
+        """
+        Inicializa el deadline
+
+        Args:
+            timeout_seconds: Presupuesto total de la petición en segundos
+        """
+        self.timeout_seconds = timeout_seconds
+        self.expires_at = time.monotonic() + timeout_seconds
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> float:
+        """
+        Tiempo restante
+
+        Returns:
+            Segundos restantes (0 si ya expiró o fue cancelado)
+        """
+        if self._cancelled.is_set():
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Retorna True si se agotó el tiempo o la petición fue cancelada"""
+        return self._cancelled.is_set() or time.monotonic() >= self.expires_at
+
+    def cancel(self):
+        """Cancela la petición (ej: el cliente se desconectó)"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Retorna True si la petición fue cancelada"""
+        return self._cancelled.is_set()
+
+    def check(self, stage: str):
+        """
+        Verifica que quede presupuesto antes de (o durante) una etapa
+
+        Args:
+            stage: Nombre de la etapa, para el mensaje de error
+
+        Raises:
+            DeadlineExceeded: Si se agotó el tiempo o la petición fue cancelada
+        """
+        if self.expired():
+            raise DeadlineExceeded(stage, cancelled=self.cancelled)
+
+    def timeout_for(self, stage: str, cap: Optional[float] = None) -> float:
+        """
+        Presupuesto para una llamada bloqueante (ej: timeout HTTP)
+
+        Args:
+            stage: Nombre de la etapa
+            cap: Máximo de segundos a conceder (None = todo lo restante)
+
+        Returns:
+            Segundos disponibles para la etapa
+
+        Raises:
+            DeadlineExceeded: Si ya no queda tiempo
+        """
+        self.check(stage)
+        remaining = self.remaining()
+        return min(remaining, cap) if cap is not None else remaining
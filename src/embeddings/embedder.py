@@ -120,6 +120,26 @@ class Embedder:
         }
 
 
+def configure_threads(num_threads: int):
+    """
+    Limita los hilos de torch del proceso
+
+    Con varios workers en la misma máquina, cada uno usando todos los cores
+    (default de torch) provoca sobre-suscripción y empeora la latencia.
+
+    Args:
+        num_threads: Hilos intra-op para este proceso
+    """
+    import torch
+
+    torch.set_num_threads(max(1, num_threads))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Solo se puede fijar antes del primer trabajo paralelo del proceso
+        pass
+
+
 if __name__ == "__main__":
     # Test del módulo
     print("=== Test del Embedder ===\n")
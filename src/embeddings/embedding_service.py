@@ -0,0 +1,407 @@
+"""
+Servicio de embeddings fuera de proceso
+
+El tokenizador y SentenceTransformer.encode retienen el GIL y compiten con la
+atención de peticiones en los workers de la API. Con este servicio el modelo
+vive en un único proceso por host y los workers le piden embeddings por un
+socket Unix:
+
+- Solo los textos viajan por el socket; los vectores vuelven por memoria
+  compartida (un bloque por conexión creado por el cliente), sin pickle
+- El servidor agrupa en un solo encode las peticiones concurrentes de todos
+  los clientes (hasta SERVICE_MAX_BATCH textos)
+- RemoteEmbedder expone la misma interfaz que Embedder
+
+multiprocessing.connection deserializa con pickle lo que llega por el socket,
+así que el socket se crea con permisos 0600 y exige una clave: la de
+EMBEDDING_SERVICE_AUTHKEY o, si no hay, una aleatoria que el servicio escribe
+en <socket>.key (también 0600) y que los clientes leen de ahí.
+
+Uso:
+    python src/embeddings/embedding_service.py --socket /tmp/voae-embeddings.sock
+
+y en los workers: EMBEDDING_SERVICE_SOCKET=/tmp/voae-embeddings.sock
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import atexit
+import os
+import queue
+import secrets
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+from typing import List
+import numpy as np
+from config import EmbeddingConfig
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    """
+    Abre un bloque de memoria compartida creado por otro proceso
+
+    El bloque pertenece al cliente: se evita que el resource tracker de este
+    proceso lo elimine al terminar.
+    """
+    try:
+        return SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        shm = SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _key_path(socket_path: str) -> str:
+    """Archivo con la clave generada por el servicio para un socket"""
+    return socket_path + ".key"
+
+
+def _write_private(path: str, data: bytes):
+    """Escribe un archivo nuevo legible solo por el usuario actual (0600)"""
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+
+
+def resolve_authkey(socket_path: str) -> bytes:
+    """
+    Clave de un cliente para conectarse al servicio
+
+    Args:
+        socket_path: Ruta del socket Unix
+
+    Returns:
+        EMBEDDING_SERVICE_AUTHKEY o, si está vacía, la clave generada por el servicio
+
+    Raises:
+        RuntimeError: Si no hay clave configurada ni archivo de clave legible
+    """
+    if EmbeddingConfig.SERVICE_AUTHKEY:
+        return EmbeddingConfig.SERVICE_AUTHKEY.encode('utf-8')
+    try:
+        with open(_key_path(socket_path), 'rb') as f:
+            return f.read().strip()
+    except OSError as e:
+        raise RuntimeError(
+            f"Sin clave para el servicio de embeddings: define EMBEDDING_SERVICE_AUTHKEY "
+            f"o arranca el servicio para que genere {_key_path(socket_path)} ({str(e)})"
+        )
+
+
+class _EncodeJob:
+    """Textos de una petición pendiente de encode"""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class EmbeddingServer:
+    """Proceso dueño del modelo: atiende conexiones y agrupa encodes"""
+
+    def __init__(self, socket_path: str, authkey: bytes = None, max_batch: int = 64):
+        """
+        Carga el modelo y prepara el socket
+
+        Args:
+            socket_path: Ruta del socket Unix
+            authkey: Clave compartida con los clientes (None = generar una
+                aleatoria y escribirla en <socket>.key al arrancar)
+            max_batch: Máximo de textos por encode agrupado
+        """
+        from embeddings.embedder import Embedder
+
+        self.socket_path = socket_path
+        self.authkey = authkey
+        self.max_batch = max_batch
+        self.embedder = Embedder()
+        self.dim = self.embedder.get_embedding_dimension()
+        self._jobs = queue.Queue()
+
+    def serve_forever(self):
+        """Acepta conexiones hasta que el proceso termina"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        if not self.authkey:
+            self.authkey = secrets.token_hex(32).encode('ascii')
+            _write_private(_key_path(self.socket_path), self.authkey)
+
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+        # umask antes del bind: el socket nace 0600, sin ventana con otros permisos
+        previous_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.socket_path, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(previous_umask)
+
+        with listener:
+            print(f"🔌 Servicio de embeddings escuchando en {self.socket_path}")
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _batch_loop(self):
+        """Agrupa las peticiones pendientes en un solo encode"""
+        while True:
+            jobs = [self._jobs.get()]
+            total = len(jobs[0].texts)
+            while total < self.max_batch:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                total += len(job.texts)
+
+            texts = [text for job in jobs for text in job.texts]
+            try:
+                embeddings = self.embedder.generate_embeddings_batch(texts)
+            except Exception as e:
+                for job in jobs:
+                    job.error = str(e)
+                    job.done.set()
+                continue
+
+            offset = 0
+            for job in jobs:
+                job.result = embeddings[offset:offset + len(job.texts)]
+                offset += len(job.texts)
+                job.done.set()
+
+    def _handle(self, conn):
+        """Atiende una conexión de cliente"""
+        shm = None
+        try:
+            conn.send(("hello", self.dim, self.embedder.get_model_info()))
+            while True:
+                message = conn.recv()
+                command = message[0]
+
+                if command == "attach":
+                    if shm is not None:
+                        shm.close()
+                        shm = None
+                    try:
+                        shm = _attach_shared_memory(message[1])
+                    except (OSError, ValueError) as e:
+                        conn.send(("error", f"No se pudo abrir la memoria compartida: {str(e)}"))
+                        continue
+                    conn.send(("ok",))
+
+                elif command == "encode":
+                    texts = message[1]
+                    if shm is None:
+                        conn.send(("error", "Sin memoria compartida: se debe enviar 'attach' antes de 'encode'"))
+                        continue
+                    needed = len(texts) * self.dim * 4
+                    if needed > shm.size:
+                        conn.send(("error", f"{len(texts)} textos no caben en el bloque compartido "
+                                            f"({needed} > {shm.size} bytes)"))
+                        continue
+
+                    job = _EncodeJob(texts)
+                    self._jobs.put(job)
+                    job.done.wait()
+                    if job.error is not None:
+                        conn.send(("error", job.error))
+                        continue
+
+                    out = np.ndarray(job.result.shape, dtype='float32', buffer=shm.buf)
+                    out[:] = job.result
+                    del out  # liberar la vista antes de un posible close
+                    conn.send(("ok", len(job.texts)))
+
+                else:
+                    conn.send(("error", f"Comando desconocido: {command}"))
+
+        except (EOFError, ConnectionError):
+            pass
+        finally:
+            if shm is not None:
+                shm.close()
+            conn.close()
+
+
+class RemoteEmbedder:
+    """
+    Cliente del servicio de embeddings con la misma interfaz que Embedder
+
+    Cada hilo usa su propia conexión y su propio bloque de memoria compartida.
+    """
+
+    def __init__(self, socket_path: str = None, authkey: bytes = None, max_batch: int = None):
+        """
+        Conecta con el servicio
+
+        Args:
+            socket_path: Ruta del socket Unix (None = usar config)
+            authkey: Clave compartida (None = config o archivo de clave del servicio)
+            max_batch: Textos por petición; define el tamaño del bloque compartido
+        """
+        self.socket_path = socket_path or EmbeddingConfig.SERVICE_SOCKET
+        self.authkey = authkey or resolve_authkey(self.socket_path)
+        self.max_batch = max_batch or EmbeddingConfig.SERVICE_MAX_BATCH
+
+        self._local = threading.local()
+        self._channels = []
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+        # La primera conexión trae los datos del modelo
+        channel = self._channel()
+        self.dim = channel["dim"]
+        self.model_info = channel["model_info"]
+        self.model_name = self.model_info.get('model_name')
+        self.device = f"remote:{self.socket_path}"
+
+        print(f"Usando servicio de embeddings en {self.socket_path} ({self.model_name})")
+
+    def _channel(self) -> dict:
+        """Conexión y bloque compartido del hilo actual (se crean la primera vez)"""
+        channel = getattr(self._local, "channel", None)
+        if channel is not None:
+            return channel
+
+        conn = Client(self.socket_path, family='AF_UNIX', authkey=self.authkey)
+        _, dim, model_info = conn.recv()
+
+        shm = SharedMemory(create=True, size=self.max_batch * dim * 4)
+        conn.send(("attach", shm.name))
+        reply = conn.recv()
+        if reply[0] != "ok":
+            conn.close()
+            shm.close()
+            shm.unlink()
+            raise RuntimeError(f"Error en el servicio de embeddings: {reply[1]}")
+
+        channel = {"conn": conn, "shm": shm, "dim": dim, "model_info": model_info}
+        self._local.channel = channel
+        with self._lock:
+            self._channels.append(channel)
+        return channel
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Pide los embeddings al servicio, en tandas del tamaño del bloque compartido
+
+        Returns:
+            Matriz (len(texts), dim) float32
+        """
+        channel = self._channel()
+        conn, shm, dim = channel["conn"], channel["shm"], channel["dim"]
+        result = np.empty((len(texts), dim), dtype='float32')
+
+        for start in range(0, len(texts), self.max_batch):
+            chunk = texts[start:start + self.max_batch]
+            conn.send(("encode", chunk))
+            reply = conn.recv()
+            if reply[0] != "ok":
+                raise RuntimeError(f"Error en el servicio de embeddings: {reply[1]}")
+
+            result[start:start + len(chunk)] = np.ndarray((len(chunk), dim), dtype='float32', buffer=shm.buf)
+
+        return result
+
+    def generate_embedding(self, text: str) -> np.ndarray:
+        """
+        Genera un embedding para un texto dado
+
+        Args:
+            text: Texto de entrada
+
+        Returns:
+            numpy array con el embedding (float32)
+        """
+        if not text or not text.strip():
+            raise ValueError("El texto no puede estar vacío")
+        return self._encode([text])[0]
+
+    def generate_embeddings_batch(self, texts: list) -> np.ndarray:
+        """
+        Genera embeddings para múltiples textos
+
+        Args:
+            texts: Lista de textos
+
+        Returns:
+            numpy array con los embeddings (float32)
+        """
+        if not texts:
+            raise ValueError("La lista de textos no puede estar vacía")
+        return self._encode(list(texts))
+
+    def embedding_to_bytes(self, embedding: np.ndarray) -> bytes:
+        """Convierte un embedding a bytes"""
+        return embedding.astype('float32').tobytes()
+
+    @staticmethod
+    def bytes_to_embedding(embedding_bytes: bytes) -> np.ndarray:
+        """Convierte bytes de vuelta a embedding"""
+        return np.frombuffer(embedding_bytes, dtype='float32')
+
+    def get_embedding_dimension(self) -> int:
+        """Obtiene la dimensión del embedding del modelo del servicio"""
+        return self.dim
+
+    def get_model_info(self) -> dict:
+        """Obtiene información sobre el modelo del servicio"""
+        info = dict(self.model_info)
+        info['device'] = f"{info.get('device')} ({self.device})"
+        return info
+
+    def close(self):
+        """Cierra las conexiones y libera los bloques compartidos"""
+        with self._lock:
+            channels, self._channels = self._channels, []
+
+        for channel in channels:
+            try:
+                channel["conn"].close()
+            except OSError:
+                pass
+            channel["shm"].close()
+            channel["shm"].unlink()
+
+
+def create_embedder():
+    """
+    Crea el embedder del proceso según config
+
+    Returns:
+        RemoteEmbedder si EMBEDDING_SERVICE_SOCKET está configurado, si no Embedder local
+    """
+    if EmbeddingConfig.SERVICE_SOCKET:
+        return RemoteEmbedder()
+
+    from embeddings.embedder import Embedder
+    return Embedder()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de embeddings (socket Unix + memoria compartida)")
+    parser.add_argument('--socket', default=EmbeddingConfig.SERVICE_SOCKET or '/tmp/voae-embeddings.sock',
+                        help='Ruta del socket Unix')
+    parser.add_argument('--max-batch', type=int, default=EmbeddingConfig.SERVICE_MAX_BATCH,
+                        help='Máximo de textos por encode agrupado')
+    args = parser.parse_args()
+
+    server = EmbeddingServer(
+        socket_path=args.socket,
+        authkey=EmbeddingConfig.SERVICE_AUTHKEY.encode('utf-8') or None,
+        max_batch=args.max_batch
+    )
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 """
 Módulo para cargar y procesar documentos markdown
 """
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import os
 import re
-from pathlib import Path
-from typing import List, Tuple
+from typing import List, Tuple, Dict
+from config import IngestionConfig
+from rag.faq_parser import parse_faq_markdown, format_faq_entry
 
 
 class DocumentIngestion:
@@ -125,10 +130,26 @@ class DocumentIngestion:
 
         return chunks
 
+    @staticmethod
+    def is_faq_file(filename: str) -> bool:
+        """
+        Indica si un archivo pertenece a la carpeta de FAQs
+
+        Args:
+            filename: Ruta relativa a docs_folder
+
+        Returns:
+            True si es un archivo FAQ
+        """
+        return filename.replace('\\', '/').startswith('faq/')
+
     def process_documents(self, chunk_documents: bool = False) -> List[Tuple[str, str]]:
         """
         Procesa todos los documentos: carga, limpia y opcionalmente divide en chunks
 
+        Si IngestionConfig.SPLIT_FAQ_ENTRIES está activo, los archivos FAQ se
+        omiten aquí y se indexan por entrada con process_faq_entries().
+
         Args:
             chunk_documents: Si es True, divide los documentos en chunks
 
@@ -139,6 +160,9 @@ class DocumentIngestion:
         processed_docs = []
 
         for filename, content in documents:
+            if IngestionConfig.SPLIT_FAQ_ENTRIES and self.is_faq_file(filename):
+                continue
+
             # Limpiar el texto
             cleaned_content = self.clean_text(content)
 
@@ -154,6 +178,56 @@ class DocumentIngestion:
         print(f"Documentos procesados: {len(processed_docs)}")
         return processed_docs
 
+    def process_faq_entries(self) -> List[Dict]:
+        """
+        Divide los archivos FAQ en entradas pregunta/respuesta para indexarlas
+
+        Cada variante de pregunta se indexa como un documento propio (el
+        embedding se calcula sobre la pregunta) cuyo contenido es la entrada
+        completa, de modo que el contexto del LLM es una sola entrada corta.
+        Con IngestionConfig.FAQ_INDEX_QUESTION_ANSWER se agrega además un
+        documento por entrada con embedding de pregunta + respuesta.
+
+        Returns:
+            Lista de diccionarios con doc_id, filename, content, embed_text y metadata
+        """
+        items = []
+
+        for source, text in self.load_markdown_files():
+            if not self.is_faq_file(source):
+                continue
+
+            source = source.replace('\\', '/')
+            for entry in parse_faq_markdown(text, source):
+                content = format_faq_entry(entry)
+                base_id = entry['entry_id'].replace(" ", "_").replace("/", "_")
+                metadata = {
+                    'source': source,
+                    'entry_id': entry['entry_id'],
+                    'title': entry['title'],
+                }
+
+                for i, question in enumerate(entry['questions']):
+                    items.append({
+                        'doc_id': f"{base_id}_q{i}",
+                        'filename': entry['entry_id'],
+                        'content': content,
+                        'embed_text': question,
+                        'metadata': {**metadata, 'kind': 'question'},
+                    })
+
+                if IngestionConfig.FAQ_INDEX_QUESTION_ANSWER:
+                    items.append({
+                        'doc_id': f"{base_id}_qa",
+                        'filename': entry['entry_id'],
+                        'content': content,
+                        'embed_text': content,
+                        'metadata': {**metadata, 'kind': 'question_answer'},
+                    })
+
+        print(f"Entradas FAQ procesadas: {len(items)} documentos indexables")
+        return items
+
 
 if __name__ == "__main__":
     # Test del módulo
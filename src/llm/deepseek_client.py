@@ -1,17 +1,32 @@
 """
 Módulo para interactuar con la API de DeepSeek
 """
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import os
+import json
 import requests
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
+from llm.prompts import PromptTemplates, get_prompt_templates
+from llm.usage import UsageTracker
+from config import APIConfig
+from deadline import Deadline
+from observability.tracing import set_span_attributes, span
 
 
 class DeepSeekClient:
     """Cliente para la API de DeepSeek"""
 
-    def __init__(self):
-        """Inicializa el cliente de DeepSeek"""
+    def __init__(self, prompts: PromptTemplates = None):
+        """
+        Inicializa el cliente de DeepSeek
+
+        Args:
+            prompts: Plantillas precompiladas (None = usar las compartidas del proceso)
+        """
         load_dotenv()
 
         self.api_key = os.getenv('DEEPSEEK_API_KEY')
@@ -24,6 +39,58 @@ class DeepSeekClient:
             "Content-Type": "application/json"
         }
         self.model = "deepseek-chat"
+        self.prompts = prompts or get_prompt_templates()
+
+        # Sesión HTTP persistente: reutiliza la conexión TLS entre llamadas
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.usage = UsageTracker()
+
+    def _record_usage(self, usage: Optional[Dict]):
+        """
+        Registra el uso de tokens reportado por DeepSeek
+
+        DeepSeek reporta los tokens servidos desde su caché de disco en
+        'prompt_cache_hit_tokens' (se facturan más baratos y llegan antes).
+
+        Args:
+            usage: Campo 'usage' de la respuesta (puede faltar)
+
+        Returns:
+            Uso registrado de la llamada (None si el proveedor no lo reportó)
+        """
+        if not usage:
+            return None
+        recorded = self.usage.record(
+            prompt_tokens=usage.get('prompt_tokens'),
+            completion_tokens=usage.get('completion_tokens'),
+            cached_prompt_tokens=usage.get('prompt_cache_hit_tokens')
+        )
+        set_span_attributes(**recorded)
+        return recorded
+
+    def warm_up(self) -> bool:
+        """
+        Abre la conexión con la API (TLS incluido) sin generar tokens
+
+        Returns:
+            True si la API respondió
+        """
+        try:
+            response = self.session.get("https://api.deepseek.com/models", timeout=5)
+            return response.ok
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  No se pudo pre-conectar con DeepSeek: {str(e)}")
+            return False
+
+    def get_usage_stats(self) -> Dict:
+        """
+        Obtiene el uso acumulado de tokens y de caché de prefijos
+
+        Returns:
+            Diccionario con totales de tokens
+        """
+        return self.usage.get_stats()
 
     def generate_response(
         self,
@@ -31,7 +98,8 @@ class DeepSeekClient:
         context_documents: List[str],
         temperature: float = 0.7,
         max_tokens: int = 2000,
-        context_type: str = "docs_only"
+        context_type: str = "docs_only",
+        deadline: Optional[Deadline] = None
     ) -> str:
         """
         Genera una respuesta usando el contexto RAG
@@ -42,149 +110,92 @@ class DeepSeekClient:
             temperature: Temperatura para la generación (0-1)
             max_tokens: Máximo de tokens en la respuesta
             context_type: Tipo de contexto - 'faq_only', 'faq_and_docs', 'docs_only'
+            deadline: Deadline de la petición (None = timeout de APIConfig)
 
         Returns:
             Respuesta generada por DeepSeek
         """
-        # Construir el prompt RAG
-        context = "\n\n---\n\n".join(context_documents)
-
-        # Seleccionar prompt según tipo de contexto
-        if context_type == "faq_only":
-            system_prompt = """Eres el Asistente Virtual de VOAE (Vicerrectoría de Orientación y Asuntos Estudiantiles de la UNAH).
-
-Tu rol es ayudar a los estudiantes con sus preguntas frecuentes de forma amigable y profesional.
-
-Características de tu personalidad:
-- Eres cercano, amigable y accesible
-- Hablas con confianza y claridad
-- Das respuestas directas y útiles
-- Usas el "tú" para crear cercanía con los estudiantes
-- Mantienes un tono profesional pero cálido
-
-RESTRICCIÓN CRÍTICA:
-- Solo puedes usar la información EXACTA de las FAQs proporcionadas
-- Si la pregunta no coincide con ninguna FAQ, di: "No tengo información específica sobre eso en mis preguntas frecuentes. Te recomiendo contactar directamente a VOAE (https://voae.unah.edu.hn) para ayudarte mejor."
-- NO inventes información ni uses conocimiento externo
-
-Estilo de respuesta:
-- Inicia con un saludo breve y amigable ("¡Hola!", "Claro, te ayudo", etc.)
-- Responde de forma natural, como si conocieras esta información de memoria
-- NUNCA menciones "según el contexto", "basándome en", "en las FAQs", o frases similares
-- Sé conciso pero completo y cálido
-"""
-
-            user_prompt = f"""Preguntas frecuentes oficiales de VOAE:
-
-{context}
-
-Pregunta del estudiante:
-{query}
-
-Instrucciones:
-1. Si la pregunta coincide con una FAQ: Responde con un saludo amigable y luego usa exactamente esa información de forma natural
-2. Si NO coincide: Di honestamente que no tienes esa información en tus FAQs"""
-
-        elif context_type == "faq_and_docs":
-            system_prompt = """Eres el Asistente Virtual de VOAE (Vicerrectoría de Orientación y Asuntos Estudiantiles de la UNAH).
-
-Tu rol es ayudar a los estudiantes con información sobre servicios, trámites y consultas universitarias.
-
-Características de tu personalidad:
-- Eres cercano, amigable y accesible
-- Combinas información de preguntas frecuentes con documentación adicional
-- Das respuestas claras y bien estructuradas
-- Usas el "tú" para crear cercanía con los estudiantes
-- Mantienes un tono profesional pero cálido
-
-RESTRICCIÓN CRÍTICA:
-- Solo puedes usar la información EXACTA proporcionada a continuación (FAQs y documentos)
-- Prioriza las FAQs si responden la pregunta
-- Si la información no está disponible, di: "No tengo información específica sobre eso. Te recomiendo contactar directamente a VOAE (https://voae.unah.edu.hn) para ayudarte mejor."
-- NO inventes información ni uses conocimiento externo
-
-Estilo de respuesta:
-- Responde de forma natural, integrando la información disponible
-- NUNCA menciones "según el contexto", "basándome en", "la información proporcionada", o frases similares
-- Sé claro y organizado en respuestas con múltiples pasos
-"""
-
-            user_prompt = f"""Información oficial de VOAE (FAQs primero, luego documentos):
-
-{context}
-
-Pregunta del estudiante:
-{query}
-
-Instrucciones:
-1. Verifica que la respuesta esté en la información anterior
-2. Prioriza información de las FAQs si está disponible
-3. Responde de forma natural integrando la información relevante
-4. Si NO encuentras la respuesta: Di honestamente que no tienes esa información"""
-
-        else:  # docs_only (flujo original)
-            system_prompt = """Eres el Asistente Virtual de VOAE (Vicerrectoría de Orientación y Asuntos Estudiantiles de la UNAH).
-
-Tu rol es ayudar a los estudiantes con información sobre servicios, trámites y programas universitarios.
-
-Características de tu personalidad:
-- Eres cercano, amigable y accesible
-- Das explicaciones claras y bien organizadas
-- Usas el "tú" para crear cercanía con los estudiantes
-- Mantienes un tono profesional pero cálido
-- Eres honesto cuando no tienes información
-
-RESTRICCIÓN CRÍTICA:
-- Puedes responder SOLAMENTE usando la información exacta que aparece a continuación
-- Si la respuesta NO está en la información proporcionada, debes decir: "No tengo información específica sobre eso. Te recomiendo contactar directamente a VOAE (https://voae.unah.edu.hn) o llamar a su oficina para que puedan ayudarte mejor."
-- NO uses conocimiento general, NO inventes, NO supongas
-- Verifica que cada dato en tu respuesta esté explícitamente en la información
-
-Estilo de respuesta:
-- Responde de forma natural, como si conocieras esta información de tu trabajo en VOAE
-- NUNCA menciones "según el contexto", "basándome en", "la información proporcionada", o frases similares
-- Estructura tus respuestas con claridad cuando sea necesario (pasos numerados, listas, etc.)
-"""
-
-            user_prompt = f"""Información oficial de VOAE que conoces:
+        answer = "".join(self.stream_response(
+            query, context_documents, temperature, max_tokens, context_type, deadline
+        ))
+        if not answer:
+            raise Exception("Respuesta de la API no tiene el formato esperado")
+        return answer.strip()
+
+    def stream_response(
+        self,
+        query: str,
+        context_documents: List[str],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        context_type: str = "docs_only",
+        deadline: Optional[Deadline] = None,
+        usage: Optional[Dict] = None
+    ) -> Iterator[str]:
+        """
+        Genera una respuesta token a token (streaming SSE)
 
-{context}
+        El deadline se verifica entre fragmentos: si expira o se cancela, se
+        cierra la conexión y el proveedor deja de generar.
 
-Pregunta del estudiante:
-{query}
+        Args:
+            query: Pregunta del usuario
+            context_documents: Lista de documentos relevantes como contexto
+            temperature: Temperatura para la generación (0-1)
+            max_tokens: Máximo de tokens en la respuesta
+            context_type: Tipo de contexto - 'faq_only', 'faq_and_docs', 'docs_only'
+            deadline: Deadline de la petición (None = timeout de APIConfig)
+            usage: Diccionario que se completa con el uso de tokens de esta
+                llamada (los contadores del cliente son compartidos entre peticiones)
 
-Instrucciones:
-1. Verifica que la respuesta esté en la información anterior
-2. Si SÍ está: Responde de forma natural y amigable
-3. Si NO está: Di honestamente que no tienes esa información y recomienda contactar a VOAE directamente"""
+        Returns:
+            Iterador de fragmentos de texto
+        """
+        # Prompt con prefijo estable (sistema) y partes variables al final
+        messages = self.prompts.build_messages(query, context_documents, context_type)
 
         # Preparar el payload
         payload = {
             "model": self.model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            "messages": messages,
             "temperature": temperature,
-            "max_tokens": max_tokens
+            "max_tokens": max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True}
         }
 
+        timeout = APIConfig.REQUEST_TIMEOUT
+        if deadline is not None:
+            timeout = deadline.timeout_for("llm", cap=APIConfig.REQUEST_TIMEOUT)
+
         try:
-            response = requests.post(
+            with span("llm", provider="deepseek", model=self.model, context_type=context_type), self.session.post(
                 self.api_url,
-                headers=self.headers,
                 json=payload,
-                timeout=30
-            )
-
-            response.raise_for_status()
-            result = response.json()
-
-            if 'choices' in result and len(result['choices']) > 0:
-                answer = result['choices'][0]['message']['content']
-                return answer.strip()
-            else:
-                raise Exception("Respuesta de la API no tiene el formato esperado")
+                timeout=timeout,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+
+                for line in response.iter_lines(decode_unicode=True):
+                    if deadline is not None:
+                        deadline.check("llm")
+                    if not line or not line.startswith("data:"):
+                        continue
+
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+
+                    chunk = json.loads(data)
+                    if chunk.get('usage'):
+                        recorded = self._record_usage(chunk['usage'])
+                        if usage is not None:
+                            usage.update(recorded)
+                    for choice in chunk.get('choices', []):
+                        content = choice.get('delta', {}).get('content')
+                        if content:
+                            yield content
 
         except requests.exceptions.RequestException as e:
             raise Exception(f"Error al llamar a la API de DeepSeek: {str(e)}")
@@ -193,7 +204,8 @@ Instrucciones:
         self,
         message: str,
         temperature: float = 0.7,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        deadline: Optional[Deadline] = None
     ) -> str:
         """
         Chat simple sin contexto RAG
@@ -202,6 +214,7 @@ Instrucciones:
             message: Mensaje del usuario
             temperature: Temperatura para la generación
             max_tokens: Máximo de tokens
+            deadline: Deadline de la petición (None = timeout de APIConfig)
 
         Returns:
             Respuesta de DeepSeek
@@ -215,18 +228,22 @@ Instrucciones:
             "max_tokens": max_tokens
         }
 
+        timeout = APIConfig.REQUEST_TIMEOUT
+        if deadline is not None:
+            timeout = deadline.timeout_for("llm", cap=APIConfig.REQUEST_TIMEOUT)
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
-                headers=self.headers,
                 json=payload,
-                timeout=30
+                timeout=timeout
             )
 
             response.raise_for_status()
             result = response.json()
 
             if 'choices' in result and len(result['choices']) > 0:
+                self._record_usage(result.get('usage'))
                 return result['choices'][0]['message']['content'].strip()
             else:
                 raise Exception("Respuesta de la API no tiene el formato esperado")
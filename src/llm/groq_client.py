@@ -1,16 +1,25 @@
 """
 Módulo para interactuar con la API de Groq (ultra-rápida)
 """
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import os
 from dotenv import load_dotenv
-from typing import List
+from typing import Iterator, List, Dict, Optional
 from groq import Groq
+from llm.prompts import PromptTemplates, get_prompt_templates
+from llm.usage import UsageTracker
+from config import APIConfig
+from deadline import Deadline
+from observability.tracing import set_span_attributes, span
 
 
 class GroqClient:
     """Cliente para la API de Groq con modelos ultra-rápidos"""
 
-    def __init__(self, model: str = "llama-3.3-70b-versatile"):
+    def __init__(self, model: str = "llama-3.3-70b-versatile", prompts: PromptTemplates = None):
         """
         Inicializa el cliente de Groq
 
@@ -19,6 +28,7 @@ class GroqClient:
                 - "llama-3.3-70b-versatile": Llama 3.3 70B (mejor calidad, recomendado)
                 - "llama-3.1-8b-instant": Llama 3.1 8B (más rápido)
                 - "llama-3.2-90b-text-preview": Llama 3.2 90B (experimental)
+            prompts: Plantillas precompiladas (None = usar las compartidas del proceso)
         """
         load_dotenv()
 
@@ -26,8 +36,57 @@ class GroqClient:
         if not self.api_key:
             raise ValueError("GROQ_API_KEY no está configurada en .env")
 
-        self.client = Groq(api_key=self.api_key)
+        self.client = Groq(api_key=self.api_key, timeout=APIConfig.REQUEST_TIMEOUT)
         self.model = model
+        self.prompts = prompts or get_prompt_templates()
+        self.usage = UsageTracker()
+
+    def _record_usage(self, usage):
+        """
+        Registra el uso de tokens reportado por Groq
+
+        Groq sigue el formato de OpenAI: los tokens servidos desde la caché
+        de prefijos vienen en 'prompt_tokens_details.cached_tokens'.
+
+        Args:
+            usage: Objeto 'usage' de la respuesta (puede faltar)
+
+        Returns:
+            Uso registrado de la llamada (None si el proveedor no lo reportó)
+        """
+        if usage is None:
+            return None
+        details = getattr(usage, 'prompt_tokens_details', None)
+        recorded = self.usage.record(
+            prompt_tokens=getattr(usage, 'prompt_tokens', 0),
+            completion_tokens=getattr(usage, 'completion_tokens', 0),
+            cached_prompt_tokens=getattr(details, 'cached_tokens', 0) if details else 0
+        )
+        set_span_attributes(**recorded)
+        return recorded
+
+    def warm_up(self) -> bool:
+        """
+        Abre la conexión con la API (TLS incluido) sin generar tokens
+
+        Returns:
+            True si la API respondió
+        """
+        try:
+            self.client.models.list(timeout=5)
+            return True
+        except Exception as e:
+            print(f"⚠️  No se pudo pre-conectar con Groq: {str(e)}")
+            return False
+
+    def get_usage_stats(self) -> Dict:
+        """
+        Obtiene el uso acumulado de tokens y de caché de prefijos
+
+        Returns:
+            Diccionario con totales de tokens
+        """
+        return self.usage.get_stats()
 
     def generate_response(
         self,
@@ -35,7 +94,8 @@ class GroqClient:
         context_documents: List[str],
         temperature: float = 0.3,
         max_tokens: int = 850,
-        context_type: str = "docs_only"
+        context_type: str = "docs_only",
+        deadline: Optional[Deadline] = None
     ) -> str:
         """
         Genera una respuesta usando el contexto RAG
@@ -46,143 +106,89 @@ class GroqClient:
             temperature: Temperatura para la generación (0-1)
             max_tokens: Máximo de tokens en la respuesta
             context_type: Tipo de contexto - 'faq_only', 'faq_and_docs', 'docs_only'
+            deadline: Deadline de la petición (None = timeout de APIConfig)
 
         Returns:
             Respuesta generada por Groq
         """
-        # Construir el prompt RAG
-        context = "\n\n---\n\n".join(context_documents)
-
-        # Seleccionar prompt según tipo de contexto
-        if context_type == "faq_only":
-            system_prompt = """Eres el Asistente Virtual de VOAE (Vicerrectoría de Orientación y Asuntos Estudiantiles de la UNAH).
-
-Tu rol es ayudar a los estudiantes con sus preguntas frecuentes de forma amigable y profesional.
-
-Características de tu personalidad:
-- Eres cercano, amigable y accesible
-- Hablas con confianza y claridad
-- Das respuestas directas y útiles
-- Usas el "tú" para crear cercanía con los estudiantes
-- Mantienes un tono profesional pero cálido
-
-RESTRICCIÓN CRÍTICA:
-- Solo puedes usar la información EXACTA de las FAQs proporcionadas
-- Si la pregunta no coincide con ninguna FAQ, di: "No tengo información específica sobre eso en mis preguntas frecuentes. Te recomiendo contactar directamente a VOAE (https://voae.unah.edu.hn) para ayudarte mejor."
-- NO inventes información ni uses conocimiento externo
-
-Estilo de respuesta:
-- Inicia con un saludo breve y amigable ("¡Hola!", "Claro, te ayudo", etc.)
-- Responde de forma natural, como si conocieras esta información de memoria
-- NUNCA menciones "según el contexto", "basándome en", "en las FAQs", o frases similares
-- Sé conciso pero completo y cálido
-"""
-
-            user_prompt = f"""Preguntas frecuentes oficiales de VOAE:
-
-{context}
-
-Pregunta del estudiante:
-{query}
-
-Instrucciones:
-1. Si la pregunta coincide con una FAQ: Responde con un saludo amigable y luego usa exactamente esa información de forma natural
-2. Si NO coincide: Di honestamente que no tienes esa información en tus FAQs"""
-
-        elif context_type == "faq_and_docs":
-            system_prompt = """Eres el Asistente Virtual de VOAE (Vicerrectoría de Orientación y Asuntos Estudiantiles de la UNAH).
-
-Tu rol es ayudar a los estudiantes con información sobre servicios, trámites y consultas universitarias.
-
-Características de tu personalidad:
-- Eres cercano, amigable y accesible
-- Combinas información de preguntas frecuentes con documentación adicional
-- Das respuestas claras y bien estructuradas
-- Usas el "tú" para crear cercanía con los estudiantes
-- Mantienes un tono profesional pero cálido
-
-RESTRICCIÓN CRÍTICA:
-- Solo puedes usar la información EXACTA proporcionada a continuación (FAQs y documentos)
-- Prioriza las FAQs si responden la pregunta
-- Si la información no está disponible, di: "No tengo información específica sobre eso. Te recomiendo contactar directamente a VOAE (https://voae.unah.edu.hn) para ayudarte mejor."
-- NO inventes información ni uses conocimiento externo
-
-Estilo de respuesta:
-- Responde de forma natural, integrando la información disponible
-- NUNCA menciones "según el contexto", "basándome en", "la información proporcionada", o frases similares
-- Sé claro y organizado en respuestas con múltiples pasos
-"""
-
-            user_prompt = f"""Información oficial de VOAE (FAQs primero, luego documentos):
-
-{context}
-
-Pregunta del estudiante:
-{query}
-
-Instrucciones:
-1. Verifica que la respuesta esté en la información anterior
-2. Prioriza información de las FAQs si está disponible
-3. Responde de forma natural integrando la información relevante
-4. Si NO encuentras la respuesta: Di honestamente que no tienes esa información"""
+        answer = "".join(self.stream_response(
+            query, context_documents, temperature, max_tokens, context_type, deadline
+        ))
+        return answer.strip()
 
-        else:  # docs_only (flujo original)
-            system_prompt = """Eres el Asistente Virtual de VOAE (Vicerrectoría de Orientación y Asuntos Estudiantiles de la UNAH).
-
-Tu rol es ayudar a los estudiantes con información sobre servicios, trámites y programas universitarios.
-
-Características de tu personalidad:
-- Eres cercano, amigable y accesible
-- Das explicaciones claras y bien organizadas
-- Usas el "tú" para crear cercanía con los estudiantes
-- Mantienes un tono profesional pero cálido
-- Eres honesto cuando no tienes información
-
-RESTRICCIÓN CRÍTICA:
-- Puedes responder SOLAMENTE usando la información exacta que aparece a continuación
-- Si la respuesta NO está en la información proporcionada, debes decir: "No tengo información específica sobre eso. Te recomiendo contactar directamente a VOAE (https://voae.unah.edu.hn) o llamar a su oficina para que puedan ayudarte mejor."
-- NO uses conocimiento general, NO inventes, NO supongas
-- Verifica que cada dato en tu respuesta esté explícitamente en la información
-
-Estilo de respuesta:
-- Responde de forma natural, como si conocieras esta información de tu trabajo en VOAE
-- NUNCA menciones "según el contexto", "basándome en", "la información proporcionada", o frases similares
-- Estructura tus respuestas con claridad cuando sea necesario (pasos numerados, listas, etc.)
-"""
-
-            user_prompt = f"""Información oficial de VOAE que conoces:
-
-{context}
-
-Pregunta del estudiante:
-{query}
-
-Instrucciones:
-1. Verifica que la respuesta esté en la información anterior
-2. Si SÍ está: Responde de forma natural y amigable
-3. Si NO está: Di honestamente que no tienes esa información y recomienda contactar a VOAE directamente"""
+    def stream_response(
+        self,
+        query: str,
+        context_documents: List[str],
+        temperature: float = 0.3,
+        max_tokens: int = 850,
+        context_type: str = "docs_only",
+        deadline: Optional[Deadline] = None,
+        usage: Optional[Dict] = None
+    ) -> Iterator[str]:
+        """
+        Genera una respuesta token a token (streaming)
 
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                model=self.model,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+        El deadline se verifica entre fragmentos: si expira o se cancela, se
+        cierra el stream y el proveedor deja de generar.
 
-            return chat_completion.choices[0].message.content.strip()
+        Args:
+            query: Pregunta del usuario
+            context_documents: Lista de documentos relevantes como contexto
+            temperature: Temperatura para la generación (0-1)
+            max_tokens: Máximo de tokens en la respuesta
+            context_type: Tipo de contexto - 'faq_only', 'faq_and_docs', 'docs_only'
+            deadline: Deadline de la petición (None = timeout de APIConfig)
+            usage: Diccionario que se completa con el uso de tokens de esta
+                llamada (los contadores del cliente son compartidos entre peticiones)
 
-        except Exception as e:
-            raise Exception(f"Error al llamar a la API de Groq: {str(e)}")
+        Returns:
+            Iterador de fragmentos de texto
+        """
+        # Prompt con prefijo estable (sistema) y partes variables al final
+        messages = self.prompts.build_messages(query, context_documents, context_type)
+
+        timeout = APIConfig.REQUEST_TIMEOUT
+        if deadline is not None:
+            timeout = deadline.timeout_for("llm", cap=APIConfig.REQUEST_TIMEOUT)
+
+        with span("llm", provider="groq", model=self.model, context_type=context_type):
+            try:
+                stream = self.client.chat.completions.create(
+                    messages=messages,
+                    model=self.model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    timeout=timeout
+                )
+            except Exception as e:
+                raise Exception(f"Error al llamar a la API de Groq: {str(e)}")
+
+            try:
+                for chunk in stream:
+                    if deadline is not None:
+                        deadline.check("llm")
+
+                    # Groq envía el uso en el último fragmento (x_groq.usage)
+                    x_groq = getattr(chunk, 'x_groq', None)
+                    chunk_usage = getattr(chunk, 'usage', None) or getattr(x_groq, 'usage', None)
+                    if chunk_usage is not None:
+                        recorded = self._record_usage(chunk_usage)
+                        if usage is not None:
+                            usage.update(recorded)
+
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                stream.close()
 
     def simple_chat(
         self,
         message: str,
         temperature: float = 0.3,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        deadline: Optional[Deadline] = None
     ) -> str:
         """
         Chat simple sin contexto RAG
@@ -191,10 +197,15 @@ Instrucciones:
             message: Mensaje del usuario
             temperature: Temperatura para la generación
             max_tokens: Máximo de tokens
+            deadline: Deadline de la petición (None = timeout de APIConfig)
 
         Returns:
             Respuesta de Groq
         """
+        timeout = APIConfig.REQUEST_TIMEOUT
+        if deadline is not None:
+            timeout = deadline.timeout_for("llm", cap=APIConfig.REQUEST_TIMEOUT)
+
         try:
             chat_completion = self.client.chat.completions.create(
                 messages=[
@@ -202,9 +213,11 @@ Instrucciones:
                 ],
                 model=self.model,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                timeout=timeout
             )
 
+            self._record_usage(chat_completion.usage)
             return chat_completion.choices[0].message.content.strip()
 
         except Exception as e:
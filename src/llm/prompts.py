@@ -0,0 +1,220 @@
+"""
+Plantillas de prompts compartidas por los clientes LLM
+
+Los prompts se compilan una sola vez al iniciar el proceso. Todo lo estático
+(persona, restricciones, instrucciones y, en modo 'faq_only', el corpus de FAQs)
+va en el mensaje de sistema, y las partes variables (contexto recuperado y
+pregunta) van al final del mensaje de usuario. Así el prefijo de cada request es
+idéntico byte a byte y los proveedores pueden reutilizar su caché de prefijos.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import re
+from typing import List, Dict, Optional
+from config import LLMConfig, IngestionConfig
+
+
+PERSONA = """Eres el Asistente Virtual de VOAE (Vicerrectoría de Orientación y Asuntos Estudiantiles de la UNAH)."""
+
+SYSTEM_BODIES = {
+    "faq_only": """Tu rol es ayudar a los estudiantes con sus preguntas frecuentes de forma amigable y profesional.
+
+Características de tu personalidad:
+- Eres cercano, amigable y accesible
+- Hablas con confianza y claridad
+- Das respuestas directas y útiles
+- Usas el "tú" para crear cercanía con los estudiantes
+- Mantienes un tono profesional pero cálido
+
+RESTRICCIÓN CRÍTICA:
+- Solo puedes usar la información EXACTA de las FAQs proporcionadas
+- Si la pregunta no coincide con ninguna FAQ, di: "No tengo información específica sobre eso en mis preguntas frecuentes. Te recomiendo contactar directamente a VOAE (https://voae.unah.edu.hn) para ayudarte mejor."
+- NO inventes información ni uses conocimiento externo
+
+Estilo de respuesta:
+- Inicia con un saludo breve y amigable ("¡Hola!", "Claro, te ayudo", etc.)
+- Responde de forma natural, como si conocieras esta información de memoria
+- NUNCA menciones "según el contexto", "basándome en", "en las FAQs", o frases similares
+- Sé conciso pero completo y cálido
+
+Instrucciones:
+1. Si la pregunta coincide con una FAQ: Responde con un saludo amigable y luego usa exactamente esa información de forma natural
+2. Si NO coincide: Di honestamente que no tienes esa información en tus FAQs""",
+
+    "faq_and_docs": """Tu rol es ayudar a los estudiantes con información sobre servicios, trámites y consultas universitarias.
+
+Características de tu personalidad:
+- Eres cercano, amigable y accesible
+- Combinas información de preguntas frecuentes con documentación adicional
+- Das respuestas claras y bien estructuradas
+- Usas el "tú" para crear cercanía con los estudiantes
+- Mantienes un tono profesional pero cálido
+
+RESTRICCIÓN CRÍTICA:
+- Solo puedes usar la información EXACTA proporcionada en el mensaje del estudiante (FAQs y documentos)
+- Prioriza las FAQs si responden la pregunta
+- Si la información no está disponible, di: "No tengo información específica sobre eso. Te recomiendo contactar directamente a VOAE (https://voae.unah.edu.hn) para ayudarte mejor."
+- NO inventes información ni uses conocimiento externo
+
+Estilo de respuesta:
+- Responde de forma natural, integrando la información disponible
+- NUNCA menciones "según el contexto", "basándome en", "la información proporcionada", o frases similares
+- Sé claro y organizado en respuestas con múltiples pasos
+
+Instrucciones:
+1. Verifica que la respuesta esté en la información oficial proporcionada
+2. Prioriza información de las FAQs si está disponible
+3. Responde de forma natural integrando la información relevante
+4. Si NO encuentras la respuesta: Di honestamente que no tienes esa información""",
+
+    "docs_only": """Tu rol es ayudar a los estudiantes con información sobre servicios, trámites y programas universitarios.
+
+Características de tu personalidad:
+- Eres cercano, amigable y accesible
+- Das explicaciones claras y bien organizadas
+- Usas el "tú" para crear cercanía con los estudiantes
+- Mantienes un tono profesional pero cálido
+- Eres honesto cuando no tienes información
+
+RESTRICCIÓN CRÍTICA:
+- Puedes responder SOLAMENTE usando la información oficial que aparece en el mensaje del estudiante
+- Si la respuesta NO está en la información proporcionada, debes decir: "No tengo información específica sobre eso. Te recomiendo contactar directamente a VOAE (https://voae.unah.edu.hn) o llamar a su oficina para que puedan ayudarte mejor."
+- NO uses conocimiento general, NO inventes, NO supongas
+- Verifica que cada dato en tu respuesta esté explícitamente en la información
+
+Estilo de respuesta:
+- Responde de forma natural, como si conocieras esta información de tu trabajo en VOAE
+- NUNCA menciones "según el contexto", "basándome en", "la información proporcionada", o frases similares
+- Estructura tus respuestas con claridad cuando sea necesario (pasos numerados, listas, etc.)
+
+Instrucciones:
+1. Verifica que la respuesta esté en la información oficial proporcionada
+2. Si SÍ está: Responde de forma natural y amigable
+3. Si NO está: Di honestamente que no tienes esa información y recomienda contactar a VOAE directamente""",
+}
+
+CONTEXT_HEADERS = {
+    "faq_only": "Preguntas frecuentes oficiales de VOAE:",
+    "faq_and_docs": "Información oficial de VOAE (FAQs primero, luego documentos):",
+    "docs_only": "Información oficial de VOAE que conoces:",
+}
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+
+def load_faq_corpus(faq_folder: str = None) -> str:
+    """
+    Carga el corpus completo de FAQs en un orden estable
+
+    Args:
+        faq_folder: Carpeta con los archivos de FAQs (None = usar config)
+
+    Returns:
+        Texto de todas las FAQs concatenadas ('' si no hay archivos)
+    """
+    folder = Path(faq_folder or IngestionConfig.FAQ_FOLDER)
+    if not folder.exists():
+        return ""
+
+    # Orden determinista para que el prefijo sea idéntico entre procesos
+    files = sorted(
+        p for p in folder.rglob("*")
+        if p.is_file() and p.suffix.lower() in IngestionConfig.ALLOWED_EXTENSIONS
+    )
+
+    parts = []
+    for file_path in files:
+        text = file_path.read_text(encoding="utf-8")
+        text = re.sub(r'[ \t]+\n', '\n', text)
+        text = re.sub(r'\n{3,}', '\n\n', text)
+        parts.append(text.strip())
+
+    return CONTEXT_SEPARATOR.join(parts)
+
+
+class PromptTemplates:
+    """
+    Prompts precompilados con prefijo estable para caché de prefijos del proveedor
+
+    Orden de los mensajes:
+    1. system: persona + reglas + instrucciones (+ corpus FAQ en 'faq_only')
+    2. user: encabezado fijo + contexto recuperado + pregunta
+    """
+
+    def __init__(self, faq_corpus: Optional[str] = None):
+        """
+        Compila los prompts de sistema
+
+        Args:
+            faq_corpus: Corpus de FAQs a incluir en el prefijo de 'faq_only'
+                        (None o '' = usar las FAQs recuperadas como contexto)
+        """
+        self.faq_corpus = faq_corpus or ""
+        self.system_prompts = {
+            context_type: f"{PERSONA}\n\n{body}\n"
+            for context_type, body in SYSTEM_BODIES.items()
+        }
+
+        if self.faq_corpus:
+            self.system_prompts["faq_only"] += (
+                f"\n{CONTEXT_HEADERS['faq_only']}\n\n{self.faq_corpus}\n"
+            )
+
+    def build_messages(
+        self,
+        query: str,
+        context_documents: List[str],
+        context_type: str = "docs_only"
+    ) -> List[Dict[str, str]]:
+        """
+        Construye los mensajes para la API de chat
+
+        Args:
+            query: Pregunta del usuario
+            context_documents: Documentos recuperados como contexto
+            context_type: 'faq_only', 'faq_and_docs', 'docs_only'
+
+        Returns:
+            Lista de mensajes [system, user]
+        """
+        if context_type not in self.system_prompts:
+            context_type = "docs_only"
+
+        question_block = f"Pregunta del estudiante:\n{query}"
+
+        if context_type == "faq_only" and self.faq_corpus:
+            # El corpus ya está en el prefijo: solo viaja la pregunta
+            user_prompt = question_block
+        else:
+            context = CONTEXT_SEPARATOR.join(context_documents)
+            user_prompt = f"{CONTEXT_HEADERS[context_type]}\n\n{context}\n\n{question_block}"
+
+        return [
+            {"role": "system", "content": self.system_prompts[context_type]},
+            {"role": "user", "content": user_prompt}
+        ]
+
+
+_prompt_templates = None
+
+
+def get_prompt_templates() -> PromptTemplates:
+    """
+    Retorna las plantillas compiladas del proceso (se crean una sola vez)
+
+    Returns:
+        Instancia compartida de PromptTemplates
+    """
+    global _prompt_templates
+    if _prompt_templates is None:
+        faq_corpus = ""
+        if LLMConfig.PROMPT_FAQ_CORPUS_IN_PREFIX:
+            faq_corpus = load_faq_corpus()
+            if len(faq_corpus) > LLMConfig.PROMPT_FAQ_CORPUS_MAX_CHARS:
+                print(f"⚠️  Corpus FAQ demasiado grande ({len(faq_corpus)} chars), "
+                      f"se usarán las FAQs recuperadas como contexto")
+                faq_corpus = ""
+        _prompt_templates = PromptTemplates(faq_corpus=faq_corpus)
+    return _prompt_templates
@@ -0,0 +1,267 @@
+"""
+Proveedor LLM de prueba: respuestas deterministas sin red ni API keys
+
+Se selecciona con llm_provider="stub". Arma el mismo prompt que los
+proveedores reales (para medir su costo) y simula su comportamiento según
+StubLLMConfig: tiempo al primer token, tokens por segundo, longitud de la
+respuesta y errores inyectados (antes del primer token, a mitad del stream o
+por timeout). Así el resto del pipeline (embeddings, búsqueda, cachés, API,
+streaming) se mide y se prueba sin la variación de latencia del proveedor.
+
+Todo es determinista: la respuesta depende solo de la pregunta y el
+contexto, y la latencia y los errores de cada llamada salen de un generador
+sembrado con (STUB_LLM_SEED, pregunta, número de intento de esa pregunta),
+así una corrida se repite igual sin importar el orden de las peticiones.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Iterator, List, Dict, Optional
+from llm.prompts import PromptTemplates, get_prompt_templates
+from llm.usage import UsageTracker
+from config import APIConfig, StubLLMConfig
+from deadline import Deadline
+from observability.tracing import set_span_attributes, span
+
+# Relleno para alcanzar la longitud pedida cuando el contexto es corto
+_FILLER = (
+    "Para más información puedes acercarte a las oficinas de la VOAE en horario "
+    "de atención o escribir al correo institucional de la dependencia."
+).split()
+
+# Preguntas distintas cuyo número de intento se recuerda (las menos recientes se olvidan)
+_MAX_TRACKED_QUERIES = 10000
+
+
+class StubLLMClient:
+    """Cliente LLM falso y determinista (misma interfaz que DeepSeekClient)"""
+
+    def __init__(
+        self,
+        prompts: PromptTemplates = None,
+        ttft_ms: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        output_tokens: Optional[int] = None,
+        error_rate: Optional[float] = None,
+        error_kind: Optional[str] = None,
+        jitter: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Inicializa el cliente de prueba (None = valor de StubLLMConfig)
+
+        Args:
+            prompts: Plantillas precompiladas (None = usar las compartidas del proceso)
+            ttft_ms: Milisegundos hasta el primer token
+            tokens_per_second: Velocidad de generación (0 = sin espera)
+            output_tokens: Palabras de la respuesta
+            error_rate: Fracción de llamadas que fallan (0-1)
+            error_kind: "error", "midstream" o "timeout"
+            jitter: Variación ± de las latencias (0-1)
+            seed: Semilla de latencias y errores
+        """
+        self.model = "stub"
+        self.prompts = prompts or get_prompt_templates()
+        self.usage = UsageTracker()
+
+        self.ttft = (StubLLMConfig.TTFT_MS if ttft_ms is None else ttft_ms) / 1000
+        self.tokens_per_second = StubLLMConfig.TOKENS_PER_SECOND if tokens_per_second is None else tokens_per_second
+        self.output_tokens = StubLLMConfig.OUTPUT_TOKENS if output_tokens is None else output_tokens
+        self.error_rate = StubLLMConfig.ERROR_RATE if error_rate is None else error_rate
+        self.error_kind = (error_kind or StubLLMConfig.ERROR_KIND).lower()
+        self.jitter = StubLLMConfig.JITTER if jitter is None else jitter
+        self.seed = StubLLMConfig.SEED if seed is None else seed
+
+        if self.error_kind not in ("error", "midstream", "timeout"):
+            raise ValueError(f"STUB_LLM_ERROR_KIND no soportado: {self.error_kind}")
+
+        self._attempts = OrderedDict()  # LRU: {pregunta: intentos}
+        self._lock = threading.Lock()
+
+    def warm_up(self) -> bool:
+        """No hay conexión que abrir"""
+        return True
+
+    def get_usage_stats(self) -> Dict:
+        """
+        Obtiene el uso acumulado de tokens (palabras del prompt y de la respuesta)
+
+        Returns:
+            Diccionario con totales de tokens
+        """
+        return self.usage.get_stats()
+
+    def _rng(self, query: str) -> random.Random:
+        """
+        Generador de la llamada: depende de la pregunta y de cuántas veces se ha hecho
+
+        Solo se recuerdan las _MAX_TRACKED_QUERIES preguntas más recientes (con
+        mensajes únicos, p. ej. --bust-cache, el contador crecería sin límite);
+        una pregunta olvidada vuelve a empezar en el intento 0.
+        """
+        with self._lock:
+            attempt = self._attempts.pop(query, 0)
+            self._attempts[query] = attempt + 1
+            if len(self._attempts) > _MAX_TRACKED_QUERIES:
+                self._attempts.popitem(last=False)
+        return random.Random(zlib.crc32(f"{self.seed}:{attempt}:{query}".encode('utf-8')))
+
+    def _vary(self, seconds: float, rng: random.Random) -> float:
+        """Aplica la variación configurada a una latencia"""
+        if self.jitter <= 0:
+            return seconds
+        return max(0.0, seconds * (1 + rng.uniform(-self.jitter, self.jitter)))
+
+    def _compose(self, query: str, context_documents: List[str], length: int) -> List[str]:
+        """
+        Respuesta determinista: misma pregunta y contexto, mismo texto
+
+        Returns:
+            Lista de palabras (length como máximo)
+        """
+        seed = zlib.crc32(query.encode('utf-8'))
+        words = f"Respuesta de prueba #{seed % 10000:04d} para: {query.strip()}".split()
+        source = [word for document in context_documents for word in document.split()] or _FILLER
+        i = 0
+        while len(words) < length:
+            words.append(source[i % len(source)])
+            i += 1
+        return words[:length]
+
+    @staticmethod
+    def _sleep_until(when: float, deadline: Optional[Deadline]):
+        """Espera hasta when (perf_counter), cortando si vence el deadline"""
+        while True:
+            remaining = when - time.perf_counter()
+            if deadline is not None:
+                deadline.check("llm")
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 0.05))
+
+    def generate_response(
+        self,
+        query: str,
+        context_documents: List[str],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        context_type: str = "docs_only",
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        Genera una respuesta usando el contexto RAG
+
+        Args:
+            query: Pregunta del usuario
+            context_documents: Lista de documentos relevantes como contexto
+            temperature: Ignorada (la salida es determinista)
+            max_tokens: Máximo de tokens (palabras) en la respuesta
+            context_type: Tipo de contexto - 'faq_only', 'faq_and_docs', 'docs_only'
+            deadline: Deadline de la petición
+
+        Returns:
+            Respuesta generada
+        """
+        return "".join(self.stream_response(
+            query, context_documents, temperature, max_tokens, context_type, deadline
+        )).strip()
+
+    def stream_response(
+        self,
+        query: str,
+        context_documents: List[str],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        context_type: str = "docs_only",
+        deadline: Optional[Deadline] = None,
+        usage: Optional[Dict] = None
+    ) -> Iterator[str]:
+        """
+        Genera una respuesta palabra a palabra al ritmo configurado
+
+        Los tokens siguen un calendario fijo desde el inicio (primer token a
+        ttft, luego uno cada 1/tokens_per_second), así el tiempo total no se
+        desvía con el costo de cada iteración.
+
+        Args:
+            query: Pregunta del usuario
+            context_documents: Lista de documentos relevantes como contexto
+            temperature: Ignorada (la salida es determinista)
+            max_tokens: Máximo de tokens (palabras) en la respuesta
+            context_type: Tipo de contexto - 'faq_only', 'faq_and_docs', 'docs_only'
+            deadline: Deadline de la petición
+            usage: Diccionario que se completa con el uso de tokens de esta llamada
+
+        Returns:
+            Iterador de fragmentos de texto
+
+        Raises:
+            Exception: Error inyectado (STUB_LLM_ERROR_RATE)
+            DeadlineExceeded: Si vence el deadline durante la espera
+        """
+        messages = self.prompts.build_messages(query, context_documents, context_type)
+        prompt_tokens = sum(len(message["content"].split()) for message in messages)
+        words = self._compose(query, context_documents, min(self.output_tokens, max_tokens))
+
+        rng = self._rng(query)
+        ttft = self._vary(self.ttft, rng)
+        interval = self._vary(1 / self.tokens_per_second, rng) if self.tokens_per_second > 0 else 0.0
+        fail = rng.random() < self.error_rate
+
+        with span("llm", provider="stub", model=self.model, context_type=context_type):
+            start = time.perf_counter()
+
+            if fail and self.error_kind == "timeout":
+                timeout = APIConfig.REQUEST_TIMEOUT
+                if deadline is not None:
+                    timeout = deadline.timeout_for("llm", cap=APIConfig.REQUEST_TIMEOUT)
+                self._sleep_until(start + timeout, deadline)
+                raise Exception(f"Error al llamar al proveedor stub: timeout tras {timeout:.1f}s (inyectado)")
+
+            self._sleep_until(start + ttft, deadline)
+            if fail and self.error_kind == "error":
+                raise Exception("Error al llamar al proveedor stub: 500 (inyectado)")
+
+            fail_at = len(words) // 2 if fail else None
+            for i, word in enumerate(words):
+                if i == fail_at:
+                    raise Exception(f"Error al llamar al proveedor stub: stream cortado en el token {i} (inyectado)")
+                if i > 0:
+                    self._sleep_until(start + ttft + i * interval, deadline)
+                yield word if i == 0 else " " + word
+
+            recorded = self.usage.record(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=len(words),
+                cached_prompt_tokens=0
+            )
+            set_span_attributes(**recorded)
+            if usage is not None:
+                usage.update(recorded)
+
+    def simple_chat(
+        self,
+        message: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        Chat simple sin contexto RAG
+
+        Args:
+            message: Mensaje del usuario
+            temperature: Ignorada
+            max_tokens: Máximo de tokens (palabras)
+            deadline: Deadline de la petición
+
+        Returns:
+            Respuesta de prueba
+        """
+        return "".join(self.stream_response(message, [], max_tokens=max_tokens, deadline=deadline)).strip()
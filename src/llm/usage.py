@@ -0,0 +1,65 @@
+"""
+Contabilidad de tokens y aciertos de caché de prefijos por cliente LLM
+"""
+import threading
+from typing import Dict, Optional
+
+
+class UsageTracker:
+    """Acumula el uso de tokens reportado por el proveedor"""
+
+    def __init__(self):
+        """Inicializa los contadores en cero"""
+        self._lock = threading.Lock()
+        self.totals = {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_prompt_tokens": 0,
+        }
+
+    def record(
+        self,
+        prompt_tokens: Optional[int],
+        completion_tokens: Optional[int],
+        cached_prompt_tokens: Optional[int]
+    ) -> Dict:
+        """
+        Registra el uso de una llamada
+
+        Args:
+            prompt_tokens: Tokens de entrada
+            completion_tokens: Tokens generados
+            cached_prompt_tokens: Tokens de entrada servidos desde la caché de prefijos
+
+        Returns:
+            Diccionario con el uso de esta llamada
+        """
+        usage = {
+            "prompt_tokens": int(prompt_tokens or 0),
+            "completion_tokens": int(completion_tokens or 0),
+            "cached_prompt_tokens": int(cached_prompt_tokens or 0),
+        }
+
+        with self._lock:
+            self.totals["requests"] += 1
+            for key, value in usage.items():
+                self.totals[key] += value
+
+        return usage
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene los totales acumulados
+
+        Returns:
+            Diccionario con totales y porcentaje de tokens servidos desde caché
+        """
+        with self._lock:
+            stats = dict(self.totals)
+
+        prompt_tokens = stats["prompt_tokens"]
+        stats["prefix_cache_hit_ratio"] = (
+            stats["cached_prompt_tokens"] / prompt_tokens if prompt_tokens else 0.0
+        )
+        return stats
@@ -2,13 +2,34 @@
 Punto de entrada principal del sistema RAG
 """
 import argparse
+import json
 import sys
+import time
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, List
 
 # Agregar el directorio src al path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from rag.rag_pipeline import RAGPipeline
+from observability.memory import memory_report
+
+# Consultas por defecto de --bench (las de la evaluación de recuperación)
+DEFAULT_QUERY_FILE = Path(__file__).parent.parent / "data" / "eval" / "retrieval_queries.jsonl"
+
+# Etapas del pipeline reportadas por --bench (nombre en la traza, descripción)
+BENCH_STAGES = [
+    ("embed", "Embedding de la consulta"),
+    ("faq_classify", "Clasificación FAQ"),
+    ("doc_search", "Búsqueda de documentos"),
+    ("context_build", "Construcción del prompt"),
+    ("llm_ttft", "LLM (primer token)"),
+    ("llm", "LLM (total)"),
+    ("total", "Total"),
+]
 
 
 def print_banner():
@@ -104,9 +125,155 @@ def query_mode(pipeline: RAGPipeline, args):
                 print(f"\n❌ Error: {str(e)}")
 
 
+def _answer_record(
+    pipeline: RAGPipeline,
+    args,
+    index: int,
+    record: Dict,
+    query_embedding,
+    neighbors,
+    batch_timings: Dict
+) -> Dict:
+    """
+    Responde una consulta del lote (se ejecuta en el pool de hilos)
+
+    Args:
+        pipeline: Pipeline RAG
+        args: Argumentos de línea de comandos
+        index: Posición de la consulta en el archivo de entrada
+        record: Registro de entrada (con "question")
+        query_embedding: Embedding de la pregunta calculado en lote
+        neighbors: Vecinos de la pregunta buscados en lote
+        batch_timings: Costo del embedding y la búsqueda en lote, prorrateado por pregunta (ms)
+
+    Returns:
+        Línea de salida: respuesta, fuentes, tipo de match y tiempos
+    """
+    from observability.tracing import start_trace
+
+    start = time.perf_counter()
+    with start_trace("batch") as trace:
+        try:
+            result = pipeline.query_with_faq(
+                record['question'],
+                top_k=args.top_k,
+                temperature=args.temperature,
+                query_embedding=query_embedding,
+                neighbors=neighbors
+            )
+        except Exception as e:
+            result = {"answer": None, "relevant_documents": [], "match_type": None, "error": str(e)}
+    timings = trace.timings() if trace is not None else {"total": round((time.perf_counter() - start) * 1000, 2)}
+    timings.update(batch_timings)
+
+    line = {"index": index}
+    if 'id' in record:
+        line['id'] = record['id']
+    line.update({
+        "question": record['question'],
+        "answer": result.get("answer"),
+        "sources": [
+            {"filename": doc['filename'], "similarity": round(doc['similarity'], 4), "type": doc.get('type')}
+            for doc in result.get("relevant_documents", [])
+        ],
+        "match_type": result.get("match_type"),
+        "context_type": result.get("context_type"),
+        "cache_hit": result.get("cache_hit"),
+        "error": result.get("error"),
+        "timings_ms": timings,
+    })
+    return line
+
+
+def batch_mode(pipeline: RAGPipeline, args):
+    """
+    Modo de consultas en lote: --query-file entrada.jsonl --out salida.jsonl
+
+    Por cada bloque de --batch-size preguntas calcula los embeddings con una
+    sola llamada a generate_embeddings_batch y busca sus vecinos con una sola
+    consulta a ChromaDB; luego responde cada pregunta en un pool de
+    --concurrency hilos (que acota las llamadas simultáneas al LLM). El
+    siguiente bloque se prepara mientras el anterior espera al LLM, y cada
+    respuesta se escribe en cuanto termina (en orden de llegada, con su índice).
+
+    Args:
+        pipeline: Pipeline RAG
+        args: Argumentos de línea de comandos
+    """
+    print("Modo: CONSULTAS EN LOTE\n")
+
+    records = load_query_file(args.query_file)
+    if not records:
+        print("❌ El archivo de consultas está vacío")
+        sys.exit(1)
+
+    # Para regenerar respuestas hay que saltarse las cachés
+    if args.no_cache:
+        pipeline.answer_cache = None
+        pipeline.semantic_cache = None
+        pipeline.single_flight = None
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    batch_size = max(1, args.batch_size)
+    written = 0
+    errors = 0
+    match_types = {}
+    start = time.perf_counter()
+
+    with open(out_path, 'w', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=max(1, args.concurrency), thread_name_prefix="batch") as executor:
+
+        def write(futures):
+            nonlocal written, errors
+            for future in futures:
+                line = future.result()
+                out.write(json.dumps(line, ensure_ascii=False) + "\n")
+                out.flush()
+                written += 1
+                errors += line['error'] is not None
+                match_types[line['match_type'] or "error"] = match_types.get(line['match_type'] or "error", 0) + 1
+
+        pending = set()
+        for offset in range(0, len(records), batch_size):
+            chunk = records[offset:offset + batch_size]
+
+            embed_start = time.perf_counter()
+            embeddings = pipeline.embedder.generate_embeddings_batch([record['question'] for record in chunk])
+            search_start = time.perf_counter()
+            neighbors = pipeline.prefetch_neighbors(embeddings, top_k=args.top_k)
+            search_end = time.perf_counter()
+            batch_timings = {
+                "embed_batch": round((search_start - embed_start) * 1000 / len(chunk), 2),
+                "search_batch": round((search_end - search_start) * 1000 / len(chunk), 2),
+            }
+            print(f"Bloque {offset // batch_size + 1}: {len(chunk)} embeddings en "
+                  f"{(search_start - embed_start) * 1000:.0f}ms, búsqueda {(search_end - search_start) * 1000:.0f}ms "
+                  f"| {written}/{len(records)} respuestas escritas ({errors} errores)")
+
+            for i, record in enumerate(chunk):
+                pending.add(executor.submit(
+                    _answer_record, pipeline, args, offset + i, record, embeddings[i], neighbors[i], batch_timings
+                ))
+
+            # A lo sumo un bloque en espera además de los que ocupan el pool
+            while len(pending) > batch_size + args.concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write(done)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            write(done)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ {written} respuestas en {elapsed:.1f}s ({written / elapsed:.2f}/s), {errors} errores")
+    print(f"Tipos de match: {match_types}")
+    print(f"Resultados guardados en: {out_path}")
+
+
 def stats_mode(pipeline: RAGPipeline):
     """
-    Muestra estadísticas del sistema
+    Muestra estadísticas del sistema y el desglose de memoria
 
     Args:
         pipeline: Pipeline RAG
@@ -121,6 +288,289 @@ def stats_mode(pipeline: RAGPipeline):
     print(f"Modelo de embeddings: {stats['embedder_model']}")
     print(f"Modelo LLM: {stats['llm_model']}")
 
+    print_memory_report(memory_report(
+        pipeline,
+        pipelines=[pipeline],
+        include_tracemalloc=tracemalloc.is_tracing()
+    ))
+
+
+def print_memory_report(report: dict):
+    """
+    Imprime el desglose de memoria por componente
+
+    Args:
+        report: Resultado de memory_report
+    """
+    mb = 1024 * 1024
+    process = report['process']
+    components = report['components']
+    model = components['model']
+    index = components['index']
+    faq = components['faq']
+
+    print(f"\n{'=' * 60}")
+    print("MEMORIA")
+    print(f"{'=' * 60}")
+    print(f"RSS: {process['rss_mb']:.0f} MB" + (f" | PSS: {process['pss_mb']:.0f} MB" if 'pss_mb' in process else ""))
+    print(f"Modelo ({model['location']}): parámetros {model.get('parameters_bytes', 0) / mb:.0f} MB, "
+          f"buffers {model.get('buffers_bytes', 0) / mb:.1f} MB, "
+          f"tokenizador ~{model.get('tokenizer_bytes_estimate', 0) / mb:.1f} MB")
+    print(f"Índice HNSW: {index['hnsw_bytes'] / mb:.1f} MB ({index['documents']} documentos, "
+          f"{index['hnsw_segments']} segmentos) | SQLite {index['sqlite_bytes'] / mb:.1f} MB")
+    print(f"FAQs: {faq['entries']} entradas, {sum(v for k, v in faq.items() if k.endswith('_bytes')) / mb:.1f} MB")
+    for name, cache in components['caches'].items():
+        print(f"Caché {name}: {cache['entries']} entradas, {cache['bytes'] / mb:.1f} MB")
+    if 'sessions' in components:
+        sessions = components['sessions']
+        print(f"Sesiones: {sessions['sessions']} ({sessions['turns']} turnos, {sessions['history_bytes'] / 1024:.0f} KB)")
+    print(f"Sin atribuir (intérprete, librerías, heap libre): {report['unattributed_mb']:.0f} MB")
+
+    if 'tracemalloc' in report and report['tracemalloc']['top']:
+        print(f"\nTop asignaciones Python (tracemalloc, {report['tracemalloc']['traced_mb']:.0f} MB trazados):")
+        for i, stat in enumerate(report['tracemalloc']['top'][:10], 1):
+            print(f"  {i}. {stat['location']}: {stat['size_kb']:.0f} KB ({stat['count']} bloques)")
+
+
+def faq_rewordings_mode(pipeline: RAGPipeline):
+    """
+    Genera offline las reformulaciones amigables de las respuestas FAQ
+
+    Args:
+        pipeline: Pipeline RAG
+    """
+    print("Modo: REFORMULACIONES FAQ\n")
+
+    rewordings = pipeline.faq_handler.build_rewordings(pipeline.llm_client)
+    print(f"\n✅ {len(rewordings)} reformulaciones guardadas")
+
+
+def load_query_file(path: str) -> List[Dict]:
+    """
+    Carga un archivo de consultas
+
+    Acepta JSONL con el campo "question", "query" o "message" (el resto de
+    campos se conserva) o texto plano con una pregunta por línea.
+
+    Args:
+        path: Ruta del archivo
+
+    Returns:
+        Lista de registros, cada uno con la llave "question"
+    """
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                record = json.loads(line)
+                question = record.get('question') or record.get('query') or record.get('message')
+                if not question:
+                    raise ValueError(f"Registro sin pregunta en {path}: {line[:80]}")
+                record['question'] = question
+            else:
+                record = {'question': line}
+            records.append(record)
+    return records
+
+
+def _distribution(values: List[float]) -> Dict:
+    """
+    Resume una lista de duraciones en ms
+
+    Returns:
+        Diccionario con n, media, p50, p95 y máximo
+    """
+    from bench.loadtest import percentile
+
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 2),
+        "p50_ms": round(percentile(values, 0.50), 2),
+        "p95_ms": round(percentile(values, 0.95), 2),
+        "max_ms": round(values[-1], 2),
+    }
+
+
+def bench_mode(args):
+    """
+    Mide el pipeline etapa por etapa sin levantar la API
+
+    Carga los componentes midiendo cada paso (modelo de embeddings, índice y
+    FAQs, cliente LLM) y pasa el archivo de consultas --bench-passes veces por
+    query_with_faq. La primera pasada es la fría (inicialización lazy del
+    modelo, páginas del índice, conexión con el proveedor); las siguientes son
+    las calientes. Las cachés de respuestas se desactivan salvo --bench-cache,
+    para que las pasadas calientes midan el pipeline y no aciertos de caché.
+
+    Args:
+        args: Argumentos de línea de comandos
+    """
+    from bench.loadtest import git_revision
+    from config import TracingConfig
+    from embeddings.embedding_service import create_embedder
+    from rag.engine import RAGEngine
+    from observability.tracing import start_trace
+
+    print("Modo: BENCHMARK POR ETAPAS\n")
+
+    queries = [record['question'] for record in load_query_file(args.query_file or DEFAULT_QUERY_FILE)]
+    if args.bench_limit:
+        queries = queries[:args.bench_limit]
+    if not queries:
+        print("❌ El archivo de consultas está vacío")
+        sys.exit(1)
+
+    # Las duraciones por etapa salen de la traza de cada consulta
+    TracingConfig.ENABLED = True
+
+    load = {}
+    start = time.perf_counter()
+    embedder = create_embedder()
+    load["embedding_model_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = RAGEngine(embedder=embedder)
+    load["index_and_faq_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline = engine.get_pipeline(args.llm_provider)
+    load["llm_client_s"] = time.perf_counter() - start
+    load = {name: round(seconds, 3) for name, seconds in load.items()}
+
+    if not args.bench_cache:
+        pipeline.answer_cache = None
+        pipeline.semantic_cache = None
+        pipeline.single_flight = None
+
+    passes = []
+    try:
+        for n in range(max(1, args.bench_passes)):
+            samples = []
+            for question in queries:
+                with start_trace("bench", pass_number=n) as trace:
+                    try:
+                        result = pipeline.query_with_faq(
+                            question, top_k=args.top_k, temperature=args.temperature
+                        )
+                        error = result.get("error")
+                        match_type = result.get("match_type")
+                    except Exception as e:
+                        error, match_type = str(e), None
+                samples.append({
+                    "question": question,
+                    "match_type": match_type,
+                    "cache_hit": result.get("cache_hit") if error is None else None,
+                    "error": error,
+                    "timings_ms": trace.timings(),
+                })
+            passes.append(samples)
+            print(f"Pasada {n + 1}: {len(samples)} consultas, "
+                  f"{sum(1 for s in samples if s['error'])} errores")
+    finally:
+        pipeline.close()
+
+    def stages_of(samples: List[Dict]) -> Dict:
+        return {
+            stage: _distribution([s["timings_ms"][stage] for s in samples if stage in s["timings_ms"]])
+            for stage, _ in BENCH_STAGES
+        }
+
+    cold = passes[0]
+    warm = [sample for samples in passes[1:] for sample in samples]
+    match_types = {}
+    for sample in cold:
+        match_types[sample["match_type"] or "error"] = match_types.get(sample["match_type"] or "error", 0) + 1
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "git": git_revision(),
+        "llm_provider": args.llm_provider,
+        "queries": len(queries),
+        "passes": len(passes),
+        "caches": bool(args.bench_cache),
+        "load": load,
+        "first_query_ms": cold[0]["timings_ms"],
+        "match_types": match_types,
+        "cold": stages_of(cold),
+        "warm": stages_of(warm) if warm else None,
+        "samples": passes,
+    }
+
+    print(f"\n{'=' * 60}")
+    print("CARGA")
+    print(f"{'=' * 60}")
+    print(f"Modelo de embeddings: {load['embedding_model_s']:.2f}s | Índice y FAQs: {load['index_and_faq_s']:.2f}s | "
+          f"Cliente LLM ({args.llm_provider}): {load['llm_client_s']:.2f}s")
+    print(f"Primera consulta: {cold[0]['timings_ms']['total']:.0f}ms "
+          f"(embedding {cold[0]['timings_ms'].get('embed', 0):.0f}ms)")
+    print(f"Tipos de match: {match_types}")
+
+    for label, stages in (("FRÍO (primera pasada)", results["cold"]), ("CALIENTE", results["warm"])):
+        if stages is None:
+            continue
+        print(f"\n{label}")
+        print("| Etapa | n | media (ms) | p50 (ms) | p95 (ms) | máx (ms) |")
+        print("|---|---|---|---|---|---|")
+        for stage, description in BENCH_STAGES:
+            values = stages[stage]
+            if values["count"]:
+                print(f"| {description} | {values['count']} | {values['mean_ms']} | {values['p50_ms']} | "
+                      f"{values['p95_ms']} | {values['max_ms']} |")
+
+    out = Path(args.bench_out or Path(__file__).parent.parent / "data" / "bench" /
+               f"stages-{datetime.now():%Y%m%d-%H%M%S}-{results['git']['commit']}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nResultados guardados en: {out}")
+
+
+def warm_cache_mode(pipeline: RAGPipeline, args):
+    """
+    Precalcula las respuestas más pedidas para cargarlas al arrancar cada worker
+
+    Args:
+        pipeline: Pipeline RAG
+        args: Argumentos de línea de comandos
+    """
+    from cache import warm_answers
+    from config import APIConfig, CacheConfig
+
+    print("Modo: PRECÁLCULO DE RESPUESTAS FRECUENTES\n")
+
+    mined = []
+    capture_path = args.capture or APIConfig.CAPTURE_PATH
+    if capture_path and Path(capture_path).exists():
+        mined = warm_answers.mine_questions(
+            capture_path, provider=pipeline.llm_provider, limit=args.warm_top, min_count=args.warm_min_count
+        )
+        print(f"Capturas ({capture_path}): {len(mined)} preguntas frecuentes")
+    else:
+        print("⚠️  Sin archivo de capturas (API_CAPTURE_PATH o --capture): solo preguntas FAQ")
+
+    faq = warm_answers.faq_questions(pipeline.faq_handler)
+    questions = warm_answers.merge_questions(mined, faq)
+    print(f"FAQs: {len(faq)} preguntas | Total sin repetir: {len(questions)}\n")
+    if not questions:
+        print("No hay preguntas que precalcular")
+        return
+
+    start = time.perf_counter()
+    entries = warm_answers.precompute_answers(
+        pipeline, questions, concurrency=args.concurrency, batch_size=args.batch_size
+    )
+
+    out = args.out or CacheConfig.ANSWER_CACHE_WARM_PATH
+    index_version = pipeline.repository.get_index_version()
+    warm_answers.save_warm_answers(out, entries, pipeline.llm_provider, index_version)
+    print(f"\n✅ {len(entries)}/{len(questions)} respuestas precalculadas en {time.perf_counter() - start:.1f}s")
+    print(f"Guardadas en: {out} (índice {index_version})")
+
 
 def reset_mode(pipeline: RAGPipeline):
     """
@@ -160,11 +610,27 @@ Ejemplos de uso:
   # Modo interactivo
   python src/main.py
 
-  # Mostrar estadísticas
+  # Mostrar estadísticas y desglose de memoria
   python src/main.py --stats
 
+  # ... con las principales asignaciones de Python (tracemalloc)
+  python src/main.py --stats --tracemalloc
+
   # Limpiar base de datos
   python src/main.py --reset
+
+  # Precomputar reformulaciones de respuestas FAQ directas
+  python src/main.py --faq-rewordings
+
+  # Responder un archivo de preguntas (JSONL o una por línea) en lote
+  python src/main.py --query-file preguntas.jsonl --out respuestas.jsonl --concurrency 8
+
+  # Precalcular las respuestas más pedidas (capturas + FAQs) para el arranque de los workers
+  python src/main.py --warm-cache --capture data/capture/requests.jsonl --llm-provider groq
+
+  # Tiempos por etapa (frío vs caliente) sin levantar la API
+  python src/main.py --bench --llm-provider stub
+  python src/main.py --bench --query-file preguntas.jsonl --bench-passes 5
         """
     )
 
@@ -174,9 +640,17 @@ Ejemplos de uso:
     parser.add_argument('--query', type=str,
                         help='Consulta al sistema RAG')
     parser.add_argument('--stats', action='store_true',
-                        help='Muestra estadísticas del sistema')
+                        help='Muestra estadísticas del sistema y el desglose de memoria')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Con --stats: traza asignaciones desde el arranque y muestra las principales')
     parser.add_argument('--reset', action='store_true',
                         help='Limpia la base de datos')
+    parser.add_argument('--faq-rewordings', action='store_true',
+                        help='Genera reformulaciones amigables de las respuestas FAQ directas')
+    parser.add_argument('--warm-cache', action='store_true',
+                        help='Precalcula las respuestas más pedidas que cada worker carga al arrancar')
+    parser.add_argument('--bench', action='store_true',
+                        help='Mide tiempos por etapa (frío vs caliente) sobre un archivo de consultas')
 
     # Opciones de ingestion
     parser.add_argument('--chunk', action='store_true',
@@ -191,16 +665,64 @@ Ejemplos de uso:
                         help='Temperatura para el LLM (default: 0.7)')
     parser.add_argument('--show-sources', action='store_true',
                         help='Muestra las fuentes consultadas')
+    parser.add_argument('--query-file', type=str,
+                        help='Archivo de consultas: JSONL (question/query/message) o una por línea '
+                             '(--bench usa por defecto data/eval/retrieval_queries.jsonl)')
+
+    # Opciones de consultas en lote
+    parser.add_argument('--out', type=str,
+                        help='Con --query-file: archivo JSONL de respuestas, fuentes y tiempos; '
+                             'con --warm-cache: archivo de respuestas precalculadas (default: ANSWER_CACHE_WARM_PATH)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Consultas en paralelo en el modo lote (acota las llamadas al LLM, default: 4)')
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help='Preguntas por bloque de embeddings y búsqueda en el modo lote (default: 64)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='No usa las cachés de respuestas (para regenerar respuestas)')
+
+    # Opciones de precálculo de respuestas
+    parser.add_argument('--capture', type=str,
+                        help='Con --warm-cache: capturas de /chat a minar (default: API_CAPTURE_PATH)')
+    parser.add_argument('--warm-top', type=int, default=200,
+                        help='Preguntas más frecuentes de las capturas a precalcular (default: 200)')
+    parser.add_argument('--warm-min-count', type=int, default=2,
+                        help='Apariciones mínimas de una pregunta capturada (default: 2)')
+
+    # Opciones de benchmark
+    parser.add_argument('--bench-passes', type=int, default=3,
+                        help='Pasadas sobre el archivo de consultas; la primera es la fría (default: 3)')
+    parser.add_argument('--bench-limit', type=int, default=0,
+                        help='Máximo de consultas a usar (default: todas)')
+    parser.add_argument('--bench-cache', action='store_true',
+                        help='Mantiene las cachés de respuestas activas (las pasadas calientes serán aciertos)')
+    parser.add_argument('--bench-out', type=str,
+                        help='Archivo JSON de resultados (default: data/bench/stages-<fecha>-<commit>.json)')
 
     # Opciones de sistema
-    parser.add_argument('--llm-provider', type=str, default='deepseek', choices=['groq', 'deepseek'],
-                        help='Proveedor de LLM: groq o deepseek (default: deepseek)')
+    parser.add_argument('--llm-provider', type=str, default='deepseek', choices=['groq', 'deepseek', 'stub'],
+                        help='Proveedor de LLM: groq, deepseek o stub (default: deepseek)')
 
     args = parser.parse_args()
 
+    if args.query_file and not args.bench and not args.out:
+        parser.error("--query-file requiere --out (o --bench)")
+
     # Banner
     print_banner()
 
+    # Antes de cargar el pipeline, para que sus asignaciones queden trazadas
+    if args.tracemalloc:
+        tracemalloc.start(10)
+
+    # El benchmark carga sus propios componentes para medir cada paso
+    if args.bench:
+        try:
+            bench_mode(args)
+        except Exception as e:
+            print(f"\n❌ Error: {str(e)}")
+            sys.exit(1)
+        return
+
     # Inicializar pipeline
     try:
         pipeline = RAGPipeline(llm_provider=args.llm_provider)
@@ -223,6 +745,15 @@ Ejemplos de uso:
         elif args.reset:
             reset_mode(pipeline)
 
+        elif args.faq_rewordings:
+            faq_rewordings_mode(pipeline)
+
+        elif args.warm_cache:
+            warm_cache_mode(pipeline, args)
+
+        elif args.query_file:
+            batch_mode(pipeline, args)
+
         else:
             # Modo consulta (interactivo o única)
             query_mode(pipeline, args)
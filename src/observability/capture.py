@@ -0,0 +1,48 @@
+"""
+Captura de peticiones /chat en JSONL para reproducirlas después
+
+Con API_CAPTURE_PATH, cada petición /chat se agrega como una línea JSON
+(mensaje, sesión, parámetros, llave de idempotencia) desde un hilo aparte.
+El archivo es la entrada de src/bench/loadtest.py y de la minería de
+preguntas frecuentes; contiene los mensajes de los usuarios, así que está
+deshabilitado por defecto.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from config import APIConfig
+from observability.tracing import JSONLExporter
+
+_capture = None
+_capture_lock = threading.Lock()
+
+
+def get_capture() -> Optional[JSONLExporter]:
+    """
+    Retorna el escritor de capturas del proceso
+
+    Returns:
+        JSONLExporter, o None si API_CAPTURE_PATH no está configurado
+    """
+    global _capture
+    if not APIConfig.CAPTURE_PATH:
+        return None
+    with _capture_lock:
+        if _capture is None:
+            _capture = JSONLExporter(APIConfig.CAPTURE_PATH, max_pending=10000, serialize=dict)
+    return _capture
+
+
+def capture_request(**fields):
+    """
+    Registra una petición (si la captura está habilitada)
+
+    Args:
+        **fields: Campos de la petición (message, session_id, llm_provider...)
+    """
+    capture = get_capture()
+    if capture is not None:
+        record: Dict = {"ts": round(time.time(), 3)}
+        record.update({key: value for key, value in fields.items() if value is not None})
+        capture.export(record)
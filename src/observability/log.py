@@ -0,0 +1,261 @@
+"""
+Logging estructurado, con niveles, muestreo y handlers no bloqueantes
+
+Los módulos del hot path registran eventos con campos en lugar de imprimir:
+
+    logger = get_logger("rag.retriever")
+    logger.debug("retrieval.result", rank=1, filename="becas.md", similarity=0.83)
+
+- Los registros se encolan (QueueHandler) y un hilo aparte los escribe, así
+  el hilo que atiende la petición nunca espera al I/O de stdout; si la cola
+  se llena, el registro se descarta y se cuenta
+- Los campos de contexto (request_id, session_id) se agregan solos a cada
+  registro de la petición en curso (ver bind_context)
+- Los DEBUG se muestrean por petición (LOG_DEBUG_SAMPLE_RATE): una petición
+  muestreada conserva todas sus líneas de detalle
+- LOG_FORMAT=json emite una línea JSON por registro; text emite clave=valor
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator
+
+from config import LoggingConfig
+
+# Campos de la petición en curso (se propagan al threadpool con el contexto)
+_context: contextvars.ContextVar = contextvars.ContextVar("log_context", default={})
+
+_configure_lock = threading.Lock()
+_listener = None
+_handler = None
+
+
+def bind_context(**fields) -> contextvars.Token:
+    """
+    Agrega campos al contexto de logging de la petición en curso
+
+    Args:
+        **fields: Campos (p. ej. request_id, session_id)
+
+    Returns:
+        Token para restaurar el contexto anterior con reset_context
+    """
+    merged = dict(_context.get())
+    merged.update({key: value for key, value in fields.items() if value is not None})
+    return _context.set(merged)
+
+
+def reset_context(token: contextvars.Token):
+    """Restaura el contexto anterior a bind_context"""
+    _context.reset(token)
+
+
+@contextmanager
+def log_context(**fields) -> Iterator[None]:
+    """Campos de contexto durante un bloque"""
+    token = bind_context(**fields)
+    try:
+        yield
+    finally:
+        reset_context(token)
+
+
+def get_context() -> Dict:
+    """Campos de contexto actuales"""
+    return dict(_context.get())
+
+
+class _ContextFilter(logging.Filter):
+    """Copia el contexto al registro y muestrea los DEBUG por petición"""
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def _sampled(self, context: Dict) -> bool:
+        if self.sample_rate >= 1.0:
+            return True
+        if self.sample_rate <= 0.0:
+            return False
+        # Misma decisión para todas las líneas de una petición
+        request_id = context.get("request_id")
+        if request_id is not None:
+            return (zlib.crc32(str(request_id).encode('utf-8')) % 10000) < self.sample_rate * 10000
+        return random.random() < self.sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        if record.levelno <= logging.DEBUG and not self._sampled(context):
+            return False
+        record.context = context
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (y cuenta) en lugar de bloquear con la cola llena"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Los campos se serializan en el hilo del listener; aquí solo se fija el mensaje
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_text = logging.Formatter().formatException(record.exc_info) if record.exc_info else None
+        record.exc_info = None
+        return record
+
+
+def _fields_of(record: logging.LogRecord) -> Dict:
+    """Contexto + campos del evento"""
+    fields = dict(getattr(record, "context", {}))
+    fields.update(getattr(record, "fields", {}))
+    return fields
+
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON por registro"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+            "pid": record.process,
+        }
+        entry.update(_fields_of(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible: hora nivel logger evento clave=valor"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        time_str = datetime.fromtimestamp(record.created).strftime("%H:%M:%S.%f")[:-3]
+        parts = [time_str, f"{record.levelname:<7}", record.name, record.getMessage()]
+        for key, value in _fields_of(record).items():
+            if isinstance(value, float):
+                value = f"{value:.4f}"
+            parts.append(f"{key}={value}")
+        line = " ".join(str(part) for part in parts)
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+def _start_listener():
+    """Arranca el hilo que escribe los registros encolados"""
+    global _listener
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JSONFormatter() if LoggingConfig.FORMAT == "json" else TextFormatter())
+    _listener = logging.handlers.QueueListener(_handler.queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+
+
+def _stop_listener():
+    """Vacía la cola y detiene el listener (al salir del proceso)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    """Los hilos no sobreviven al fork: cada worker necesita su propio listener"""
+    global _listener
+    if _handler is None:
+        return
+    _listener = None
+    _handler.queue = queue.Queue(maxsize=LoggingConfig.QUEUE_SIZE)
+    _start_listener()
+
+
+def configure_logging():
+    """
+    Instala el handler en cola del logger raíz de la aplicación ("voae")
+
+    Idempotente: solo la primera llamada configura.
+    """
+    global _handler
+    with _configure_lock:
+        if _handler is not None:
+            return
+
+        root = logging.getLogger("voae")
+        root.setLevel(LoggingConfig.LEVEL.upper())
+        root.propagate = False
+
+        _handler = _DroppingQueueHandler(queue.Queue(maxsize=LoggingConfig.QUEUE_SIZE))
+        _handler.addFilter(_ContextFilter(LoggingConfig.DEBUG_SAMPLE_RATE))
+        root.addHandler(_handler)
+
+        _start_listener()
+        atexit.register(_stop_listener)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def get_dropped_count() -> int:
+    """Registros descartados por cola llena"""
+    return _handler.dropped if _handler is not None else 0
+
+
+class StructuredLogger:
+    """Logger con campos como argumentos: logger.info("evento", campo=valor)"""
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Permite evitar el costo de armar campos caros si el nivel está apagado"""
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, event: str, exc_info=None, fields: Dict = None):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, event, exc_info=exc_info, extra={"fields": fields or {}})
+
+    def debug(self, event: str, **fields):
+        self._log(logging.DEBUG, event, fields=fields)
+
+    def info(self, event: str, **fields):
+        self._log(logging.INFO, event, fields=fields)
+
+    def warning(self, event: str, **fields):
+        self._log(logging.WARNING, event, fields=fields)
+
+    def error(self, event: str, exc_info=None, **fields):
+        self._log(logging.ERROR, event, exc_info=exc_info, fields=fields)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """
+    Obtiene un logger estructurado de la aplicación
+
+    Args:
+        name: Nombre del módulo (p. ej. "rag.pipeline")
+
+    Returns:
+        StructuredLogger bajo el logger raíz "voae"
+    """
+    configure_logging()
+    return StructuredLogger(logging.getLogger(f"voae.{name}"))
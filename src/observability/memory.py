@@ -0,0 +1,308 @@
+"""
+Contabilidad de memoria por componente: modelo, índice, cachés y sesiones
+
+El RSS del proceso no dice qué lo ocupa. memory_report estima los bytes de
+cada componente (parámetros del modelo, tokenizador, índice HNSW de Chroma,
+FAQs, cada capa de caché, historiales de sesión) y los compara con el RSS;
+la diferencia queda como "unattributed" (intérprete, librerías, heap libre).
+
+tracemalloc solo ve memoria asignada por Python (no la de torch ni la de
+hnswlib); sirve para encontrar crecimiento en estructuras propias.
+"""
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+_MB = 1024 * 1024
+
+# Tamaño estimado del tokenizador por modelo (serializarlo cuesta; se calcula una vez)
+_tokenizer_bytes = {}
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """
+    Tamaño aproximado de un objeto y todo lo que contiene
+
+    Recorre dicts, listas, tuplas y sets; los arrays numpy cuentan sus datos.
+
+    Args:
+        obj: Objeto a medir
+        seen: ids ya contados (para referencias compartidas)
+
+    Returns:
+        Bytes estimados
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def process_memory() -> Dict[str, float]:
+    """
+    Memoria del proceso actual
+
+    Returns:
+        Diccionario con rss_mb y, en Linux, pss_mb, shared_mb y private_mb
+    """
+    rollup = Path("/proc/self/smaps_rollup")
+    if rollup.exists():
+        fields = {}
+        for line in rollup.read_text().splitlines()[1:]:
+            name, value = line.split(':', 1)
+            fields[name] = int(value.split()[0]) / 1024  # kB -> MB
+        return {
+            "rss_mb": fields.get("Rss", 0.0),
+            "pss_mb": fields.get("Pss", 0.0),
+            "shared_mb": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+            "private_mb": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+        }
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: kB en Linux, bytes en macOS; es el pico, no el actual
+    return {"rss_mb": peak / (_MB if sys.platform == "darwin" else 1024), "peak_only": True}
+
+
+def model_memory(embedder) -> Dict:
+    """
+    Memoria del modelo de embeddings
+
+    Args:
+        embedder: Embedder local o RemoteEmbedder
+
+    Returns:
+        Diccionario con bytes de parámetros, buffers y tokenizador (estimado)
+    """
+    model = getattr(embedder, "model", None)
+    if model is None:
+        # Servicio externo: aquí solo viven los bloques de memoria compartida
+        channels = getattr(embedder, "_channels", [])
+        return {
+            "location": getattr(embedder, "device", "remote"),
+            "parameters_bytes": 0,
+            "shared_memory_bytes": sum(channel["shm"].size for channel in channels),
+        }
+
+    parameters = sum(p.numel() * p.element_size() for p in model.parameters())
+    buffers = sum(b.numel() * b.element_size() for b in model.buffers())
+    dtypes = sorted({str(p.dtype).replace("torch.", "") for p in model.parameters()})
+
+    report = {
+        "location": str(embedder.device),
+        "model_name": embedder.model_name,
+        "parameters": sum(p.numel() for p in model.parameters()),
+        "parameters_bytes": parameters,
+        "buffers_bytes": buffers,
+        "dtypes": dtypes,
+    }
+
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is not None:
+        report["vocab_size"] = len(tokenizer)
+        if embedder.model_name not in _tokenizer_bytes:
+            backend = getattr(tokenizer, "backend_tokenizer", None)
+            # El tokenizador rápido vive en Rust; su serialización aproxima lo que ocupa
+            _tokenizer_bytes[embedder.model_name] = len(backend.to_str()) if backend is not None else deep_sizeof(
+                tokenizer.get_vocab()
+            )
+        report["tokenizer_bytes_estimate"] = _tokenizer_bytes[embedder.model_name]
+
+    return report
+
+
+def index_memory(storage) -> Dict:
+    """
+    Memoria del índice vectorial de ChromaDB
+
+    hnswlib carga en memoria los archivos del segmento (data_level0.bin,
+    link_lists.bin, ...); su tamaño en disco aproxima lo que ocupa.
+
+    Args:
+        storage: ChromaVectorStore
+
+    Returns:
+        Diccionario con documentos, tamaño de los segmentos HNSW y de SQLite
+    """
+    storage_path = Path(storage.storage_path)
+    hnsw_bytes = 0
+    segments = 0
+    for segment in storage_path.iterdir() if storage_path.exists() else []:
+        if segment.is_dir() and (segment / "header.bin").exists():
+            segments += 1
+            hnsw_bytes += sum(f.stat().st_size for f in segment.iterdir() if f.is_file())
+
+    sqlite = storage_path / "chroma.sqlite3"
+    return {
+        "documents": storage.count_documents(),
+        "hnsw_segments": segments,
+        "hnsw_bytes": hnsw_bytes,
+        "sqlite_bytes": sqlite.stat().st_size if sqlite.exists() else 0,
+    }
+
+
+def faq_memory(faq_handler) -> Dict:
+    """
+    Memoria de los datos FAQ en proceso (entradas, índice léxico, embeddings de preguntas)
+
+    Args:
+        faq_handler: FAQHandler
+
+    Returns:
+        Diccionario con bytes por estructura
+    """
+    question_embeddings = faq_handler._question_embeddings or []
+    return {
+        "entries": len(faq_handler.faq_entries),
+        "entries_bytes": deep_sizeof(faq_handler.faq_entries),
+        "lexical_index_bytes": deep_sizeof(faq_handler.lexical_index.__dict__),
+        "question_embeddings_bytes": sum(
+            matrix.nbytes for _, matrix in question_embeddings if isinstance(matrix, np.ndarray)
+        ),
+        "rewordings_bytes": deep_sizeof(faq_handler.rewordings),
+    }
+
+
+def sessions_memory(sessions: Dict) -> Dict:
+    """
+    Memoria de las sesiones de chat (historiales de conversación)
+
+    Args:
+        sessions: {session_id: RAGChatbot}
+
+    Returns:
+        Diccionario con sesiones, turnos y bytes de los historiales
+    """
+    histories = [chatbot.conversation_history for chatbot in list(sessions.values())]
+    return {
+        "sessions": len(histories),
+        "turns": sum(len(history) for history in histories),
+        "history_bytes": sum(deep_sizeof(history) for history in histories),
+    }
+
+
+def tracemalloc_top(limit: int = 20) -> Dict:
+    """
+    Principales asignaciones de Python según tracemalloc
+
+    Si tracemalloc no está activo, lo activa: los datos aparecen a partir
+    de la siguiente llamada (tiene un costo de memoria y CPU; detenerlo
+    con tracemalloc_stop).
+
+    Args:
+        limit: Número de líneas a reportar
+
+    Returns:
+        Diccionario con estado, total trazado y top por línea de código
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(10)
+        return {"status": "started", "top": []}
+
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "status": "tracing",
+        "traced_mb": current / _MB,
+        "peak_mb": peak / _MB,
+        "top": [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": stat.size / 1024,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:limit]
+        ],
+    }
+
+
+def tracemalloc_stop() -> Dict:
+    """Detiene tracemalloc y libera sus trazas"""
+    was_tracing = tracemalloc.is_tracing()
+    tracemalloc.stop()
+    return {"status": "stopped" if was_tracing else "not_tracing"}
+
+
+def memory_report(
+    engine,
+    pipelines: Iterable = (),
+    sessions: Optional[Dict] = None,
+    extra_caches: Optional[Dict] = None,
+    include_tracemalloc: bool = False
+) -> Dict:
+    """
+    Desglose de memoria del proceso por componente
+
+    Args:
+        engine: Objeto con embedder, storage y faq_handler (RAGEngine o RAGPipeline)
+        pipelines: Pipelines cuyas cachés se reportan
+        sessions: {session_id: RAGChatbot} (None = sin sesiones)
+        extra_caches: Otras cachés con memory_usage() (p. ej. idempotencia)
+        include_tracemalloc: Agregar el top de tracemalloc
+
+    Returns:
+        Diccionario con process, components (bytes estimados) y unattributed_mb
+    """
+    components = {
+        "model": model_memory(engine.embedder),
+        "index": index_memory(engine.storage),
+        "faq": faq_memory(engine.faq_handler),
+    }
+
+    # Las cachés son del proceso: varios pipelines pueden compartir la misma instancia
+    caches = {}
+    seen = set()
+    for pipeline in pipelines:
+        for name in ("answer_cache", "semantic_cache"):
+            cache = getattr(pipeline, name, None)
+            if cache is not None and id(cache) not in seen:
+                seen.add(id(cache))
+                caches[name] = cache.memory_usage()
+    for name, cache in (extra_caches or {}).items():
+        if cache is not None and id(cache) not in seen:
+            seen.add(id(cache))
+            caches[name] = cache.memory_usage()
+    components["caches"] = caches
+
+    if sessions is not None:
+        components["sessions"] = sessions_memory(sessions)
+
+    model = components["model"]
+    attributed = (
+        model.get("parameters_bytes", 0) + model.get("buffers_bytes", 0)
+        + model.get("tokenizer_bytes_estimate", 0) + model.get("shared_memory_bytes", 0)
+        + components["index"]["hnsw_bytes"]
+        + sum(v for k, v in components["faq"].items() if k.endswith("_bytes"))
+        + sum(cache.get("bytes", 0) for cache in caches.values())
+        + components.get("sessions", {}).get("history_bytes", 0)
+    )
+
+    process = process_memory()
+    report = {
+        "pid": os.getpid(),
+        "process": process,
+        "components": components,
+        "attributed_mb": attributed / _MB,
+        "unattributed_mb": max(0.0, process["rss_mb"] - attributed / _MB),
+    }
+    if include_tracemalloc:
+        report["tracemalloc"] = tracemalloc_top()
+    return report
@@ -0,0 +1,261 @@
+"""
+Métricas en formato de exposición de Prometheus (sin dependencias externas)
+
+Contadores, gauges e histogramas con etiquetas, y las métricas del pipeline:
+- voae_stage_duration_seconds{stage}: embed, faq_classify, doc_search,
+  context_build, llm_ttft, llm_total, serialization
+- voae_queries_total{match_type, context_type}
+- voae_cache_hits_total{cache}: exact, semantic, coalesced
+- voae_llm_errors_total{provider}
+- voae_active_sessions
+
+Cada proceso tiene su propio registro: con varios workers, Prometheus debe
+raspar cada worker (o sumar por instancia).
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from observability.tracing import span
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    """Formatea etiquetas como {a="x",b="y"}"""
+    parts = [
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base: nombre, ayuda, etiquetas y lock"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        """Valores de etiquetas en el orden declarado"""
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        """Líneas de exposición (cabecera HELP/TYPE incluida)"""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    """Contador monótono con etiquetas"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Incrementa el contador"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Valor instantáneo; puede leerse de una función al exponer"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._function = None
+
+    def set(self, value: float, **labels):
+        """Fija el valor"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Lee el valor (sin etiquetas) de function en cada exposición"""
+        self._function = function
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        if self._function is not None:
+            lines.append(f"{self.name} {float(self._function())}")
+            return lines
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Histograma acumulativo con buckets fijos"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # key -> [conteos por bucket, suma, total]
+
+    def observe(self, value: float, **labels):
+        """Registra una observación"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0]
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Mide la duración del bloque"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total_sum, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total_sum}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas del proceso"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Registra (o retorna) un contador"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Registra (o retorna) un gauge"""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None
+    ) -> Histogram:
+        """Registra (o retorna) un histograma"""
+        return self._register(Histogram(name, documentation, labelnames, buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        """
+        Genera el texto de exposición de todas las métricas
+
+        Returns:
+            Texto en formato Prometheus 0.0.4
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "voae_stage_duration_seconds",
+    "Duración de cada etapa de query_with_faq",
+    ["stage"]
+)
+QUERIES = REGISTRY.counter(
+    "voae_queries_total",
+    "Consultas respondidas por tipo de match y de contexto",
+    ["match_type", "context_type"]
+)
+CACHE_HITS = REGISTRY.counter(
+    "voae_cache_hits_total",
+    "Respuestas servidas sin recalcular (exact, semantic, coalesced)",
+    ["cache"]
+)
+LLM_ERRORS = REGISTRY.counter(
+    "voae_llm_errors_total",
+    "Errores al llamar al proveedor LLM",
+    ["provider"]
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "voae_http_request_duration_seconds",
+    "Duración de las peticiones HTTP",
+    ["path", "status"]
+)
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "voae_queue_wait_seconds",
+    "Tiempo de espera en la cola de admisión de /chat"
+)
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    "voae_active_sessions",
+    "Sesiones de chat activas en el proceso"
+)
+
+
+@contextmanager
+def time_stage(stage: str, **attributes) -> Iterator[None]:
+    """
+    Mide la duración de una etapa del pipeline
+
+    Args:
+        stage: Nombre de la etapa
+        **attributes: Atributos del span de la traza en curso
+
+    Returns:
+        Context manager que registra en voae_stage_duration_seconds y abre
+        un span con el mismo nombre
+    """
+    with span(stage, **attributes), STAGE_SECONDS.time(stage=stage):
+        yield
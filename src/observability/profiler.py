@@ -0,0 +1,313 @@
+"""
+Profiler por muestreo para workers en producción (sin dependencias externas)
+
+Un hilo toma muestras de la pila (sys._current_frames) de los hilos que están
+atendiendo /chat cada `interval` segundos, hasta que pasan N peticiones o se
+cumple una ventana de tiempo. Genera dos perfiles en formato "folded"
+(flamegraph.pl, speedscope, inferno):
+
+- wall: todas las muestras, incluida la espera al proveedor LLM o a la cola
+- cpu: solo las muestras en que el hilo estaba en ejecución (estado R en
+  /proc/self/task/<tid>/stat, solo Linux): embedding, tokenización, regex
+
+Solo se muestrean los hilos marcados con track_current_thread(), así la
+espera de los hilos ociosos del threadpool no ensucia el perfil.
+"""
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Hilos que atienden peticiones: {ident: native_id}
+_tracked_threads: Dict[int, int] = {}
+
+_lock = threading.Lock()
+_active = None
+_sessions: Dict[str, "ProfileSession"] = {}
+_MAX_SESSIONS = 10
+
+
+@contextmanager
+def track_current_thread() -> Iterator[None]:
+    """Marca el hilo actual como atendiendo una petición (muestreable)"""
+    thread = threading.current_thread()
+    _tracked_threads[thread.ident] = thread.native_id
+    try:
+        yield
+    finally:
+        _tracked_threads.pop(thread.ident, None)
+
+
+def _thread_running(native_id: int) -> Optional[bool]:
+    """
+    Indica si el hilo está en CPU (estado R)
+
+    Returns:
+        True/False, o None si no se puede saber (no Linux)
+    """
+    try:
+        with open(f"/proc/self/task/{native_id}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # El nombre del hilo va entre paréntesis y puede contener espacios
+    return stat[stat.rindex(b")") + 2:stat.rindex(b")") + 3] == b"R"
+
+
+def _fold(frame) -> str:
+    """Pila de raíz a hoja como 'archivo:función;...'"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfileSession:
+    """Una sesión de profiling: muestrea hasta N peticiones o una ventana de tiempo"""
+
+    def __init__(
+        self,
+        duration: Optional[float] = None,
+        max_requests: Optional[int] = None,
+        interval: float = 0.005,
+        output_dir: str = "data/profiles"
+    ):
+        """
+        Args:
+            duration: Segundos máximos de la sesión (None = hasta max_requests)
+            max_requests: Peticiones /chat a perfilar (None = hasta duration)
+            interval: Segundos entre muestras
+            output_dir: Carpeta donde se guardan los perfiles
+        """
+        if duration is None and max_requests is None:
+            raise ValueError("Indica duration o max_requests")
+        if duration is not None and duration <= 0:
+            raise ValueError("duration debe ser mayor que 0")
+        if max_requests is not None and max_requests < 1:
+            raise ValueError("max_requests debe ser al menos 1")
+        if interval <= 0:
+            raise ValueError("interval debe ser mayor que 0")
+
+        self.session_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.pid = os.getpid()
+        self.duration = duration
+        self.max_requests = max_requests
+        self.interval = interval
+        self.output_dir = Path(output_dir)
+
+        self.wall = Counter()
+        self.cpu = Counter()
+        self.samples = 0
+        self.requests = 0
+        self.cpu_supported = True
+        self.started_at = None
+        self.finished_at = None
+        self.files = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Arranca el hilo de muestreo"""
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el muestreo (los perfiles se guardan al terminar el hilo)"""
+        self._stop.set()
+
+    def note_request(self):
+        """Cuenta una petición terminada; detiene la sesión al llegar a max_requests"""
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self.finished_at is None
+
+    def _run(self):
+        deadline = self.started_at + self.duration if self.duration is not None else None
+        own = threading.get_ident()
+
+        while not self._stop.wait(self.interval):
+            if deadline is not None and time.time() >= deadline:
+                break
+
+            frames = sys._current_frames()
+            for ident, native_id in list(_tracked_threads.items()):
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                stack = _fold(frame)
+                self.wall[stack] += 1
+
+                running = _thread_running(native_id)
+                if running is None:
+                    self.cpu_supported = False
+                elif running:
+                    self.cpu[stack] += 1
+            self.samples += 1
+            del frames
+
+        self.finished_at = time.time()
+        self._save()
+        _finish(self)
+
+    def _save(self):
+        """Guarda los perfiles en formato folded"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for kind, counter in (("wall", self.wall), ("cpu", self.cpu)):
+            path = self.output_dir / f"{self.session_id}-{self.pid}-{kind}.folded"
+            path.write_text(self.folded(kind), encoding="utf-8")
+            self.files[kind] = str(path)
+
+    def folded(self, kind: str = "wall") -> str:
+        """
+        Perfil en formato folded ("pila conteo" por línea)
+
+        Args:
+            kind: "wall" o "cpu"
+
+        Returns:
+            Texto para flamegraph.pl / speedscope
+        """
+        counter = (self.cpu if kind == "cpu" else self.wall).copy()
+        return "".join(f"{stack} {count}\n" for stack, count in counter.most_common())
+
+    def top_functions(self, kind: str = "wall", limit: int = 15) -> List[Dict]:
+        """
+        Funciones con más muestras propias (hoja de la pila)
+
+        Returns:
+            Lista de {function, samples, percent}
+        """
+        counter = (self.cpu if kind == "cpu" else self.wall).copy()
+        leaves = Counter()
+        for stack, count in counter.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"function": function, "samples": samples, "percent": round(100 * samples / total, 1)}
+            for function, samples in leaves.most_common(limit)
+        ]
+
+    def summary(self) -> Dict:
+        """Estado y resumen de la sesión"""
+        end = self.finished_at or time.time()
+        return {
+            "session_id": self.session_id,
+            "pid": self.pid,
+            "status": "running" if self.running else "finished",
+            "elapsed_seconds": round(end - self.started_at, 2) if self.started_at else 0.0,
+            "requests": self.requests,
+            "max_requests": self.max_requests,
+            "duration": self.duration,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "wall_samples": sum(self.wall.values()),
+            "cpu_samples": sum(self.cpu.values()) if self.cpu_supported else None,
+            "top_wall": self.top_functions("wall"),
+            "top_cpu": self.top_functions("cpu") if self.cpu_supported else [],
+            "files": self.files,
+        }
+
+
+def _finish(session: ProfileSession):
+    """Libera la sesión activa al terminar"""
+    global _active
+    with _lock:
+        if _active is session:
+            _active = None
+
+
+def start_profile(
+    duration: Optional[float] = None,
+    max_requests: Optional[int] = None,
+    interval: float = 0.005,
+    output_dir: str = "data/profiles"
+) -> ProfileSession:
+    """
+    Inicia una sesión de profiling en este proceso
+
+    Args:
+        duration: Ventana de tiempo en segundos
+        max_requests: Número de peticiones /chat a perfilar
+        interval: Segundos entre muestras
+        output_dir: Carpeta de salida
+
+    Returns:
+        Sesión iniciada
+
+    Raises:
+        ValueError: Si faltan duration y max_requests o no son positivos
+        RuntimeError: Si ya hay una sesión activa en el proceso
+    """
+    global _active
+    with _lock:
+        if _active is not None:
+            raise RuntimeError(f"Ya hay un profiling en curso: {_active.session_id}")
+        session = ProfileSession(duration, max_requests, interval, output_dir)
+        _active = session
+        _sessions[session.session_id] = session
+        while len(_sessions) > _MAX_SESSIONS:
+            del _sessions[next(iter(_sessions))]
+    session.start()
+    return session
+
+
+def note_request_finished():
+    """Avisa a la sesión activa que terminó una petición /chat"""
+    session = _active
+    if session is not None:
+        session.note_request()
+
+
+def get_session(session_id: str) -> Optional[ProfileSession]:
+    """Sesión por id (se conservan las últimas del proceso)"""
+    return _sessions.get(session_id)
+
+
+def list_sessions() -> List[Dict]:
+    """Resumen corto de las sesiones conocidas del proceso"""
+    return [
+        {"session_id": s.session_id, "status": "running" if s.running else "finished", "requests": s.requests}
+        for s in _sessions.values()
+    ]
+
+
+def install_signal_handler(signum: int = signal.SIGUSR2, duration: float = 30.0, output_dir: str = "data/profiles"):
+    """
+    Perfila una ventana de tiempo al recibir una señal (kill -USR2 <pid del worker>)
+
+    Debe llamarse desde el hilo principal del worker (p. ej. en el lifespan de la app).
+
+    El handler corre en el hilo principal entre dos instrucciones cualquiera,
+    incluso con _lock tomado por ese mismo hilo: solo lanza un hilo que inicia
+    la sesión, así nunca espera un lock.
+
+    Args:
+        signum: Señal a escuchar
+        duration: Segundos de la ventana
+        output_dir: Carpeta donde se guardan los perfiles
+    """
+    def start():
+        try:
+            session = start_profile(duration=duration, output_dir=output_dir)
+            print(f"🔬 Profiling {duration:.0f}s (pid {session.pid}): {session.session_id}")
+        except RuntimeError as e:
+            print(f"⚠️  {str(e)}")
+
+    def handler(received, frame):
+        threading.Thread(target=start, name="profile-signal", daemon=True).start()
+
+    signal.signal(signum, handler)
@@ -0,0 +1,337 @@
+"""
+Tracing por petición con spans anidados y exportación local en JSONL
+
+Cada petición /chat abre una traza (start_trace) y las etapas abren spans
+hijos (span); el span actual vive en un contextvar, así que se propaga al
+threadpool sin pasarlo como argumento. Fuera de una traza, span() no hace
+nada y cuesta una lectura del contextvar.
+
+- Trace.timings() resume la duración por etapa (ms) para el header
+  Server-Timing y el campo timings de ChatResponse
+- Con TRACE_EXPORT_PATH, las trazas muestreadas (TRACE_SAMPLE_RATE) se
+  escriben desde un hilo aparte, una por línea, en el formato JSON de OTLP
+  (resourceSpans/scopeSpans/spans), sin necesidad de un colector externo
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from config import TracingConfig
+
+SERVICE_NAME = "voae-chatbot"
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """Una etapa con inicio, fin y atributos"""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace: "Trace", parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        """Agrega un atributo al span"""
+        self.attributes[key] = value
+
+    def end(self):
+        """Cierra el span y lo registra en su traza"""
+        self.end_ns = time.time_ns()
+        self.trace._add(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """Spans de una petición"""
+
+    def __init__(self, name: str, attributes: Dict, sampled: bool):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.marks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.root = Span(name, self, None, attributes)
+
+    def _add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def mark(self, name: str, seconds: float):
+        """Registra una duración que no es un span (p. ej. tiempo al primer token)"""
+        with self._lock:
+            self.marks[name] = self.marks.get(name, 0.0) + seconds * 1000
+
+    def timings(self) -> Dict[str, float]:
+        """
+        Duración por etapa en ms (suma de los spans con el mismo nombre)
+
+        Returns:
+            Diccionario {etapa: ms}, con "total" para la traza completa
+        """
+        with self._lock:
+            timings = {}
+            for span in self.spans:
+                if span is not self.root:
+                    timings[span.name] = timings.get(span.name, 0.0) + span.duration_ms
+            timings.update(self.marks)
+        timings["total"] = self.root.duration_ms
+        return {name: round(ms, 2) for name, ms in timings.items()}
+
+    def server_timing(self) -> str:
+        """
+        Valor del header Server-Timing
+
+        Returns:
+            Texto "etapa;dur=ms, ..." según la especificación W3C
+        """
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.timings().items())
+
+
+def _otlp_value(value) -> Dict:
+    """Valor de atributo en formato OTLP JSON"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> Dict:
+    """
+    Convierte una traza al formato JSON de OTLP (ExportTraceServiceRequest)
+
+    Args:
+        trace: Traza terminada
+
+    Returns:
+        Diccionario serializable con resourceSpans
+    """
+    spans = []
+    for span in trace.spans:
+        entry = {
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 2 if span is trace.root else 1,  # SERVER / INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in span.attributes.items() if value is not None
+            ],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            entry["parentSpanId"] = span.parent_id
+        spans.append(entry)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "voae.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class JSONLExporter:
+    """Escribe trazas (u otros registros) en un archivo JSONL desde un hilo aparte"""
+
+    def __init__(self, path: str, max_pending: int = 1000, serialize: Callable[[object], Dict] = to_otlp):
+        """
+        Args:
+            path: Archivo de salida (se agrega al final)
+            max_pending: Registros en cola antes de descartar
+            serialize: Convierte cada registro en un diccionario JSON (default: traza a OTLP)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_pending = max_pending
+        self.serialize = serialize
+        self.dropped = 0
+        self._start()
+        atexit.register(self.flush)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        """Cola y escritor propios (también en cada worker tras el fork)"""
+        self._queue = queue.Queue(maxsize=self.max_pending)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def export(self, item):
+        """Encola un registro sin bloquear"""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        trace_queue = self._queue
+        while True:
+            # Lo que se acumuló mientras tanto se escribe en la misma apertura
+            items = [trace_queue.get()]
+            while True:
+                try:
+                    items.append(trace_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Cada registro se marca como hecho pase lo que pase: un registro
+            # que no se puede serializar no mata el hilo ni cuelga flush()
+            done = 0
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for item in items:
+                        try:
+                            f.write(json.dumps(self.serialize(item), ensure_ascii=False) + "\n")
+                        except Exception:
+                            self.dropped += 1
+                        finally:
+                            done += 1
+                            trace_queue.task_done()
+            except Exception:
+                # No se pudo abrir el archivo (o cerrarlo): se pierden los que faltaban
+                self.dropped += len(items) - done
+            finally:
+                for _ in range(len(items) - done):
+                    trace_queue.task_done()
+
+    def flush(self):
+        """Espera a que se escriban los registros pendientes"""
+        self._queue.join()
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> Optional[JSONLExporter]:
+    """
+    Retorna el exportador del proceso
+
+    Returns:
+        JSONLExporter, o None si TRACE_EXPORT_PATH no está configurado
+    """
+    global _exporter
+    if not TracingConfig.EXPORT_PATH:
+        return None
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = JSONLExporter(TracingConfig.EXPORT_PATH)
+    return _exporter
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Optional[Trace]]:
+    """
+    Abre la traza de una petición; su span raíz queda como span actual
+
+    Args:
+        name: Nombre del span raíz (p. ej. "POST /chat")
+        **attributes: Atributos del span raíz
+
+    Returns:
+        Context manager que entrega la traza (None si el tracing está deshabilitado)
+    """
+    if not TracingConfig.ENABLED:
+        yield None
+        return
+
+    trace = Trace(name, attributes, sampled=random.random() < TracingConfig.SAMPLE_RATE)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except Exception as e:
+        trace.root.error = str(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.root.end()
+        if trace.sampled:
+            exporter = get_exporter()
+            if exporter is not None:
+                exporter.export(trace)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Abre un span hijo del span actual
+
+    Args:
+        name: Nombre de la etapa (se usa en Server-Timing: sin espacios ni puntos)
+        **attributes: Atributos del span
+
+    Returns:
+        Context manager que entrega el span (None si no hay traza en curso)
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    current = Span(name, parent.trace, parent.span_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Generador cerrado desde otro contexto (p. ej. por el GC)
+            pass
+        current.end()
+
+
+def current_trace() -> Optional[Trace]:
+    """Traza de la petición en curso, o None"""
+    current = _current_span.get()
+    return current.trace if current is not None else None
+
+
+def set_span_attributes(**attributes):
+    """Agrega atributos al span actual (si hay traza en curso)"""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def record_timing(name: str, seconds: float):
+    """
+    Registra una duración en la traza en curso (si la hay)
+
+    Args:
+        name: Nombre de la medida (p. ej. "llm_ttft")
+        seconds: Duración en segundos
+    """
+    trace = current_trace()
+    if trace is not None:
+        trace.mark(name, seconds)
@@ -0,0 +1,178 @@
+"""
+Engine RAG compartido por todas las sesiones de un proceso
+
+Carga una sola vez los componentes pesados (modelo de embeddings, cliente
+ChromaDB, índices FAQ) y entrega un RAGPipeline por proveedor LLM que todas
+las sesiones reutilizan. El historial de conversación sigue siendo por sesión
+(RAGChatbot).
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import threading
+import time
+from typing import Dict, Iterable, List
+from embeddings.embedder import Embedder
+from embeddings.embedding_service import create_embedder
+from database.chroma_vector_store import ChromaVectorStore
+from database.repository import DocumentRepository
+from ingestion.ingest_docs import DocumentIngestion
+from rag.retriever import DocumentRetriever
+from rag.faq_handler import FAQHandler
+from rag.rag_pipeline import RAGPipeline
+from cache.answer_cache import get_answer_cache
+from cache.warm_answers import load_warm_answers
+from config import EmbeddingConfig
+
+
+class RAGEngine:
+    """Componentes pesados del pipeline, cargados una vez por proceso"""
+
+    # Textos de calentamiento cuando no hay FAQs cargadas
+    WARMUP_TEXTS = [
+        "¿Cómo solicito una beca?",
+        "Horario de atención de la VOAE",
+        "Requisitos para el curso de introducción a la vida universitaria",
+    ]
+
+    def __init__(self, docs_folder: str = "data/docs", embedder: Embedder = None):
+        """
+        Carga los componentes compartidos
+
+        Args:
+            docs_folder: Carpeta con los documentos markdown
+            embedder: Embedder ya cargado (None = el precargado antes del fork, o uno nuevo)
+        """
+        start = time.perf_counter()
+
+        self.docs_folder = docs_folder
+        self.embedder = embedder or _preloaded_embedder or create_embedder()
+        self.storage = ChromaVectorStore()
+        self.repository = DocumentRepository(self.storage)
+        self.ingestion = DocumentIngestion(docs_folder)
+        self.retriever = DocumentRetriever(self.repository, self.embedder, self.storage)
+        self.faq_handler = FAQHandler(self.repository, self.embedder)
+
+        self.load_seconds = time.perf_counter() - start
+        self._pipelines = {}
+        self._lock = threading.Lock()
+
+    def get_pipeline(self, llm_provider: str = "deepseek") -> RAGPipeline:
+        """
+        Obtiene el pipeline compartido de un proveedor LLM
+
+        Args:
+            llm_provider: Proveedor de LLM ("groq" o "deepseek")
+
+        Returns:
+            RAGPipeline que reutiliza los componentes del engine
+        """
+        llm_provider = llm_provider.lower()
+        with self._lock:
+            if llm_provider not in self._pipelines:
+                self._pipelines[llm_provider] = RAGPipeline(
+                    self.docs_folder, llm_provider=llm_provider, engine=self
+                )
+            return self._pipelines[llm_provider]
+
+    def get_pipelines(self) -> List[RAGPipeline]:
+        """Pipelines creados hasta ahora (uno por proveedor)"""
+        with self._lock:
+            return list(self._pipelines.values())
+
+    def warm_up(self, encodes: int = 3, providers: Iterable[str] = ()) -> Dict:
+        """
+        Ejecuta el primer encode (inicialización lazy de kernels de torch), una
+        búsqueda de prueba, carga las respuestas precalculadas en la caché y,
+        opcionalmente, pre-conecta con los proveedores LLM
+
+        Args:
+            encodes: Número de encodes de calentamiento
+            providers: Proveedores LLM a pre-conectar
+
+        Returns:
+            Diccionario con tiempos (segundos) de cada paso
+        """
+        timings = {"load": self.load_seconds, "encodes": []}
+
+        texts = [
+            question
+            for entry in self.faq_handler.faq_entries
+            for question in entry['questions']
+        ] or self.WARMUP_TEXTS
+
+        embedding = None
+        for i in range(max(1, encodes)):
+            start = time.perf_counter()
+            embedding = self.embedder.generate_embedding(texts[i % len(texts)])
+            timings["encodes"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        self.storage.search_similar(embedding, top_k=1)
+        self.faq_handler.lexical_match(texts[0])
+        timings["search"] = time.perf_counter() - start
+
+        timings["warm_answers"] = load_warm_answers(get_answer_cache(), self.repository.get_index_version())
+
+        timings["providers"] = {}
+        for provider in providers:
+            start = time.perf_counter()
+            try:
+                connected = self.get_pipeline(provider).llm_client.warm_up()
+            except Exception as e:
+                print(f"⚠️  No se pudo preparar el proveedor {provider}: {str(e)}")
+                connected = False
+            timings["providers"][provider] = {
+                "connected": connected,
+                "seconds": time.perf_counter() - start
+            }
+
+        print(f"🔥 Warm-up completado: primer encode {timings['encodes'][0]*1000:.0f}ms, "
+              f"búsqueda {timings['search']*1000:.0f}ms, "
+              f"{timings['warm_answers']['loaded']} respuestas precalculadas")
+        return timings
+
+
+_engine = None
+_engine_lock = threading.Lock()
+_preloaded_embedder = None
+
+
+def preload_embedder() -> Embedder:
+    """
+    Carga el modelo de embeddings en el proceso maestro, antes del fork
+
+    Los workers heredan los pesos por copy-on-write en lugar de cargar cada
+    uno su copia. ChromaDB no se precarga: su cliente SQLite no debe cruzar
+    un fork, así que cada worker abre el suyo al crear el engine.
+
+    Con servicio de embeddings externo no hay nada que precargar (y su
+    conexión tampoco debe cruzar el fork).
+
+    Returns:
+        Embedder precargado, o None si se usa el servicio externo
+    """
+    global _preloaded_embedder
+    if EmbeddingConfig.SERVICE_SOCKET:
+        return None
+    if _preloaded_embedder is None:
+        _preloaded_embedder = Embedder()
+    return _preloaded_embedder
+
+
+def get_engine(docs_folder: str = "data/docs") -> RAGEngine:
+    """
+    Retorna el engine del proceso, cargándolo la primera vez
+
+    Args:
+        docs_folder: Carpeta con los documentos markdown
+
+    Returns:
+        Instancia compartida de RAGEngine
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RAGEngine(docs_folder)
+    return _engine
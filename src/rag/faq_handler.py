@@ -5,13 +5,143 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import json
+import math
+import re
+import unicodedata
+import numpy as np
+from collections import Counter, defaultdict
 from typing import List, Tuple, Optional, Dict
 from rag.retriever import DocumentRetriever
+from rag.faq_parser import load_faq_entries, format_faq_entry
 from database.repository import DocumentRepository
 from embeddings.embedder import Embedder
 from config import FAQConfig
 
 
+def normalize_text(text: str) -> str:
+    """
+    Normaliza texto para comparación léxica
+
+    Quita acentos, pasa a minúsculas, elimina puntuación (incluye ¿ y ¡)
+    y colapsa espacios: "¿Cómo solicito una BECA?" -> "como solicito una beca"
+
+    Args:
+        text: Texto original
+
+    Returns:
+        Texto normalizado
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r'[^\w\s]|_', ' ', text.lower())
+    return ' '.join(text.split())
+
+
+def char_trigrams(text: str) -> List[str]:
+    """
+    Obtiene los trigramas de caracteres de un texto normalizado
+
+    Args:
+        text: Texto normalizado
+
+    Returns:
+        Lista de trigramas (con espacios de relleno en los bordes)
+    """
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class FAQLexicalIndex:
+    """
+    Índice léxico sobre las preguntas FAQ (sin embeddings)
+
+    - Coincidencia exacta: mapa hash de pregunta normalizada -> entrada
+    - Coincidencia aproximada: BM25 sobre trigramas de caracteres para
+      rankear candidatos y coeficiente de Dice de trigramas como confianza
+    """
+
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    NUM_CANDIDATES = 3
+
+    def __init__(self, entries: List[Dict]):
+        """
+        Construye el índice
+
+        Args:
+            entries: Entradas FAQ (de load_faq_entries)
+        """
+        self.exact = {}
+        self.docs = []  # (entry, Counter de trigramas)
+        self.postings = defaultdict(list)  # trigrama -> [(doc_idx, tf)]
+
+        for entry in entries:
+            for question in entry['questions']:
+                normalized = normalize_text(question)
+                if not normalized:
+                    continue
+                self.exact.setdefault(normalized, entry)
+
+                grams = Counter(char_trigrams(normalized))
+                doc_idx = len(self.docs)
+                self.docs.append((entry, grams))
+                for gram, tf in grams.items():
+                    self.postings[gram].append((doc_idx, tf))
+
+        num_docs = len(self.docs)
+        lengths = [sum(grams.values()) for _, grams in self.docs]
+        self.doc_lengths = lengths
+        self.avg_length = (sum(lengths) / num_docs) if num_docs else 0.0
+        self.idf = {
+            gram: math.log(1 + (num_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for gram, posting in self.postings.items()
+        }
+
+    def search(self, query: str) -> Optional[Tuple[Dict, float, str]]:
+        """
+        Busca la pregunta FAQ más parecida
+
+        Args:
+            query: Pregunta del usuario
+
+        Returns:
+            Tupla (entry, score 0-1, método 'exact'|'fuzzy') o None
+        """
+        normalized = normalize_text(query)
+        if not normalized or not self.docs:
+            return None
+
+        if normalized in self.exact:
+            return self.exact[normalized], 1.0, 'exact'
+
+        query_grams = Counter(char_trigrams(normalized))
+
+        # BM25: rankear variantes de pregunta por trigramas compartidos
+        scores = defaultdict(float)
+        for gram in query_grams:
+            for doc_idx, tf in self.postings.get(gram, ()):
+                norm = self.BM25_K1 * (1 - self.BM25_B + self.BM25_B * self.doc_lengths[doc_idx] / self.avg_length)
+                scores[doc_idx] += self.idf[gram] * tf * (self.BM25_K1 + 1) / (tf + norm)
+
+        if not scores:
+            return None
+
+        candidates = sorted(scores, key=scores.get, reverse=True)[:self.NUM_CANDIDATES]
+
+        # Confianza: Dice sobre multiconjuntos de trigramas (comparable entre consultas)
+        query_total = sum(query_grams.values())
+        best = None
+        for doc_idx in candidates:
+            entry, grams = self.docs[doc_idx]
+            overlap = sum((query_grams & grams).values())
+            dice = 2 * overlap / (query_total + self.doc_lengths[doc_idx])
+            if best is None or dice > best[1]:
+                best = (entry, dice)
+
+        return best[0], best[1], 'fuzzy'
+
+
 class FAQHandler:
     """
     Maneja la lógica de FAQs con sistema de umbrales dobles:
@@ -32,14 +162,202 @@ class FAQHandler:
         """
         self.retriever = DocumentRetriever(repository, embedder, repository.storage)
         self.repository = repository
+        self.embedder = embedder
+
+        # Entradas pregunta/respuesta para respuestas directas (sin LLM)
+        self.faq_entries = load_faq_entries()
+        self.entries_by_id = {entry['entry_id']: entry for entry in self.faq_entries}
+        self.lexical_index = FAQLexicalIndex(self.faq_entries)
+        self._question_embeddings = None  # Se calculan en la primera respuesta directa
+        self.rewordings = self._load_rewordings()
+
+    def _load_rewordings(self) -> Dict[str, str]:
+        """
+        Carga las reformulaciones amigables precomputadas offline
+
+        Returns:
+            Diccionario {entry_id: respuesta reformulada} (vacío si no hay archivo)
+        """
+        path = Path(FAQConfig.DIRECT_ANSWER_REWORDINGS_PATH)
+        if not FAQConfig.DIRECT_ANSWER_USE_REWORDING or not path.exists():
+            return {}
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  No se pudieron cargar las reformulaciones FAQ: {str(e)}")
+            return {}
+
+    def _get_question_embeddings(self) -> List[Tuple[Dict, np.ndarray]]:
+        """
+        Obtiene (y cachea) los embeddings de las preguntas de cada entrada
 
-    def classify_query(self, query: str, top_k: int = 5) -> Dict:
+        Returns:
+            Lista de tuplas (entry, matriz de embeddings de sus variantes)
+        """
+        if self._question_embeddings is None:
+            questions = [q for entry in self.faq_entries for q in entry['questions']]
+            matrix = self.embedder.generate_embeddings_batch(questions) if questions else []
+
+            self._question_embeddings = []
+            offset = 0
+            for entry in self.faq_entries:
+                n = len(entry['questions'])
+                self._question_embeddings.append((entry, matrix[offset:offset + n]))
+                offset += n
+
+        return self._question_embeddings
+
+    def get_direct_answer(
+        self,
+        query: str,
+        faq_results: List[Tuple[str, str, float]],
+        best_similarity: float,
+        query_embedding: np.ndarray = None
+    ) -> Optional[Dict]:
+        """
+        Busca la respuesta almacenada de la FAQ que coincide con la consulta
+
+        Solo aplica a matches fuertes: devuelve el texto de la FAQ (o su
+        reformulación precomputada) sin llamar al LLM.
+
+        Args:
+            query: Pregunta del usuario
+            faq_results: Resultados de FAQs de classify_query
+            best_similarity: Mejor similitud FAQ de classify_query
+            query_embedding: Embedding ya calculado de la consulta (opcional)
+
+        Returns:
+            Diccionario con entry, answer y similarity, o None si no hay
+            una entrada única con confianza suficiente
+        """
+        if not faq_results or not self.faq_entries:
+            return None
+
+        # Índice por entrada: el mejor resultado ya identifica la FAQ
+        best_filename, _, best_score = faq_results[0]
+        if best_filename in self.entries_by_id:
+            entry = self.entries_by_id[best_filename]
+            return {
+                'entry': entry,
+                'answer': self.rewordings.get(entry['entry_id']) or entry['answer'],
+                'similarity': best_score
+            }
+
+        # Índice antiguo de archivo completo: ubicar la entrada dentro del archivo
+        sources = {filename for filename, _, _ in faq_results}
+        candidates = [entry for entry in self.faq_entries if entry['source'] in sources]
+
+        if not candidates:
+            return None
+
+        if len(candidates) == 1:
+            entry, similarity = candidates[0], best_similarity
+        else:
+            # Varias entradas en el archivo: desempatar por similitud con cada pregunta
+            if query_embedding is None:
+                query_embedding = self.embedder.generate_embedding(query)
+            scored = [
+                (entry, float(np.max(embeddings @ query_embedding)))
+                for entry, embeddings in self._get_question_embeddings()
+                if entry['source'] in sources and len(embeddings)
+            ]
+            if not scored:
+                return None
+            entry, similarity = max(scored, key=lambda item: item[1])
+
+            if similarity < FAQConfig.HIGH_THRESHOLD:
+                return None
+
+        answer = self.rewordings.get(entry['entry_id']) or entry['answer']
+
+        return {
+            'entry': entry,
+            'answer': answer,
+            'similarity': similarity
+        }
+
+    def build_rewordings(self, llm_client, output_path: str = None) -> Dict[str, str]:
+        """
+        Genera offline reformulaciones amigables de cada respuesta FAQ
+
+        Args:
+            llm_client: Cliente LLM con método simple_chat
+            output_path: Archivo JSON de salida (None = usar config)
+
+        Returns:
+            Diccionario {entry_id: respuesta reformulada}
+        """
+        rewordings = {}
+
+        for entry in self.faq_entries:
+            prompt = (
+                "Eres el Asistente Virtual de VOAE (UNAH). Reescribe la siguiente respuesta "
+                "oficial con un saludo breve y un tono cercano, usando el \"tú\". "
+                "Conserva EXACTAMENTE todos los datos, pasos, enlaces y fechas; no agregues "
+                "información nueva. Devuelve solo la respuesta reescrita.\n\n"
+                f"Pregunta: {entry['questions'][0]}\n\n"
+                f"Respuesta oficial:\n{entry['answer']}"
+            )
+            try:
+                rewordings[entry['entry_id']] = llm_client.simple_chat(
+                    message=prompt,
+                    temperature=FAQConfig.TEMP_FAQ_ONLY
+                )
+                print(f"✓ Reformulada: {entry['entry_id']}")
+            except Exception as e:
+                print(f"❌ Error reformulando {entry['entry_id']}: {str(e)}")
+
+        path = Path(output_path or FAQConfig.DIRECT_ANSWER_REWORDINGS_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rewordings, f, ensure_ascii=False, indent=2)
+
+        self.rewordings = rewordings
+        return rewordings
+
+    def lexical_match(self, query: str) -> Optional[Dict]:
+        """
+        Busca la consulta en el índice léxico de preguntas FAQ (sin embeddings)
+
+        Args:
+            query: Pregunta del usuario
+
+        Returns:
+            Clasificación con el mismo formato que classify_query si hay una
+            coincidencia confiable (>= FAQConfig.LEXICAL_THRESHOLD), o None
+        """
+        result = self.lexical_index.search(query)
+        if result is None:
+            return None
+
+        entry, score, method = result
+        if score < FAQConfig.LEXICAL_THRESHOLD:
+            return None
+
+        return {
+            'match_type': 'high',
+            'faq_results': [(entry['entry_id'], format_faq_entry(entry), score)],
+            'best_similarity': score,
+            'match_method': f"lexical_{method}"
+        }
+
+    def classify_query(
+        self,
+        query: str,
+        top_k: int = 5,
+        query_embedding: np.ndarray = None,
+        neighbors: Optional[List[Tuple[int, str, str, float]]] = None
+    ) -> Dict:
         """
         Clasifica la consulta según similitud con FAQs
 
         Args:
             query: Pregunta del usuario
             top_k: Número máximo de FAQs a recuperar
+            query_embedding: Embedding ya calculado de la consulta (opcional)
+            neighbors: Vecinos ya buscados en lote (DocumentRetriever.search_batch)
 
         Returns:
             Diccionario con:
@@ -48,18 +366,23 @@ class FAQHandler:
             - best_similarity: Mejor score de similitud
         """
         # Buscar en TODOS los documentos primero
+        # (las FAQs se indexan por variante de pregunta: buscar más para cubrirlas)
         all_results = self.retriever.retrieve_with_threshold(
             query=query,
             threshold=FAQConfig.MEDIUM_THRESHOLD,
-            max_documents=top_k * 2  # Buscar más para tener suficientes FAQs
+            max_documents=top_k * 4,
+            query_embedding=query_embedding,
+            neighbors=neighbors
         )
 
-        # Filtrar SOLO los que están en carpeta faq/
-        faq_results = [
-            (filename, content, score)
-            for filename, content, score in all_results
-            if filename.startswith('faq/')
-        ]
+        # Filtrar SOLO los que están en carpeta faq/, una vez por entrada
+        # (la primera aparición es la variante con mayor similitud)
+        faq_results = []
+        seen_entries = set()
+        for filename, content, score in all_results:
+            if filename.startswith('faq/') and filename not in seen_entries:
+                seen_entries.add(filename)
+                faq_results.append((filename, content, score))
 
         # Limitar a top_k
         faq_results = faq_results[:top_k]
@@ -68,7 +391,8 @@ class FAQHandler:
             return {
                 'match_type': 'low',
                 'faq_results': [],
-                'best_similarity': 0.0
+                'best_similarity': 0.0,
+                'match_method': 'dense'
             }
 
         best_similarity = faq_results[0][2]  # (filename, content, similarity)
@@ -84,7 +408,8 @@ class FAQHandler:
         return {
             'match_type': match_type,
             'faq_results': faq_results,
-            'best_similarity': best_similarity
+            'best_similarity': best_similarity,
+            'match_method': 'dense'
         }
 
     def get_context_for_llm(
@@ -0,0 +1,127 @@
+"""
+Parser de archivos FAQ en markdown a entradas pregunta/respuesta
+
+Formato esperado (ver README, sección "Formato de FAQs"):
+
+    ## Pregunta 1: Título descriptivo
+
+    **Pregunta:** ¿Pregunta principal? / ¿Variante 1? / ¿Variante 2?
+
+    **Respuesta:** Respuesta clara y concisa.
+
+    ---
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import re
+from typing import List, Dict
+from config import IngestionConfig
+
+
+_HEADER_RE = re.compile(r'^##\s+(.*)$', re.MULTILINE)
+_NUMBER_RE = re.compile(r'^Pregunta\s+(\d+)\s*:?\s*(.*)$', re.IGNORECASE)
+_QUESTION_RE = re.compile(r'\*\*Pregunta:\*\*\s*(.+)')
+_ANSWER_RE = re.compile(r'\*\*Respuesta:\*\*\s*(.*)', re.DOTALL)
+
+
+def parse_faq_markdown(text: str, source: str) -> List[Dict]:
+    """
+    Divide un archivo FAQ en entradas individuales
+
+    Args:
+        text: Contenido markdown del archivo
+        source: Ruta relativa del archivo (ej: 'faq/faq_servicios.md')
+
+    Returns:
+        Lista de diccionarios con:
+        - entry_id: Identificador estable ('faq/faq_servicios.md#1')
+        - source: Archivo de origen
+        - title: Título de la entrada
+        - questions: Pregunta principal y variantes
+        - answer: Texto de la respuesta
+    """
+    text = text.replace('\r\n', '\n')
+    headers = list(_HEADER_RE.finditer(text))
+    entries = []
+
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        block = text[header.end():end]
+
+        title = header.group(1).strip()
+        number = str(i + 1)
+        number_match = _NUMBER_RE.match(title)
+        if number_match:
+            number = number_match.group(1)
+            title = number_match.group(2).strip() or title
+
+        question_match = _QUESTION_RE.search(block)
+        answer_match = _ANSWER_RE.search(block)
+        if not answer_match:
+            continue
+
+        questions = []
+        if question_match:
+            questions = [q.strip() for q in question_match.group(1).split(' / ') if q.strip()]
+        if not questions:
+            questions = [title]
+
+        # La respuesta termina en el separador '---' (si existe)
+        answer = re.split(r'^\s*---\s*$', answer_match.group(1), maxsplit=1, flags=re.MULTILINE)[0]
+        answer = re.sub(r'\n{3,}', '\n\n', answer).strip()
+
+        entries.append({
+            'entry_id': f"{source}#{number}",
+            'source': source,
+            'title': title,
+            'questions': questions,
+            'answer': answer,
+        })
+
+    return entries
+
+
+def load_faq_entries(faq_folder: str = None, docs_folder: str = None) -> List[Dict]:
+    """
+    Carga y parsea todos los archivos FAQ de una carpeta
+
+    Args:
+        faq_folder: Carpeta de FAQs (None = usar config)
+        docs_folder: Carpeta raíz de documentos, para rutas relativas (None = usar config)
+
+    Returns:
+        Lista de entradas FAQ en orden estable
+    """
+    faq_path = Path(faq_folder or IngestionConfig.FAQ_FOLDER)
+    docs_path = Path(docs_folder or IngestionConfig.DOCS_FOLDER)
+
+    if not faq_path.exists():
+        return []
+
+    entries = []
+    for file_path in sorted(faq_path.rglob('*')):
+        if not file_path.is_file() or file_path.suffix.lower() not in IngestionConfig.ALLOWED_EXTENSIONS:
+            continue
+        try:
+            source = str(file_path.relative_to(docs_path))
+        except ValueError:
+            source = file_path.name
+        entries.extend(parse_faq_markdown(file_path.read_text(encoding='utf-8'), source))
+
+    return entries
+
+
+def format_faq_entry(entry: Dict) -> str:
+    """
+    Formatea una entrada FAQ como contexto compacto para el LLM
+
+    Args:
+        entry: Entrada FAQ
+
+    Returns:
+        Texto con pregunta(s) y respuesta
+    """
+    questions = " / ".join(entry['questions'])
+    return f"Pregunta: {questions}\n\nRespuesta: {entry['answer']}"
@@ -6,40 +6,69 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import os
-from typing import List, Optional
-from embeddings.embedder import Embedder
+import copy
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from embeddings.embedding_service import create_embedder
 from database.chroma_vector_store import ChromaVectorStore
 from database.repository import DocumentRepository
 from ingestion.ingest_docs import DocumentIngestion
 from llm.deepseek_client import DeepSeekClient
 from llm.groq_client import GroqClient
+from llm.stub_client import StubLLMClient
 from rag.retriever import DocumentRetriever
-from rag.faq_handler import FAQHandler
+from rag.faq_handler import FAQHandler, normalize_text
+from cache.answer_cache import AnswerCache, get_answer_cache
+from cache.semantic_cache import get_semantic_cache
+from cache.single_flight import get_single_flight
+from config import FAQConfig, IngestionConfig
+from deadline import Deadline, DeadlineExceeded
+from observability.log import get_logger
+from observability.metrics import CACHE_HITS, LLM_ERRORS, QUERIES, STAGE_SECONDS, time_stage
+from observability.tracing import record_timing, set_span_attributes
+
+logger = get_logger("rag.pipeline")
 
 
 class RAGPipeline:
     """Pipeline completo para el sistema RAG"""
 
-    def __init__(self, docs_folder: str = "data/docs", llm_provider: str = "deepseek"):
+    # FAQs candidatas que se recuperan al clasificar una consulta
+    FAQ_TOP_K = 5
+
+    def __init__(self, docs_folder: str = "data/docs", llm_provider: str = "deepseek", engine=None):
         """
         Inicializa el pipeline RAG con ChromaDB
 
         Args:
             docs_folder: Carpeta con los documentos markdown
-            llm_provider: Proveedor de LLM ("groq" o "deepseek")
+            llm_provider: Proveedor de LLM ("groq", "deepseek" o "stub")
+            engine: RAGEngine con los componentes ya cargados (None = cargar propios)
         """
         print("Inicializando pipeline RAG...")
 
-        # Inicializar componentes
-        self.embedder = Embedder()
-        self.storage = ChromaVectorStore()
+        # Inicializar componentes (o reutilizar los del engine compartido)
+        if engine is not None:
+            self.embedder = engine.embedder
+            self.storage = engine.storage
+            self.repository = engine.repository
+            self.ingestion = engine.ingestion
+            self.retriever = engine.retriever
+            self.faq_handler = engine.faq_handler
+        else:
+            self.embedder = create_embedder()
+            self.storage = ChromaVectorStore()
+            self.repository = DocumentRepository(self.storage)
+            self.ingestion = DocumentIngestion(docs_folder)
+            self.retriever = DocumentRetriever(self.repository, self.embedder, self.storage)
+            self.faq_handler = FAQHandler(self.repository, self.embedder)
         self.storage_type = "chroma"
         print("🔷 Usando ChromaDB para almacenamiento vectorial")
 
-        self.repository = DocumentRepository(self.storage)
-        self.ingestion = DocumentIngestion(docs_folder)
-        self.retriever = DocumentRetriever(self.repository, self.embedder, self.storage)
-        self.faq_handler = FAQHandler(self.repository, self.embedder)
+        self.answer_cache = get_answer_cache()  # Compartida entre sesiones del proceso
+        self.semantic_cache = get_semantic_cache(self.embedder.get_embedding_dimension())
+        self.single_flight = get_single_flight()
 
         # Inicializar LLM según el proveedor
         self.llm_provider = llm_provider.lower()
@@ -49,8 +78,11 @@ class RAGPipeline:
         elif self.llm_provider == "deepseek":
             self.llm_client = DeepSeekClient()
             print("🔷 Usando DeepSeek API")
+        elif self.llm_provider == "stub":
+            self.llm_client = StubLLMClient()
+            print("🧪 Usando proveedor LLM de prueba (stub, sin red)")
         else:
-            raise ValueError(f"LLM provider no soportado: {llm_provider}. Usa 'groq' o 'deepseek'")
+            raise ValueError(f"LLM provider no soportado: {llm_provider}. Usa 'groq', 'deepseek' o 'stub'")
 
         print("Pipeline RAG inicializado exitosamente\n")
 
@@ -68,8 +100,9 @@ class RAGPipeline:
 
         # Cargar y procesar documentos
         documents = self.ingestion.process_documents(chunk_documents=chunk_documents)
+        faq_items = self.ingestion.process_faq_entries() if IngestionConfig.SPLIT_FAQ_ENTRIES else []
 
-        if not documents:
+        if not documents and not faq_items:
             print("No hay documentos para procesar")
             return
 
@@ -100,6 +133,12 @@ class RAGPipeline:
                 print(f"❌ Error procesando {filename}: {str(e)}")
                 continue
 
+        # Procesar FAQs por entrada
+        if faq_items:
+            faq_processed, faq_skipped = self._ingest_faq_entries(faq_items, skip_existing)
+            processed_count += faq_processed
+            skipped_count += faq_skipped
+
         print("\n" + "=" * 60)
         print(f"INGESTION COMPLETADA")
         print(f"Documentos procesados: {processed_count}")
@@ -107,16 +146,292 @@ class RAGPipeline:
         print(f"Total en base de datos: {self.repository.count_documents()}")
         print("=" * 60)
 
+    def _ingest_faq_entries(self, faq_items: List[dict], skip_existing: bool) -> Tuple[int, int]:
+        """
+        Indexa las entradas FAQ individuales (una por variante de pregunta)
+
+        Reemplaza los documentos FAQ de archivo completo de ingestiones previas.
+
+        Args:
+            faq_items: Resultado de DocumentIngestion.process_faq_entries
+            skip_existing: Si es True, no vuelve a indexar entradas ya existentes
+
+        Returns:
+            Tupla (procesados, saltados)
+        """
+        # Eliminar el índice antiguo de archivo completo (ej: 'faq/faq_servicios.md')
+        for source in sorted({item['metadata']['source'] for item in faq_items}):
+            if self.repository.document_exists(source):
+                print(f"\n♻️  Reemplazando '{source}' por entradas individuales")
+                self.repository.delete_documents_by_filename(source)
+
+        pending = [
+            item for item in faq_items
+            if not (skip_existing and self.repository.document_exists(item['filename'], doc_id=item['doc_id']))
+        ]
+        skipped = len(faq_items) - len(pending)
+
+        if not pending:
+            return 0, skipped
+
+        print(f"\n📝 Procesando {len(pending)} entradas FAQ...")
+        embeddings = self.embedder.generate_embeddings_batch([item['embed_text'] for item in pending])
+
+        processed = 0
+        for item, embedding in zip(pending, embeddings):
+            try:
+                self.repository.insert_document(
+                    item['filename'],
+                    item['content'],
+                    self.embedder.embedding_to_bytes(embedding),
+                    doc_id=item['doc_id'],
+                    metadata=item['metadata']
+                )
+                processed += 1
+            except Exception as e:
+                print(f"❌ Error procesando {item['doc_id']}: {str(e)}")
+
+        return processed, skipped
+
+    def answer_cache_key(
+        self,
+        question: str,
+        top_k: int = 3,
+        max_tokens: int = 2000,
+        enable_faq: bool = True
+    ) -> str:
+        """
+        Construye la llave de la caché de respuestas para una consulta
+
+        La temperatura no forma parte de la llave: query_with_faq la ajusta
+        según el tipo de contexto, ignorando la recibida.
+
+        Args:
+            question: Pregunta del usuario
+            top_k: Número de documentos relevantes a recuperar
+            max_tokens: Máximo de tokens en la respuesta
+            enable_faq: Si es True, busca en FAQs primero
+
+        Returns:
+            Llave de caché
+        """
+        return AnswerCache.make_key(
+            normalized_question=normalize_text(question),
+            provider=self.llm_provider,
+            model=self.llm_client.model,
+            params={"top_k": top_k, "max_tokens": max_tokens, "enable_faq": enable_faq},
+            index_version=self.repository.get_index_version()
+        )
+
+    def _semantic_namespace(self, top_k: int, max_tokens: int, enable_faq: bool) -> str:
+        """
+        Namespace de la caché semántica: todo lo que define la llave exacta salvo pregunta y versión
+
+        Returns:
+            Hash del proveedor/modelo/parámetros
+        """
+        return AnswerCache.make_key(
+            normalized_question="",
+            provider=self.llm_provider,
+            model=self.llm_client.model,
+            params={"top_k": top_k, "max_tokens": max_tokens, "enable_faq": enable_faq},
+            index_version=""
+        )
+
+    def _embed_query(
+        self,
+        question: str,
+        namespace: str,
+        index_version: str,
+        deadline: Optional[Deadline] = None,
+        precomputed: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, Optional[dict]]:
+        """
+        Genera el embedding de la consulta y lo busca en la caché semántica
+
+        Args:
+            question: Pregunta del usuario
+            namespace: Namespace de la caché semántica
+            index_version: Versión actual del índice
+            deadline: Deadline de la petición
+            precomputed: Embedding ya calculado (p. ej. en lote); solo se busca en la caché
+
+        Returns:
+            Tupla (embedding, resultado cacheado o None)
+        """
+        if precomputed is not None:
+            query_embedding = precomputed
+        else:
+            if deadline is not None:
+                deadline.check("embedding")
+            with time_stage("embed"):
+                query_embedding = self.embedder.generate_embedding(question)
+
+        if self.semantic_cache is not None:
+            hit = self.semantic_cache.lookup(query_embedding, namespace, index_version)
+            if hit is not None:
+                cached, similarity = hit
+                logger.info("query.cache_hit", cache="semantic", similarity=similarity)
+                cached["cache_hit"] = "semantic"
+                CACHE_HITS.inc(cache="semantic")
+                cached["semantic_similarity"] = similarity
+                cached["llm_usage"] = None
+                return query_embedding, cached
+
+        return query_embedding, None
+
+    def _record_semantic(
+        self,
+        query_embedding: Optional[np.ndarray],
+        result: dict,
+        namespace: str,
+        index_version: str
+    ):
+        """
+        Guarda una respuesta generada en la caché semántica
+
+        Args:
+            query_embedding: Embedding de la pregunta (None si se resolvió sin embedding)
+            result: Resultado de la consulta
+            namespace: Namespace de la caché semántica
+            index_version: Versión del índice usada
+        """
+        if self.semantic_cache is None:
+            return
+        if query_embedding is None:
+            self.semantic_cache.bypass()
+            return
+        self.semantic_cache.record(query_embedding, result, namespace, index_version)
+
+    def prefetch_neighbors(self, query_embeddings: np.ndarray, top_k: int = 3) -> List[list]:
+        """
+        Busca en una sola llamada los vecinos que query_with_faq usará para cada consulta
+
+        Cubre la clasificación FAQ (FAQ_TOP_K * 4 documentos, el doble antes de
+        filtrar por umbral) y la búsqueda de documentos (top_k * 2); pasados como
+        neighbors evitan una búsqueda por consulta.
+
+        Args:
+            query_embeddings: Matriz (n, dim) con un embedding por consulta
+            top_k: El top_k que se pasará a query_with_faq
+
+        Returns:
+            Una lista de vecinos por consulta
+        """
+        return self.retriever.search_batch(query_embeddings, top_k=max(self.FAQ_TOP_K * 4 * 2, top_k * 2))
+
     def query_with_faq(
         self,
         question: str,
         top_k: int = 3,
         temperature: float = 0.7,
         max_tokens: int = 2000,
-        enable_faq: bool = True
-    ) -> dict:
+        enable_faq: bool = True,
+        degradation: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        neighbors: Optional[list] = None
+    ) -> Optional[dict]:
+        """
+        Realiza una consulta con sistema FAQ híbrido, con caché exacta de respuestas
+
+        Args:
+            question: Pregunta del usuario
+            top_k: Número de documentos relevantes a recuperar
+            temperature: Temperatura base (se ajusta según contexto)
+            max_tokens: Máximo de tokens en la respuesta
+            enable_faq: Si es True, busca en FAQs primero
+            degradation: Modo degradado bajo carga (None = normal):
+                - "faq_direct": solo respuestas sin LLM (cachés y FAQ directa)
+                - "cache_only": solo la caché exacta
+            deadline: Deadline de la petición; cada etapa usa el tiempo restante
+            query_embedding: Embedding de la pregunta ya calculado (modo lote)
+            neighbors: Vecinos ya buscados con prefetch_neighbors (modo lote)
+
+        Returns:
+            Diccionario con la respuesta, metadatos y tipo de match, o None si
+            el modo degradado no permite responder la consulta
+
+        Raises:
+            DeadlineExceeded: Si se agota el deadline o la petición se cancela
+        """
+        if degradation is None and self.answer_cache is None and self.single_flight is None:
+            result = self._query_with_faq_uncached(
+                question, top_k, temperature, max_tokens, enable_faq, deadline=deadline,
+                query_embedding=query_embedding, neighbors=neighbors
+            )
+            _count_query(result)
+            return result
+
+        cache_key = self.answer_cache_key(question, top_k, max_tokens, enable_faq)
+
+        if self.answer_cache is not None:
+            cached = self.answer_cache.get(cache_key)
+            if cached is not None:
+                logger.info("query.cache_hit", cache="exact")
+                cached["cache_hit"] = "exact"
+                cached["llm_usage"] = None
+                CACHE_HITS.inc(cache="exact")
+                _count_query(cached)
+                return cached
+
+        if degradation == "cache_only":
+            return None
+        if degradation == "faq_direct":
+            # Sin coalescencia: un None degradado no debe compartirse con consultas normales
+            result = self._query_with_faq_uncached(
+                question, top_k, temperature, max_tokens, enable_faq, allow_llm=False, deadline=deadline,
+                query_embedding=query_embedding, neighbors=neighbors
+            )
+            _count_query(result)
+            return result
+
+        def compute() -> dict:
+            result = self._query_with_faq_uncached(
+                question, top_k, temperature, max_tokens, enable_faq, deadline=deadline,
+                query_embedding=query_embedding, neighbors=neighbors
+            )
+            # Solo se cachean respuestas completas
+            if self.answer_cache is not None and result.get("error") is None:
+                self.answer_cache.set(cache_key, result)
+            return result
+
+        if self.single_flight is None:
+            result = compute()
+            _count_query(result)
+            return result
+
+        # Consultas idénticas concurrentes esperan al mismo cálculo
+        try:
+            result, shared = self.single_flight.do(
+                cache_key, compute, timeout=deadline.timeout_for("coalesced") if deadline else None
+            )
+        except TimeoutError:
+            raise DeadlineExceeded("coalesced")
+        if shared:
+            logger.info("query.cache_hit", cache="coalesced")
+            result = copy.deepcopy(result)
+            result["coalesced"] = True
+            result["llm_usage"] = None
+            CACHE_HITS.inc(cache="coalesced")
+
+        _count_query(result)
+        return result
+
+    def _query_with_faq_uncached(
+        self,
+        question: str,
+        top_k: int = 3,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        enable_faq: bool = True,
+        allow_llm: bool = True,
+        deadline: Optional[Deadline] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        neighbors: Optional[list] = None
+    ) -> Optional[dict]:
         """
-        Realiza una consulta con sistema FAQ híbrido (umbrales 90%/80%)
+        Realiza una consulta con sistema FAQ híbrido (umbrales 75%/65%)
 
         Args:
             question: Pregunta del usuario
@@ -124,14 +439,17 @@ class RAGPipeline:
             temperature: Temperatura base (se ajusta según contexto)
             max_tokens: Máximo de tokens en la respuesta
             enable_faq: Si es True, busca en FAQs primero
+            allow_llm: Si es False, solo responde desde cachés o FAQ directa
+            deadline: Deadline de la petición (se verifica antes de cada etapa)
+            query_embedding: Embedding de la pregunta ya calculado (modo lote)
+            neighbors: Vecinos ya buscados con prefetch_neighbors (modo lote)
 
         Returns:
-            Diccionario con la respuesta, metadatos y tipo de match
+            Diccionario con la respuesta, metadatos y tipo de match, o None si
+            la consulta requiere el LLM y allow_llm es False
         """
-        print("=" * 60)
-        print("PROCESANDO CONSULTA CON SISTEMA FAQ HÍBRIDO")
-        print("=" * 60)
-        print(f"Pregunta: {question}\n")
+        start = time.perf_counter()
+        logger.debug("query.start", question=question, top_k=top_k, enable_faq=enable_faq)
 
         # Verificar que haya documentos
         doc_count = self.repository.count_documents()
@@ -143,32 +461,87 @@ class RAGPipeline:
                 "error": "No documents in database"
             }
 
-        print(f"Documentos en base de datos: {doc_count}")
+        logger.debug("query.documents", count=doc_count)
+
+        # El embedding de la consulta se calcula una sola vez (si hace falta) y se reutiliza;
+        # en modo lote llega precalculado y solo falta buscarlo en la caché semántica
+        precomputed, query_embedding = query_embedding, None
+        namespace = self._semantic_namespace(top_k, max_tokens, enable_faq)
+        index_version = self.repository.get_index_version()
 
         # PASO 1: Clasificar la consulta según FAQs
+        match_method = None
         if enable_faq and self.faq_handler.should_use_faq(question):
-            print("\n🔍 Buscando en FAQs...")
-            faq_classification = self.faq_handler.classify_query(question, top_k=5)
+            # PASO 1a: Índice léxico (sin embedding); si hay match confiable, se omite la búsqueda densa
+            faq_classification = None
+            if FAQConfig.ENABLE_LEXICAL_MATCH:
+                with time_stage("faq_classify"):
+                    faq_classification = self.faq_handler.lexical_match(question)
+
+            if faq_classification is None:
+                query_embedding, cached = self._embed_query(question, namespace, index_version, deadline, precomputed)
+                if cached is not None:
+                    return cached
+
+                if deadline is not None:
+                    deadline.check("faq_classification")
+                with time_stage("faq_classify"):
+                    faq_classification = self.faq_handler.classify_query(
+                        question, top_k=self.FAQ_TOP_K, query_embedding=query_embedding, neighbors=neighbors
+                    )
+
             match_type = faq_classification['match_type']
             faq_results = faq_classification['faq_results']
             best_similarity = faq_classification['best_similarity']
+            match_method = faq_classification['match_method']
 
-            print(f"Match type: {match_type.upper()}")
-            print(f"Best FAQ similarity: {best_similarity:.2%}")
+            logger.debug("query.faq_classified", match_type=match_type, method=match_method,
+                         best_similarity=best_similarity)
         else:
             match_type = 'low'
             faq_results = []
             best_similarity = 0.0
-            print("\n⏭️  Saltando búsqueda en FAQs (disabled o comando especial)")
+            logger.debug("query.faq_skipped")
+
+        # PASO 1b: Match fuerte → respuesta FAQ almacenada, sin llamar al LLM
+        if match_type == 'high' and FAQConfig.ENABLE_DIRECT_ANSWER:
+            direct = self.faq_handler.get_direct_answer(
+                question, faq_results, best_similarity, query_embedding=query_embedding
+            )
+            if direct:
+                result = self._build_direct_faq_result(direct, best_similarity)
+                result["faq_match_method"] = match_method
+                logger.info("query.answered", match_type="high", context_type="faq_direct",
+                            faq_entry=direct['entry']['entry_id'], method=match_method,
+                            elapsed_ms=(time.perf_counter() - start) * 1000)
+                self._record_semantic(query_embedding, result, namespace, index_version)
+                return result
+
+        # Modo degradado: lo que sigue requiere el LLM; solo queda la caché semántica
+        if not allow_llm:
+            if query_embedding is None:
+                query_embedding, cached = self._embed_query(question, namespace, index_version, deadline, precomputed)
+                if cached is not None:
+                    return cached
+            logger.info("query.degraded_skip", match_type=match_type)
+            return None
 
         # PASO 2: Obtener documentos si es necesario (EXCLUIR FAQs)
         doc_results = []
         if match_type in ['medium', 'low']:
-            print(f"\n📄 Buscando en documentos generales (top-{top_k})...")
-            all_docs = self.retriever.retrieve_relevant_documents(
-                query=question,
-                top_k=top_k * 2  # Buscar más para compensar filtrado
-            )
+            if query_embedding is None:
+                query_embedding, cached = self._embed_query(question, namespace, index_version, deadline, precomputed)
+                if cached is not None:
+                    return cached
+
+            with time_stage("doc_search"):
+                all_docs = self.retriever.retrieve_relevant_documents(
+                    query=question,
+                    top_k=top_k * 2,  # Buscar más para compensar filtrado
+                    query_embedding=query_embedding,
+                    deadline=deadline,
+                    neighbors=neighbors
+                )
 
             # Filtrar SOLO documentos que NO son FAQs
             doc_results = [
@@ -181,12 +554,13 @@ class RAGPipeline:
             doc_results = doc_results[:top_k]
 
         # PASO 3: Preparar contexto para el LLM
-        context_documents, context_type = self.faq_handler.get_context_for_llm(
-            query=question,
-            match_type=match_type,
-            faq_results=faq_results,
-            doc_results=doc_results
-        )
+        with time_stage("context_build"):
+            context_documents, context_type = self.faq_handler.get_context_for_llm(
+                query=question,
+                match_type=match_type,
+                faq_results=faq_results,
+                doc_results=doc_results
+            )
 
         if not context_documents:
             return {
@@ -199,24 +573,15 @@ class RAGPipeline:
         # PASO 4: Ajustar temperatura según contexto
         adjusted_temperature = self.faq_handler.get_temperature_for_context(context_type)
 
-        print(f"\n🎯 Tipo de contexto: {context_type}")
-        print(f"🌡️  Temperature ajustada: {adjusted_temperature}")
-        print(f"\n🤖 Generando respuesta con {self.llm_provider.upper()}...\n")
+        logger.debug("query.context", context_type=context_type, documents=len(context_documents),
+                     temperature=adjusted_temperature, provider=self.llm_provider)
 
         # PASO 5: Generar respuesta con LLM
         try:
-            answer = self.llm_client.generate_response(
-                query=question,
-                context_documents=context_documents,
-                temperature=adjusted_temperature,
-                max_tokens=max_tokens,
-                context_type=context_type
+            answer, llm_usage = self._generate_answer(
+                question, context_documents, adjusted_temperature, max_tokens, context_type, deadline
             )
 
-            print("=" * 60)
-            print("RESPUESTA GENERADA")
-            print("=" * 60)
-
             # Preparar metadata de documentos relevantes
             relevant_docs = []
 
@@ -240,18 +605,27 @@ class RAGPipeline:
                         "preview": content[:200] + "..." if len(content) > 200 else content
                     })
 
-            return {
+            result = {
                 "answer": answer,
                 "relevant_documents": relevant_docs,
                 "match_type": match_type,
                 "context_type": context_type,
                 "best_faq_similarity": best_similarity,
+                "faq_match_method": match_method,
+                "llm_usage": llm_usage,
                 "error": None
             }
+            self._record_semantic(query_embedding, result, namespace, index_version)
+            logger.info("query.answered", match_type=match_type, context_type=context_type,
+                        method=match_method, elapsed_ms=(time.perf_counter() - start) * 1000)
+            return result
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             error_msg = f"Error al generar respuesta: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.error("query.llm_error", provider=self.llm_provider, error=str(e))
+            LLM_ERRORS.inc(provider=self.llm_provider)
 
             return {
                 "answer": "Ocurrió un error al generar la respuesta.",
@@ -260,6 +634,78 @@ class RAGPipeline:
                 "error": error_msg
             }
 
+    def _generate_answer(
+        self,
+        question: str,
+        context_documents: List[str],
+        temperature: float,
+        max_tokens: int,
+        context_type: str,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[str, Optional[Dict]]:
+        """
+        Genera la respuesta del LLM en streaming, midiendo el primer token y el total
+
+        Args:
+            question: Pregunta del usuario
+            context_documents: Documentos de contexto
+            temperature: Temperatura ajustada
+            max_tokens: Máximo de tokens en la respuesta
+            context_type: Tipo de contexto
+            deadline: Deadline de la petición
+
+        Returns:
+            Tupla (respuesta generada, uso de tokens de esta llamada o None si el
+            proveedor no lo reportó)
+        """
+        start = time.perf_counter()
+        chunks = []
+        usage = {}
+        for chunk in self.llm_client.stream_response(
+            question, context_documents, temperature, max_tokens, context_type, deadline,
+            usage=usage
+        ):
+            if not chunks:
+                ttft = time.perf_counter() - start
+                STAGE_SECONDS.observe(ttft, stage="llm_ttft")
+                record_timing("llm_ttft", ttft)
+            chunks.append(chunk)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="llm_total")
+
+        answer = "".join(chunks)
+        if not answer:
+            raise Exception("Respuesta de la API no tiene el formato esperado")
+        return answer.strip(), usage or None
+
+    def _build_direct_faq_result(self, direct: dict, best_similarity: float) -> dict:
+        """
+        Construye el resultado de una respuesta FAQ directa (sin LLM)
+
+        Args:
+            direct: Resultado de FAQHandler.get_direct_answer
+            best_similarity: Mejor similitud FAQ de la clasificación
+
+        Returns:
+            Diccionario con el mismo formato que query_with_faq
+        """
+        entry = direct['entry']
+        answer = direct['answer']
+
+        return {
+            "answer": answer,
+            "relevant_documents": [{
+                "filename": entry['entry_id'],
+                "similarity": direct['similarity'],
+                "type": "faq",
+                "preview": answer[:200] + "..." if len(answer) > 200 else answer
+            }],
+            "match_type": "high",
+            "context_type": "faq_direct",
+            "best_faq_similarity": best_similarity,
+            "llm_usage": None,
+            "error": None
+        }
+
     def query(
         self,
         question: str,
@@ -342,6 +788,7 @@ class RAGPipeline:
         except Exception as e:
             error_msg = f"Error al generar respuesta: {str(e)}"
             print(f"❌ {error_msg}")
+            LLM_ERRORS.inc(provider=self.llm_provider)
 
             return {
                 "answer": "Ocurrió un error al generar la respuesta.",
@@ -372,7 +819,11 @@ class RAGPipeline:
             "total_documents": self.repository.count_documents(),
             "storage_type": self.storage_type,
             "embedder_model": "BAAI/bge-m3",
-            "llm_model": self.llm_client.model
+            "llm_model": self.llm_client.model,
+            "llm_usage": self.llm_client.get_usage_stats(),
+            "answer_cache": self.answer_cache.get_stats() if self.answer_cache else None,
+            "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache else None,
+            "single_flight": self.single_flight.get_stats() if self.single_flight else None
         }
 
         if self.storage_type == "sql":
@@ -387,6 +838,21 @@ class RAGPipeline:
         pass
 
 
+def _count_query(result: Optional[dict]):
+    """Cuenta una consulta respondida y anota el resultado en el span actual"""
+    if result is not None:
+        QUERIES.inc(
+            match_type=result.get("match_type", "none"),
+            context_type=result.get("context_type") or "none"
+        )
+        set_span_attributes(
+            match_type=result.get("match_type"),
+            context_type=result.get("context_type"),
+            cache_hit=result.get("cache_hit"),
+            coalesced=result.get("coalesced", False)
+        )
+
+
 if __name__ == "__main__":
     # Test del pipeline
     try:
@@ -5,12 +5,18 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import logging
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from database.repository import DocumentRepository
 from database.chroma_vector_store import ChromaVectorStore
 from embeddings.embedder import Embedder
 from config import RetrievalConfig
+from deadline import Deadline
+from observability.log import get_logger
+from observability.metrics import time_stage
+
+logger = get_logger("rag.retriever")
 
 
 class DocumentRetriever:
@@ -58,7 +64,10 @@ class DocumentRetriever:
     def retrieve_relevant_documents(
         self,
         query: str,
-        top_k: int = None
+        top_k: int = None,
+        query_embedding: np.ndarray = None,
+        deadline: Optional[Deadline] = None,
+        neighbors: Optional[List[Tuple[int, str, str, float]]] = None
     ) -> List[Tuple[str, str, float]]:
         """
         Recupera los documentos más relevantes para una consulta usando ChromaDB HNSW
@@ -70,6 +79,9 @@ class DocumentRetriever:
         Args:
             query: Pregunta del usuario
             top_k: Número de documentos a recuperar (None = usar config default)
+            query_embedding: Embedding ya calculado de la consulta (opcional)
+            deadline: Deadline de la petición (opcional)
+            neighbors: Vecinos ya buscados con search_batch (se usan si alcanzan)
 
         Returns:
             Lista de tuplas (filename, content, similarity_score)
@@ -78,16 +90,26 @@ class DocumentRetriever:
         if top_k is None:
             top_k = RetrievalConfig.DEFAULT_TOP_K
 
-        # Generar embedding de la consulta
-        print(f"Generando embedding para la consulta...")
-        query_embedding = self.embedder.generate_embedding(query)
+        covered = self._covers(neighbors, top_k)
+
+        # Generar embedding de la consulta (si no viene precalculado)
+        if query_embedding is None and not covered:
+            if deadline is not None:
+                deadline.check("embedding")
+            with time_stage("embed"):
+                query_embedding = self.embedder.generate_embedding(query)
 
-        # Buscar usando ChromaDB HNSW (mucho más eficiente)
-        print(f"Buscando top-{top_k} documentos usando ChromaDB HNSW...")
-        results = self.storage.search_similar(query_embedding, top_k=top_k)
+        if deadline is not None:
+            deadline.check("doc_search")
+
+        # Buscar usando ChromaDB HNSW (mucho más eficiente), o recortar los vecinos ya buscados
+        if covered:
+            results = neighbors[:top_k]
+        else:
+            results = self.storage.search_similar(query_embedding, top_k=top_k)
 
         if not results:
-            print("Advertencia: No hay documentos en la base de datos")
+            logger.warning("retrieval.empty_collection")
             return []
 
         # Convertir formato de ChromaDB a formato esperado
@@ -98,9 +120,9 @@ class DocumentRetriever:
             for _, filename, content, similarity in results
         ]
 
-        print(f"\nTop {top_k} documentos más relevantes:")
-        for i, (filename, _, score) in enumerate(top_documents, 1):
-            print(f"{i}. {filename} (similitud: {score:.4f})")
+        if logger.is_enabled_for(logging.DEBUG):
+            for i, (filename, _, score) in enumerate(top_documents, 1):
+                logger.debug("retrieval.result", rank=i, filename=filename, similarity=score)
 
         return top_documents
 
@@ -108,7 +130,9 @@ class DocumentRetriever:
         self,
         query: str,
         threshold: float = None,
-        max_documents: int = None
+        max_documents: int = None,
+        query_embedding: np.ndarray = None,
+        neighbors: Optional[List[Tuple[int, str, str, float]]] = None
     ) -> List[Tuple[str, str, float]]:
         """
         Recupera documentos que superen un umbral de similitud usando ChromaDB HNSW
@@ -120,6 +144,8 @@ class DocumentRetriever:
             query: Pregunta del usuario
             threshold: Umbral mínimo de similitud (None = usar config default)
             max_documents: Máximo número de documentos a retornar (None = usar config default)
+            query_embedding: Embedding ya calculado de la consulta (opcional)
+            neighbors: Vecinos ya buscados con search_batch (se usan si alcanzan)
 
         Returns:
             Lista de tuplas (filename, content, similarity_score)
@@ -130,9 +156,6 @@ class DocumentRetriever:
         if max_documents is None:
             max_documents = RetrievalConfig.MAX_DOCUMENTS_WITH_THRESHOLD
 
-        # Generar embedding de la consulta
-        query_embedding = self.embedder.generate_embedding(query)
-
         # Recuperar más documentos de los necesarios para compensar filtrado
         # (recuperamos el doble del máximo para tener suficientes después del filtro)
         initial_k = min(max_documents * 2, self.storage.count_documents())
@@ -141,7 +164,13 @@ class DocumentRetriever:
             return []
 
         # Usar ChromaDB HNSW para búsqueda inicial
-        results = self.storage.search_similar(query_embedding, top_k=initial_k)
+        if self._covers(neighbors, initial_k):
+            results = neighbors[:initial_k]
+        else:
+            # Generar embedding de la consulta (si no viene precalculado)
+            if query_embedding is None:
+                query_embedding = self.embedder.generate_embedding(query)
+            results = self.storage.search_similar(query_embedding, top_k=initial_k)
 
         # Filtrar por umbral
         relevant_documents = [
@@ -153,6 +182,29 @@ class DocumentRetriever:
         # Limitar a max_documents
         return relevant_documents[:max_documents]
 
+    def search_batch(self, query_embeddings: np.ndarray, top_k: int) -> List[List[Tuple[int, str, str, float]]]:
+        """
+        Busca los vecinos de varias consultas en una sola llamada a ChromaDB
+
+        El resultado de cada consulta se pasa como neighbors a
+        retrieve_relevant_documents / retrieve_with_threshold, que lo recortan
+        en lugar de volver a buscar.
+
+        Args:
+            query_embeddings: Matriz (n, dim) con un embedding por consulta
+            top_k: Vecinos por consulta (el mayor top_k que se vaya a pedir)
+
+        Returns:
+            Una lista de tuplas (id, filename, content, similarity_score) por consulta
+        """
+        return self.storage.search_similar_batch(query_embeddings, top_k=top_k)
+
+    def _covers(self, neighbors: Optional[list], top_k: int) -> bool:
+        """Indica si los vecinos ya buscados alcanzan para top_k resultados"""
+        if neighbors is None:
+            return False
+        return len(neighbors) >= top_k or len(neighbors) >= self.storage.count_documents()
+
 
 if __name__ == "__main__":
     # Test del retriever
@@ -0,0 +1,7 @@
+"""
+Configuración de pytest: los módulos de src/ se importan como en la app
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -0,0 +1,30 @@
+"""
+Pruebas del control de admisión de /chat (api/admission.py)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.admission import AdmissionController, AdmissionRejected
+
+
+def test_degraded_requests_are_bounded():
+    async def scenario():
+        admission = AdmissionController(max_degraded=2)
+        await admission.acquire_degraded()
+        await admission.acquire_degraded()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire_degraded()
+        assert rejected.value.status_code == 503
+
+        admission.release_degraded()
+        await admission.acquire_degraded()
+        stats = admission.get_stats()
+        assert stats["active_degraded"] == 2
+        assert stats["rejected_degraded_busy"] == 1
+
+    asyncio.run(scenario())
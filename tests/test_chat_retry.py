@@ -0,0 +1,83 @@
+"""
+Pruebas de /chat: reintentos con llave de idempotencia tras una desconexión (api/main.py)
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import HTTPException, Response
+
+import api.main as api
+from cache.idempotency import IdempotencyStore
+
+
+class _SlowChatbot:
+    """Chatbot cuya generación tarda y verifica el deadline como el pipeline"""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def chat(self, user_message, deadline=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        for _ in range(30):
+            deadline.check("llm")
+            time.sleep(0.01)
+        return {"answer": f"generada {n}", "match_type": "high", "error": None}
+
+
+class _Connection:
+    """Petición HTTP con el estado de conexión controlado por la prueba"""
+
+    def __init__(self, disconnected: bool):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+@pytest.fixture
+def chatbot(monkeypatch):
+    chatbot = _SlowChatbot()
+    store = IdempotencyStore(ttl_seconds=60)
+    monkeypatch.setattr(api, "get_chatbot", lambda session_id, llm_provider=None: chatbot)
+    monkeypatch.setattr(api, "get_idempotency_store", lambda: store)
+    monkeypatch.setattr(api, "capture_request", lambda **kwargs: None)
+    monkeypatch.setattr(api, "admission", None)
+    return chatbot
+
+
+def _send(key, disconnected):
+    request = api.ChatRequest(message="¿Cómo solicito una beca?", session_id="s")
+    return api.chat(request, Response(), _Connection(disconnected), idempotency_key=key)
+
+
+def test_retry_after_disconnect_attaches_to_original(chatbot):
+    async def scenario():
+        # El cliente se corta a mitad de la generación y reintenta con la misma llave
+        original = asyncio.create_task(_send("k", disconnected=True))
+        await asyncio.sleep(0.1)
+        retry = await _send("k", disconnected=False)
+        return await original, retry
+
+    original, retry = asyncio.run(scenario())
+
+    assert chatbot.calls == 1
+    assert retry.answer == original.answer == "generada 1"
+    assert retry.replayed
+
+
+def test_disconnect_without_key_cancels_generation(chatbot):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(_send(None, disconnected=True))
+
+    assert error.value.status_code == 499
@@ -0,0 +1,84 @@
+"""
+Pruebas del protocolo del servicio de embeddings (embeddings/embedding_service.py)
+"""
+import os
+import queue
+import stat
+import threading
+import time
+from multiprocessing.connection import Client
+
+import numpy as np
+import pytest
+
+from embeddings.embedding_service import EmbeddingServer, RemoteEmbedder
+
+DIM = 4
+
+
+class _FixedEmbedder:
+    """Embedder determinista sin modelo: el vector de cada texto es su largo"""
+
+    def get_embedding_dimension(self):
+        return DIM
+
+    def get_model_info(self):
+        return {"model_name": "fixed", "device": "cpu"}
+
+    def generate_embeddings_batch(self, texts):
+        return np.array([[len(text)] * DIM for text in texts], dtype='float32')
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = EmbeddingServer.__new__(EmbeddingServer)
+    server.socket_path = str(tmp_path / "emb.sock")
+    server.authkey = None
+    server.max_batch = 8
+    server.embedder = _FixedEmbedder()
+    server.dim = DIM
+    server._jobs = queue.Queue()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for _ in range(200):
+        if os.path.exists(server.socket_path):
+            break
+        time.sleep(0.01)
+    return server
+
+
+def test_socket_and_generated_key_are_private(server):
+    assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(server.socket_path + ".key").st_mode) == 0o600
+    assert len(server.authkey) == 64
+
+
+def test_client_uses_generated_key(server):
+    embedder = RemoteEmbedder(socket_path=server.socket_path, max_batch=2)
+    try:
+        result = embedder.generate_embeddings_batch(["a", "bbb", "cc"])
+        assert result[:, 0].tolist() == [1.0, 3.0, 2.0]
+    finally:
+        embedder.close()
+
+
+def test_encode_without_attach_is_an_error(server):
+    conn = Client(server.socket_path, family='AF_UNIX', authkey=server.authkey)
+    try:
+        conn.recv()
+        conn.send(("encode", ["hola"]))
+        reply = conn.recv()
+        assert reply[0] == "error"
+    finally:
+        conn.close()
+
+
+def test_encode_larger_than_block_is_an_error(server):
+    embedder = RemoteEmbedder(socket_path=server.socket_path, max_batch=1)
+    try:
+        conn = embedder._channel()["conn"]
+        conn.send(("encode", ["uno", "dos"]))
+        assert conn.recv()[0] == "error"
+        # La conexión sigue sirviendo
+        assert embedder.generate_embedding("tres")[0] == 4.0
+    finally:
+        embedder.close()
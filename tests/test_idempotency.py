@@ -0,0 +1,91 @@
+"""
+Pruebas del almacén de idempotencia de /chat (cache/idempotency.py)
+"""
+import threading
+import time
+
+import pytest
+
+from cache.idempotency import IdempotencyConflictError, IdempotencyStore
+from deadline import Deadline, DeadlineExceeded
+
+
+def test_successful_result_is_replayed():
+    store = IdempotencyStore(ttl_seconds=60)
+    calls = []
+
+    def process():
+        calls.append(1)
+        return {"answer": "ok", "error": None}
+
+    assert store.run("s:1", "f", process) == ({"answer": "ok", "error": None}, False)
+    assert store.run("s:1", "f", process) == ({"answer": "ok", "error": None}, True)
+    assert len(calls) == 1
+
+
+def test_error_result_is_not_replayed():
+    store = IdempotencyStore(ttl_seconds=60)
+    outcomes = iter([
+        {"answer": "Ocurrió un error al generar la respuesta.", "error": "Error al generar respuesta: 503"},
+        {"answer": "ok", "error": None},
+    ])
+
+    first, replayed = store.run("s:1", "f", lambda: next(outcomes))
+    assert first["error"] is not None and not replayed
+
+    # El reintento vuelve a procesar en lugar de repetir el fallo
+    second, replayed = store.run("s:1", "f", lambda: next(outcomes))
+    assert second == {"answer": "ok", "error": None} and not replayed
+
+
+def test_key_reused_with_other_request_conflicts():
+    store = IdempotencyStore(ttl_seconds=60)
+    store.run("s:1", "f1", lambda: {"answer": "ok", "error": None})
+    with pytest.raises(IdempotencyConflictError):
+        store.run("s:1", "f2", lambda: {"answer": "otra", "error": None})
+
+
+def test_unanswered_degraded_result_is_not_replayed():
+    store = IdempotencyStore(ttl_seconds=60)
+    assert store.run("s:1", "f", lambda: None) == (None, False)
+    assert store.run("s:1", "f", lambda: {"answer": "ok", "error": None}) == ({"answer": "ok", "error": None}, False)
+
+
+def test_retry_attached_to_cancelled_request_is_answered():
+    store = IdempotencyStore(ttl_seconds=60)
+    original = Deadline(30)
+    started = threading.Event()
+    outcomes = {}
+
+    def original_process():
+        started.set()
+        while True:
+            original.check("llm")
+            time.sleep(0.005)
+
+    def run_original():
+        try:
+            store.run("s:1", "f", original_process)
+        except DeadlineExceeded as e:
+            outcomes["original"] = e
+
+    thread = threading.Thread(target=run_original)
+    thread.start()
+    started.wait(1)
+
+    # Reintento del cliente tras su timeout: se une a la petición en curso
+    retry = threading.Thread(
+        target=lambda: outcomes.setdefault("retry", store.run("s:1", "f", lambda: {"answer": "ok", "error": None}))
+    )
+    retry.start()
+    time.sleep(0.05)
+
+    # La conexión original se cierra: el reintento no debe recibir la cancelación
+    original.cancel()
+    thread.join()
+    retry.join()
+
+    assert outcomes["original"].cancelled
+    assert outcomes["retry"] == ({"answer": "ok", "error": None}, False)
+    # Y el resultado queda guardado para reintentos posteriores
+    assert store.run("s:1", "f", lambda: None) == ({"answer": "ok", "error": None}, True)
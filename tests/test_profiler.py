@@ -0,0 +1,50 @@
+"""
+Pruebas del profiler por muestreo (observability/profiler.py)
+"""
+import os
+import signal
+import time
+
+import pytest
+
+from observability import profiler
+
+
+@pytest.fixture
+def no_active_session():
+    yield
+    session = profiler._active
+    if session is not None:
+        session.stop()
+        session._thread.join(5)
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR2"), reason="requiere SIGUSR2")
+def test_signal_while_lock_is_held_does_not_deadlock(tmp_path, no_active_session):
+    previous = signal.getsignal(signal.SIGUSR2)
+    profiler.install_signal_handler(duration=0.05, output_dir=str(tmp_path))
+    try:
+        # La señal llega al hilo principal mientras él mismo tiene el lock
+        with profiler._lock:
+            os.kill(os.getpid(), signal.SIGUSR2)
+            time.sleep(0.05)
+
+        for _ in range(200):
+            if profiler._sessions and profiler._active is None:
+                break
+            time.sleep(0.01)
+        assert any(s.duration == 0.05 for s in profiler._sessions.values())
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"duration": 0},
+    {"duration": -1},
+    {"max_requests": 0},
+    {"duration": 1, "interval": 0},
+])
+def test_invalid_session_parameters(kwargs, tmp_path):
+    with pytest.raises(ValueError):
+        profiler.start_profile(output_dir=str(tmp_path), **kwargs)
+    assert profiler._active is None
@@ -0,0 +1,174 @@
+"""
+Pruebas de la coalescencia de consultas (cache/single_flight.py)
+"""
+import threading
+import time
+
+import pytest
+
+from cache.single_flight import SingleFlight
+from deadline import Deadline, DeadlineExceeded
+
+
+def _start_leader(flight: SingleFlight, key: str, fn):
+    """Lanza el líder en un hilo y espera a que tome la llave"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = flight.do(key, fn)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    while flight.get_stats()["in_flight"] == 0:
+        time.sleep(0.001)
+    return thread, outcome
+
+
+def test_followers_share_leader_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return {"answer": "ok"}
+
+    leader, leader_outcome = _start_leader(flight, "k", compute)
+    results = []
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do("k", compute)))
+        for _ in range(3)
+    ]
+    for follower in followers:
+        follower.start()
+    while flight.get_stats()["coalesced"] < 3:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    for follower in followers:
+        follower.join()
+
+    assert len(calls) == 1
+    assert leader_outcome["result"] == ({"answer": "ok"}, False)
+    assert results == [({"answer": "ok"}, True)] * 3
+    assert flight.get_stats()["in_flight"] == 0
+
+
+def test_leader_error_propagates_to_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(1)
+        raise ValueError("proveedor caído")
+
+    leader, leader_outcome = _start_leader(flight, "k", fail)
+    errors = []
+
+    def follow():
+        try:
+            flight.do("k", lambda: "no debería ejecutarse")
+        except ValueError as e:
+            errors.append(e)
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    while flight.get_stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert isinstance(leader_outcome["error"], ValueError)
+    assert len(errors) == 1 and str(errors[0]) == "proveedor caído"
+    # La llave queda libre: la siguiente llamada vuelve a calcular
+    assert flight.do("k", lambda: "nuevo") == ("nuevo", False)
+
+
+def test_follower_timeout():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader, _ = _start_leader(flight, "k", lambda: release.wait(1))
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        flight.do("k", lambda: None, timeout=0.05)
+    assert time.monotonic() - start < 0.5
+
+    release.set()
+    leader.join()
+
+
+def test_distinct_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.get_stats()["coalesced"] == 0
+
+
+def _pipeline_compute(deadline: Deadline, started: threading.Event, calls: list):
+    """Cálculo que, como el pipeline, verifica el deadline de su propia petición"""
+    def compute():
+        calls.append(deadline)
+        started.set()
+        for _ in range(100):
+            deadline.check("llm")
+            time.sleep(0.005)
+        return {"answer": "ok"}
+    return compute
+
+
+def test_leader_cancellation_is_not_shared_with_followers():
+    flight = SingleFlight()
+    calls = []
+    leader_deadline = Deadline(30)
+    started = threading.Event()
+    leader, leader_outcome = _start_leader(
+        flight, "k", _pipeline_compute(leader_deadline, started, calls)
+    )
+    started.wait(1)
+
+    follower_deadline = Deadline(30)
+    outcome = {}
+
+    def follow():
+        try:
+            outcome["result"] = flight.do(
+                "k", _pipeline_compute(follower_deadline, threading.Event(), calls), timeout=5
+            )
+        except Exception as e:
+            outcome["error"] = e
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    while flight.get_stats()["coalesced"] < 1:
+        time.sleep(0.001)
+
+    # El cliente del líder se desconecta
+    leader_deadline.cancel()
+    leader.join()
+    follower.join()
+
+    assert isinstance(leader_outcome["error"], DeadlineExceeded)
+    assert leader_outcome["error"].cancelled
+    # El seguidor sigue conectado: recalcula con su propio deadline como nuevo líder
+    assert "error" not in outcome
+    assert outcome["result"] == ({"answer": "ok"}, False)
+    assert calls == [leader_deadline, follower_deadline]
+    assert flight.get_stats()["retried"] == 1
+
+
+def test_leader_deadline_does_not_extend_follower_timeout():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader, _ = _start_leader(flight, "k", lambda: release.wait(1))
+
+    with pytest.raises(TimeoutError):
+        flight.do("k", lambda: None, timeout=0.05)
+
+    release.set()
+    leader.join()
@@ -0,0 +1,42 @@
+"""
+Pruebas del cliente LLM de prueba: uso de tokens por llamada y contador de intentos
+"""
+import threading
+
+from llm.stub_client import StubLLMClient
+
+
+def test_stream_usage_is_per_call():
+    client = StubLLMClient(ttft_ms=0, tokens_per_second=0, error_rate=0, jitter=0)
+    usages = {}
+
+    def call(name, max_tokens):
+        usage = {}
+        "".join(client.stream_response(name, ["contexto"], max_tokens=max_tokens, usage=usage))
+        usages[name] = usage
+
+    threads = [threading.Thread(target=call, args=(f"pregunta {n}", n)) for n in (3, 7)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert usages["pregunta 3"]["completion_tokens"] == 3
+    assert usages["pregunta 7"]["completion_tokens"] == 7
+    assert client.get_usage_stats()["completion_tokens"] == 10
+
+
+def test_attempt_counter_is_bounded(monkeypatch):
+    monkeypatch.setattr("llm.stub_client._MAX_TRACKED_QUERIES", 3)
+    client = StubLLMClient(seed=1)
+
+    first = client._rng("a").random()
+    for query in ["b", "c", "a", "d", "e"]:
+        client._rng(query)
+
+    assert list(client._attempts) == ["a", "d", "e"]
+    assert client._attempts["a"] == 2
+    # "b" se olvidó: vuelve a comportarse como su primer intento
+    client._rng("b")
+    assert client._attempts["b"] == 1
+    assert StubLLMClient(seed=1)._rng("a").random() == first
@@ -0,0 +1,46 @@
+"""
+Pruebas del exportador JSONL de trazas (observability/tracing.py)
+"""
+import json
+import threading
+
+from observability.tracing import JSONLExporter
+
+
+def _serialize(item):
+    if item == "malo":
+        raise TypeError("no serializable")
+    return {"item": item}
+
+
+def _flush(exporter, timeout=5):
+    done = threading.Thread(target=exporter.flush, daemon=True)
+    done.start()
+    done.join(timeout)
+    return not done.is_alive()
+
+
+def test_bad_record_does_not_kill_writer(tmp_path):
+    path = tmp_path / "trazas.jsonl"
+    exporter = JSONLExporter(str(path), serialize=_serialize)
+
+    for item in ["a", "malo", "b"]:
+        exporter.export(item)
+    assert _flush(exporter)
+
+    exporter.export("c")
+    assert _flush(exporter)
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["item"] for line in lines] == ["a", "b", "c"]
+    assert exporter.dropped == 1
+
+
+def test_unwritable_path_does_not_hang_flush(tmp_path):
+    exporter = JSONLExporter(str(tmp_path / "trazas.jsonl"), serialize=_serialize)
+    exporter.path = tmp_path  # un directorio: open() falla
+
+    exporter.export("a")
+    exporter.export("b")
+    assert _flush(exporter)
+    assert exporter.dropped == 2